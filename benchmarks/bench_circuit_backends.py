@@ -0,0 +1,62 @@
+'''
+Benchmark comparing the NumPy and Numba backends used to evaluate batches of
+circuits in eisy.simulation.data_simulation.batch_simulation.
+
+Usage: python benchmarks/bench_circuit_backends.py [n_sets]
+'''
+import sys
+import timeit
+
+import numpy as np
+
+from eisy.simulation import circuits, circuits_jit
+from eisy.simulation.data_simulation import batch_simulation
+
+
+def random_elements(circuit_name, n_sets, rng):
+    '''
+    Function that draws n_sets random values for each circuit element.
+    '''
+    elements = {}
+    for name in circuits.CIRCUIT_ELEMENTS[circuit_name]:
+        if name.startswith('alpha'):
+            elements[name] = rng.uniform(0.5, 1, n_sets)
+        elif name.startswith(('Q', 'C')):
+            elements[name] = 10**rng.uniform(-7, -3, n_sets)
+        else:
+            elements[name] = 10**rng.uniform(0, 3, n_sets)
+    return elements
+
+
+def main(n_sets=100000, repeat=3):
+    rng = np.random.default_rng(0)
+    freq_range = circuits.freq_gen(10**6, 0.01)
+    print('{} sets of circuit elements x {} frequencies'.format(
+          n_sets, len(freq_range[1])))
+    if not circuits_jit.available():
+        print('Numba is not installed, only the numpy backend is timed.')
+    print('{:<20}{:>12}{:>12}{:>10}'.format('circuit', 'numpy [s]',
+                                            'numba [s]', 'speedup'))
+    for circuit_name in circuits.CIRCUIT_ELEMENTS:
+        elements = random_elements(circuit_name, n_sets, rng)
+        times = {}
+        for backend in ('numpy', 'numba'):
+            if backend == 'numba' and not circuits_jit.available():
+                continue
+            # the first call compiles the numba kernel
+            batch_simulation(freq_range, circuit_name, backend=backend,
+                             **elements)
+            times[backend] = min(timeit.repeat(
+                lambda: batch_simulation(freq_range, circuit_name,
+                                         backend=backend, **elements),
+                number=1, repeat=repeat))
+        if 'numba' in times:
+            print('{:<20}{:>12.3f}{:>12.3f}{:>9.1f}x'.format(
+                  circuit_name, times['numpy'], times['numba'],
+                  times['numpy']/times['numba']))
+        else:
+            print('{:<20}{:>12.3f}'.format(circuit_name, times['numpy']))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
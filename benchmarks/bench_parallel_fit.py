@@ -0,0 +1,48 @@
+'''
+Benchmark measuring the scaling of eisy.fitting.parallel.fit_parallel with
+the number of worker processes.
+
+Usage: python benchmarks/bench_parallel_fit.py [n_spectra] [max_workers]
+'''
+import os
+import sys
+import time
+
+import numpy as np
+
+from eisy.fitting.least_squares import fit_circuit
+from eisy.fitting.parallel import fit_parallel
+from eisy.simulation import circuits
+
+
+def main(n_spectra=20000, max_workers=os.cpu_count()):
+    rng = np.random.default_rng(0)
+    freq_range = circuits.freq_gen(10**6, 0.01)
+    elements = {'Rs': rng.uniform(5, 50, n_spectra),
+                'Rp': rng.uniform(50, 500, n_spectra),
+                'Q': 10**rng.uniform(-6, -4, n_spectra),
+                'alpha': rng.uniform(0.7, 1, n_spectra)}
+    impedance = circuits.cir_RsRQ(freq_range[1], **elements)
+    print('{} RsRQ spectra x {} frequencies'.format(
+          n_spectra, len(freq_range[1])))
+
+    start = time.perf_counter()
+    fit_circuit(freq_range[1], impedance, 'RsRQ')
+    serial = time.perf_counter() - start
+    print('{:<10}{:>12}{:>10}{:>12}'.format('workers', 'time [s]',
+                                            'speedup', 'efficiency'))
+    print('{:<10}{:>12.2f}'.format('serial', serial))
+
+    n_workers = 1
+    while n_workers <= max_workers:
+        start = time.perf_counter()
+        fit_parallel(freq_range[1], impedance, 'RsRQ', n_workers=n_workers)
+        elapsed = time.perf_counter() - start
+        print('{:<10}{:>12.2f}{:>9.1f}x{:>11.0%}'.format(
+              n_workers, elapsed, serial/elapsed,
+              serial/elapsed/n_workers))
+        n_workers *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,59 @@
+'''
+Benchmark comparing the single (float32/complex64) and double
+(float64/complex128) precision simulation of batches of circuits with
+eisy.simulation.data_simulation.batch_simulation, with the memory of each
+batch and the accuracy of the single precision results.
+
+Usage: python benchmarks/bench_precision.py [n_sets]
+'''
+import sys
+import timeit
+
+import numpy as np
+
+from eisy.simulation import circuits
+from eisy.simulation.data_simulation import batch_simulation
+
+
+def random_elements(circuit_name, n_sets, rng):
+    '''
+    Function that draws n_sets random values for each circuit element.
+    '''
+    elements = {}
+    for name in circuits.CIRCUIT_ELEMENTS[circuit_name]:
+        if name.startswith('alpha'):
+            elements[name] = rng.uniform(0.5, 1, n_sets)
+        elif name.startswith(('Q', 'C')):
+            elements[name] = 10**rng.uniform(-7, -3, n_sets)
+        else:
+            elements[name] = 10**rng.uniform(0, 3, n_sets)
+    return elements
+
+
+def main(n_sets=20000):
+    rng = np.random.default_rng(0)
+    freq_range = circuits.freq_gen(10**6, 0.01)
+    print('{} sets x {} frequencies'.format(n_sets, len(freq_range[1])))
+    print('{:<20}{:>12}{:>12}{:>10}{:>12}'.format(
+          'circuit', 'f64 [ms]', 'f32 [ms]', 'MB f32', 'max error'))
+    for circuit_name in circuits.CIRCUIT_ELEMENTS:
+        elements = random_elements(circuit_name, n_sets, rng)
+        times = {}
+        for dtype in ('float64', 'float32'):
+            times[dtype] = min(timeit.repeat(
+                lambda: batch_simulation(freq_range, circuit_name,
+                                         backend='numpy', dtype=dtype,
+                                         **elements),
+                number=1, repeat=5))
+        double = batch_simulation(freq_range, circuit_name, backend='numpy',
+                                  **elements)
+        single = batch_simulation(freq_range, circuit_name, backend='numpy',
+                                  dtype='float32', **elements)
+        error = np.max(np.abs(single - double)/np.abs(double))
+        print('{:<20}{:>12.1f}{:>12.1f}{:>10.1f}{:>12.1e}'.format(
+              circuit_name, 1e3*times['float64'], 1e3*times['float32'],
+              single.nbytes/2**20, error))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
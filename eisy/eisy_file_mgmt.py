@@ -981,7 +981,7 @@ def SQL_setup(sql_path="data/", sql_file="eisy_sql.db"):
     # serial_id | freq_hz | z_real_ohm | z_imag_ohm | z_comb_ohm | phase_rad |
 
     # PROCESSED DATA:
-    # serial_id | ohmic_r | rc_fit | circuit_guess<> |
+    # serial_id | ohmic_r | rc_fit | circuit_guess<> | kk_residual |
 
     # NOISE_CLASSIFY:
     # serial_id | noise <> | confidence | model_error | model_training_size |
@@ -1025,6 +1025,7 @@ def SQL_setup(sql_path="data/", sql_file="eisy_sql.db"):
         ohmic_r = Column(Float)
         rc_fit = Column(Float)
         circuit_guess = Column(String)
+        kk_residual = Column(Float)
 
     class Noise_Classification(Base):
         __tablename__ = "noise_classification"
@@ -0,0 +1,6 @@
+from .version import __version__
+from .least_squares import fit_circuit, stack_spectra
+
+__all__ = [__version__, 'fit_circuit', 'stack_spectra']
+
+# name = 'fitting'
@@ -0,0 +1,175 @@
+import collections
+import functools
+
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+
+DRTResult = collections.namedtuple('DRTResult', ['tau', 'gamma', 'R_inf',
+                                                 'Z_fit', 'residual'])
+DRTResult.__doc__ = '''
+Distribution of relaxation times of a stack of spectra.
+
+tau : numpy.ndarray
+      (M,) relaxation times at which the distribution is computed [s]
+gamma : numpy.ndarray
+        (N, M) distribution of relaxation times of each spectrum, such that
+        the polarization resistance is the integral of gamma over ln(tau)
+        [ohm]
+R_inf : numpy.ndarray
+        (N,) high frequency resistance of each spectrum [ohm]
+Z_fit : numpy.ndarray
+        (N, F) impedance reconstructed from the distribution [ohm]
+residual : numpy.ndarray
+           (N,) root mean square of the residuals of each spectrum, relative
+           to the modulus of its impedance
+'''
+
+
+def _relaxation_times(angular_freq, n_tau):
+    '''
+    Function that returns n_tau relaxation times logarithmically spaced
+    between 1/w_max and 1/w_min, from the shortest to the longest.
+    '''
+    return np.logspace(-np.log10(max(angular_freq)),
+                       -np.log10(min(angular_freq)), n_tau)
+
+
+def _discretization(angular_freq, tau):
+    '''
+    Function that returns the (2F, M + 1) matrix giving the real parts
+    followed by the imaginary parts of the impedance of a series resistance
+    and of a piecewise constant distribution of relaxation times:
+
+        Z(w) = R_inf + sum_m gamma_m*dln(tau)/(1 + j*w*tau_m)
+    '''
+    angular_freq = np.asarray(angular_freq)
+    n_freq = len(angular_freq)
+    width = np.gradient(np.log(tau))
+    wt = angular_freq[:, np.newaxis]*tau
+    matrix = np.zeros((2*n_freq, len(tau) + 1))
+    matrix[:n_freq, 0] = 1
+    matrix[:n_freq, 1:] = width/(1 + wt**2)
+    matrix[n_freq:, 1:] = -width*wt/(1 + wt**2)
+    return matrix
+
+
+def _tikhonov(n_tau, order):
+    '''
+    Function that returns the (M - order, M + 1) finite difference matrix of
+    the given order applied to the distribution, leaving R_inf free.
+    '''
+    differences = np.diff(np.eye(n_tau), n=order, axis=0)
+    return np.hstack([np.zeros((len(differences), 1)), differences])
+
+
+@functools.lru_cache(maxsize=32)
+def _drt_system(angular_freq, n_tau, lambda_reg, order):
+    '''
+    Function that builds the discretization matrix of a frequency grid and
+    the Cholesky factorization of the regularized normal equations,
+
+        (A^T A + lambda*L^T L) x = A^T z
+
+    which depend only on the grid and on the regularization. The grid is
+    given as a tuple, so that the system is built once per grid and
+    regularization value.
+    '''
+    tau = _relaxation_times(angular_freq, n_tau)
+    matrix = _discretization(angular_freq, tau)
+    tikhonov = _tikhonov(n_tau, order)
+    normal = matrix.T @ matrix + lambda_reg*(tikhonov.T @ tikhonov)
+    # a vanishing ridge keeps the system positive definite when the
+    # regularization leaves some combinations of the unknowns free
+    normal += 1e-12*np.trace(normal)/len(normal)*np.eye(len(normal))
+    factor = cho_factor(normal)
+    for array in (tau, matrix, factor[0]):
+        array.flags.writeable = False
+    return tau, matrix, factor
+
+
+def drt_system(angular_freq, n_tau=None, lambda_reg=1e-3, order=1):
+    '''
+    Function that returns the relaxation times, the discretization matrix
+    and the factorized regularized system of the DRT of a frequency grid.
+    The returned arrays are cached and shared, hence read-only.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   (F,) angular frequency, such as circuits.freq_gen()[1]
+                   [1/s]
+    n_tau : int
+            number of relaxation times M. If None, one per frequency.
+    lambda_reg : float
+                 Tikhonov regularization parameter. Larger values give
+                 smoother distributions.
+    order : int
+            order of the derivative of the distribution penalized by the
+            regularization: 0 (the distribution itself), 1 or 2
+
+    Returns
+    ----------
+    tau : numpy.ndarray
+          (M,) relaxation times [s]
+    matrix : numpy.ndarray
+             (2F, M + 1) discretization matrix
+    factor : tuple
+             Cholesky factorization of the normal equations, as returned by
+             scipy.linalg.cho_factor
+    '''
+    angular_freq = tuple(np.asarray(angular_freq, dtype=float).tolist())
+    assert len(angular_freq) > 1, 'at least two frequencies are needed.'
+    assert min(angular_freq) > 0, 'the frequencies should be positive.'
+    if order not in (0, 1, 2):
+        raise AssertionError('The order of the regularization should be 0, '
+                             '1 or 2')
+    if lambda_reg < 0:
+        raise AssertionError('The regularization parameter should not be '
+                             'negative')
+    if n_tau is None:
+        n_tau = len(angular_freq)
+    return _drt_system(angular_freq, int(n_tau), float(lambda_reg), order)
+
+
+def compute_drt(angular_freq, impedance, n_tau=None, lambda_reg=1e-3,
+                order=1):
+    '''
+    Function that computes the distribution of relaxation times (DRT) of a
+    stack of spectra measured over the same frequency grid, by Tikhonov
+    regularized least squares.
+
+    The regularized system depends only on the grid, so its Cholesky
+    factorization is cached by drt_system: after the first call on a grid,
+    the DRT of the spectra costs a product with the discretization matrix
+    and one forward and back substitution per spectrum, all the spectra
+    being solved together. The distribution is not constrained to be
+    positive.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   (F,) angular frequency shared by the spectra [1/s]
+    impedance : array-like
+                (N, F) complex impedance of the spectra [ohm]
+    n_tau, lambda_reg, order : refer to drt_system
+
+    Returns
+    ----------
+    result : DRTResult
+             named tuple containing the relaxation times, the distribution
+             and the high frequency resistance of each spectrum, and the
+             quality of the reconstruction.
+    '''
+    impedance = np.atleast_2d(np.asarray(impedance, dtype=complex))
+    assert impedance.shape[1] == len(angular_freq), 'the impedance and the\
+ frequency range do not match in length.'
+    tau, matrix, factor = drt_system(angular_freq, n_tau, lambda_reg, order)
+    n_freq = impedance.shape[1]
+
+    data = np.concatenate([impedance.real, impedance.imag], axis=1)
+    solution = cho_solve(factor, matrix.T @ data.T).T
+    fitted = solution @ matrix.T
+    Z_fit = fitted[:, :n_freq] + 1j*fitted[:, n_freq:]
+    residual = np.sqrt(np.mean(np.abs(impedance - Z_fit)**2 /
+                               np.abs(impedance)**2, axis=1)/2)
+    return DRTResult(tau, solution[:, 1:], solution[:, 0], Z_fit, residual)
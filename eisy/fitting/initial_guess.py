@@ -0,0 +1,229 @@
+import numpy as np
+
+from ..simulation import circuits
+from ..simulation.circuit_registry import get_circuit
+
+# Bounds of the estimated CPE exponents
+ALPHA_RANGE = (0.3, 1.0)
+
+
+def _spectra(angular_freq, impedance):
+    '''
+    Function that returns the angular frequency sorted from the highest to
+    the lowest value, with the real part and the opposite of the imaginary
+    part of the (N, F) impedance sorted accordingly.
+
+    The impedance is either a complex array or the list returned by
+    data_simulation.impedance_array, whose second and third items are the
+    real and the imaginary parts of the impedance.
+    '''
+    if isinstance(impedance, (list, tuple)):
+        real_Z, imag_Z = impedance[1], impedance[2]
+    else:
+        impedance = np.asarray(impedance)
+        real_Z, imag_Z = impedance.real, impedance.imag
+    real_Z = np.atleast_2d(np.asarray(real_Z, dtype=float))
+    imag_Z = np.atleast_2d(np.asarray(imag_Z, dtype=float))
+    angular_freq = np.asarray(angular_freq, dtype=float)
+    assert real_Z.shape[1] == len(angular_freq), 'the impedance and the\
+ frequency range do not match in length.'
+    order = np.argsort(angular_freq)[::-1]
+    return angular_freq[order], real_Z[:, order], -imag_Z[:, order]
+
+
+def _peaks(height, threshold):
+    '''
+    Function that returns the (N, F) curves smoothed by a three points moving
+    average and the mask of their local maxima higher than threshold times
+    the maximum of the curve.
+    '''
+    smooth = height.copy()
+    smooth[:, 1:-1] = (height[:, :-2] + height[:, 1:-1] + height[:, 2:])/3
+    peak = np.zeros(height.shape, dtype=bool)
+    peak[:, 1:-1] = (smooth[:, 1:-1] >= smooth[:, :-2]) & \
+        (smooth[:, 1:-1] > smooth[:, 2:])
+    peak &= smooth >= threshold*smooth.max(axis=1, keepdims=True)
+    return smooth, peak
+
+
+def _apex(height):
+    '''
+    Function that returns the index of the apex of the Nyquist arc of each
+    spectrum, given the (N, F) opposite of the imaginary part sorted from
+    the highest to the lowest frequency: the highest local maximum of the
+    smoothed curve, or the highest point if there is no local maximum.
+    '''
+    smooth, peak = _peaks(height, 0)
+    index = np.argmax(np.where(peak, smooth, -np.inf), axis=1)
+    return np.where(peak.any(axis=1), index, np.argmax(height, axis=1))
+
+
+def _alpha(height, resistance):
+    '''
+    Function that returns the CPE exponent of a depressed arc of diameter
+    resistance and apex height, -Im(Z) = (R/2)*tan(alpha*pi/4).
+    '''
+    with np.errstate(all='ignore'):
+        alpha = 4/np.pi*np.arctan(2*height/resistance)
+    return np.clip(np.nan_to_num(alpha, nan=1.0), *ALPHA_RANGE)
+
+
+def high_frequency_resistance(angular_freq, impedance):
+    '''
+    Function that returns the high frequency intercept of the Nyquist plot of
+    each spectrum, an estimate of its ohmic resistance.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   (F,) angular frequency shared by the spectra [1/s]
+    impedance : array-like or list
+                (N, F) complex impedance [ohm], or the list returned by
+                data_simulation.impedance_array
+
+    Returns
+    ----------
+    ohmic_r : numpy.ndarray
+              (N,) real part of the impedance at the highest frequency [ohm]
+    '''
+    _, real_Z, _ = _spectra(angular_freq, impedance)
+    return np.maximum(real_Z[:, 0], 0)
+
+
+def estimate_elements(angular_freq, impedance, circuit_name):
+    '''
+    Function that estimates the circuit elements of a stack of spectra from
+    the geometry of their Nyquist plot, to be used as the starting point of
+    fit_circuit.
+
+    The solution resistance is the high frequency intercept and the
+    resistance of an arc is the distance between its high and low frequency
+    intercepts. The apex of the arc gives its time constant, 1/w_apex, and
+    its height gives the CPE exponent of a depressed semicircle:
+    alpha = 4/pi*arctan(2*height/Rp). Then C = 1/(Rp*w_apex) and
+    Q = 1/(Rp*w_apex**alpha). The Warburg coefficient of the Randles circuit
+    is the slope of the real part of the low frequency tail against w^-1/2.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   (F,) angular frequency shared by the spectra [1/s]
+    impedance : array-like or list
+                (N, F) complex impedance [ohm], or the list returned by
+                data_simulation.impedance_array
+    circuit_name : str
+                   name of a circuit of the circuits module, or of one of
+                   its aliases in the circuit registry
+
+    Returns
+    ----------
+    guess : dictionary
+            (N,) estimate of each circuit element
+    '''
+    # the estimates rely on the geometry of the circuits of the circuits
+    # module: other circuits need an initial guess
+    circuit_name = get_circuit(circuit_name).name
+    if circuit_name not in circuits.CIRCUIT_ELEMENTS:
+        raise AssertionError('The elements of the circuit {} cannot be '
+                             'estimated, an initial guess should be '
+                             'given'.format(circuit_name))
+    angular_freq, real_Z, height = _spectra(angular_freq, impedance)
+    n_spectra = len(real_Z)
+    rows = np.arange(n_spectra)
+    # lower bound of the estimates, which keeps them positive and finite
+    floor = 1e-6*np.max(np.hypot(real_Z, height), axis=1) + \
+        np.finfo(float).tiny
+    high_freq_r = np.maximum(real_Z[:, 0], floor)
+    low_freq_r = np.maximum(real_Z[:, -1], floor)
+
+    if circuit_name in ('RC_series', 'RQ_series'):
+        # R in series with a capacitive element: the phase of Z - R at the
+        # lowest frequency is -alpha*pi/2
+        capacitive = real_Z[:, -1] - high_freq_r + 1j*(-height[:, -1])
+        alpha = np.clip(-np.angle(capacitive)/(np.pi/2), *ALPHA_RANGE)
+        magnitude = np.maximum(np.abs(capacitive), floor)
+        if circuit_name == 'RC_series':
+            return {'R': high_freq_r, 'C': 1/(magnitude*angular_freq[-1])}
+        return {'R': high_freq_r, 'alpha': alpha,
+                'Q': 1/(magnitude*angular_freq[-1]**alpha)}
+
+    if circuit_name in ('RC_parallel', 'RQ_parallel'):
+        solution_r = np.zeros(n_spectra)
+        arc_r = low_freq_r
+    else:
+        solution_r = high_freq_r
+        arc_r = np.maximum(low_freq_r - solution_r, floor)
+
+    if circuit_name in ('RsRQRQ', 'RsRCRC'):
+        return _two_arcs(angular_freq, height, solution_r, arc_r, floor,
+                         circuit_name)
+
+    guess = {}
+    if circuit_name == 'Randles_simplified':
+        # the Warburg tail, sigma*w^-1/2 on both axes, is removed before
+        # looking for the apex of the arc. The low frequency intercept is
+        # hidden by the tail, but the apex of a semicircle lies above its
+        # middle.
+        sigma = (real_Z[:, -1] - real_Z[:, -2]) / \
+            (angular_freq[-1]**-0.5 - angular_freq[-2]**-0.5)
+        guess['sigma'] = np.maximum(sigma, floor)
+        height = height - guess['sigma'][:, np.newaxis]*angular_freq**-0.5
+        apex = _apex(height)
+        arc_r = np.maximum(2*(real_Z[rows, apex] - solution_r), floor)
+    else:
+        apex = _apex(height)
+    apex_height = np.maximum(height[rows, apex], floor)
+    apex_freq = angular_freq[apex]
+    alpha = _alpha(apex_height, arc_r)
+
+    for name in circuits.CIRCUIT_ELEMENTS[circuit_name]:
+        if name == 'Rs':
+            guess[name] = solution_r
+        elif name in ('R', 'Rp'):
+            guess[name] = arc_r
+        elif name == 'C':
+            guess[name] = 1/(arc_r*apex_freq)
+        elif name == 'Q':
+            guess[name] = 1/(arc_r*apex_freq**alpha)
+        elif name == 'alpha':
+            guess[name] = alpha
+    return guess
+
+
+def _two_arcs(angular_freq, height, solution_r, total_r, floor,
+              circuit_name):
+    '''
+    Function estimating the elements of two arcs in series from the two
+    highest apexes of each spectrum. The resistance is shared between the
+    arcs in proportion to their height. Spectra in which the arcs overlap in
+    a single apex get a second arc two decades below the first.
+    '''
+    rows = np.arange(len(height))
+    smooth, peak = _peaks(height, 0.1)
+    ranked = np.argsort(np.where(peak, -smooth, np.inf), axis=1,
+                        kind='stable')
+    first = np.where(peak.any(axis=1), ranked[:, 0], np.argmax(height, axis=1))
+    has_second = peak.sum(axis=1) > 1
+    # two decades correspond to twice the number of points per decade
+    decade = max(1, int(round(len(angular_freq) /
+                              np.log10(angular_freq[0]/angular_freq[-1]))))
+    second = np.where(has_second, ranked[:, 1],
+                      np.minimum(first + 2*decade, len(angular_freq) - 1))
+    high, low = np.minimum(first, second), np.maximum(first, second)
+
+    heights = np.maximum(height[rows, high], floor), \
+        np.maximum(height[rows, low], floor)
+    fraction = np.where(has_second, heights[0]/(heights[0] + heights[1]), 0.5)
+    resistances = total_r*fraction, total_r*(1 - fraction)
+    alpha = _alpha(heights[0] + heights[1], total_r)
+
+    guess = {'Rs': solution_r}
+    for i, apex in enumerate((high, low), start=1):
+        resistance = np.maximum(resistances[i - 1], floor)
+        guess['Rp{}'.format(i)] = resistance
+        if circuit_name == 'RsRCRC':
+            guess['C{}'.format(i)] = 1/(resistance*angular_freq[apex])
+        else:
+            guess['Q{}'.format(i)] = 1/(resistance*angular_freq[apex]**alpha)
+            guess['alpha{}'.format(i)] = alpha
+    return guess
@@ -0,0 +1,155 @@
+import collections
+import functools
+
+import numpy as np
+
+KKResult = collections.namedtuple('KKResult', ['kk_residual', 'valid',
+                                               'residual_real',
+                                               'residual_imag', 'Z_fit'])
+KKResult.__doc__ = '''
+Result of the linear Kramers-Kronig test of a stack of spectra.
+
+kk_residual : numpy.ndarray
+              (N,) root mean square of the relative residuals of each
+              spectrum
+valid : numpy.ndarray
+        (N,) True where kk_residual is below the threshold of the test
+residual_real : numpy.ndarray
+                (N, F) residuals of the real part, relative to |Z|
+residual_imag : numpy.ndarray
+                (N, F) residuals of the imaginary part, relative to |Z|
+Z_fit : numpy.ndarray
+        (N, F) impedance of the fitted Kramers-Kronig compliant circuit
+'''
+
+
+@functools.lru_cache(maxsize=32)
+def _design_matrix(angular_freq, n_elements):
+    '''
+    Function that builds the (2F, M + 3) matrix of the linear Kramers-Kronig
+    circuit over a frequency grid, given as a tuple so that the matrix is
+    computed once per grid. The rows are the real parts followed by the
+    imaginary parts of the impedance of each element, for unit values of the
+    element parameters:
+
+        a series resistance, M RC elements with time constants logarithmically
+        spaced between 1/w_max and 1/w_min, a series capacitance and a series
+        inductance.
+    '''
+    angular_freq = np.array(angular_freq)
+    tau = np.logspace(-np.log10(angular_freq.max()),
+                      -np.log10(angular_freq.min()), n_elements)
+    wt = angular_freq[:, np.newaxis]*tau
+    n_freq = len(angular_freq)
+    matrix = np.zeros((2*n_freq, n_elements + 3))
+    matrix[:n_freq, 0] = 1
+    matrix[:n_freq, 1:-2] = 1/(1 + wt**2)
+    matrix[n_freq:, 1:-2] = -wt/(1 + wt**2)
+    # Z = -j/(w*C) and Z = j*w*L, fitted as 1/C and L
+    matrix[n_freq:, -2] = -1/angular_freq
+    matrix[n_freq:, -1] = angular_freq
+    matrix.flags.writeable = False
+    return matrix
+
+
+def design_matrix(angular_freq, n_elements=None):
+    '''
+    Function that returns the design matrix of the linear Kramers-Kronig
+    test over a frequency grid. The matrix is cached, so it is built only
+    once for all the spectra measured over the same grid.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   (F,) angular frequency [1/s]
+    n_elements : int
+                 number of RC elements. If None, one every three frequency
+                 points (about three per decade for the frequency ranges of
+                 circuits.freq_gen). Too few elements cannot follow valid
+                 spectra, too many also fit the measurement errors.
+
+    Returns
+    ----------
+    matrix : numpy.ndarray
+             (2F, n_elements + 3) read-only design matrix
+    '''
+    angular_freq = tuple(np.asarray(angular_freq, dtype=float).tolist())
+    assert len(angular_freq) > 1, 'at least two frequencies are needed.'
+    assert min(angular_freq) > 0, 'the frequencies should be positive.'
+    if n_elements is None:
+        n_elements = _default_elements(len(angular_freq))
+    return _design_matrix(angular_freq, int(n_elements))
+
+
+def _default_elements(n_freq):
+    '''
+    Function that returns the default number of RC elements of the test.
+    '''
+    return max(2, n_freq//3)
+
+
+def kk_test(angular_freq, impedance, n_elements=None, threshold=0.01,
+            chunk_size=1024):
+    '''
+    Function that runs the linear Kramers-Kronig test (Lin-KK) on a stack of
+    spectra measured over the same frequency grid.
+
+    A circuit made of a series resistance, capacitance and inductance and of
+    RC elements with fixed time constants satisfies the Kramers-Kronig
+    relations. Its element values are a linear function of the impedance, so
+    the circuit is fitted to all the spectra with a single batched weighted
+    least-squares solve, on the design matrix cached for the grid. Spectra
+    whose relative residuals exceed the threshold are not causal, linear and
+    stable, or drifted during the measurement.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   (F,) angular frequency shared by the spectra [1/s]
+    impedance : array-like
+                (N, F) complex impedance of the spectra [ohm]
+    n_elements : int
+                 number of RC elements, refer to design_matrix
+    threshold : float
+                largest root mean square relative residual of a valid
+                spectrum
+    chunk_size : int
+                 number of spectra solved together, which bounds the memory
+                 used by the weighted design matrices
+
+    Returns
+    ----------
+    result : KKResult
+             named tuple containing the residuals and validity of each
+             spectrum.
+    '''
+    angular_freq = np.asarray(angular_freq, dtype=float)
+    impedance = np.atleast_2d(np.asarray(impedance, dtype=complex))
+    assert impedance.shape[1] == len(angular_freq), 'the impedance and the\
+ frequency range do not match in length.'
+    matrix = design_matrix(angular_freq, n_elements)
+    n_freq = len(angular_freq)
+    # the columns are scaled to unit norm, as they span many decades
+    scale = np.linalg.norm(matrix, axis=0)
+    scaled = matrix/scale
+
+    Z_fit = np.empty_like(impedance)
+    for start in range(0, len(impedance), chunk_size):
+        chunk = impedance[start:start + chunk_size]
+        # residuals weighted by the modulus of the impedance
+        weight = 1/np.tile(np.abs(chunk), 2)
+        data = np.concatenate([chunk.real, chunk.imag], axis=1)*weight
+        q, r = np.linalg.qr(scaled*weight[..., np.newaxis])
+        coefficients = np.linalg.solve(
+            r, np.einsum('nfp,nf->np', q, data)[..., np.newaxis])[..., 0]
+        fitted = coefficients @ scaled.T
+        Z_fit[start:start + chunk_size] = fitted[:, :n_freq] + \
+            1j*fitted[:, n_freq:]
+
+    modulus = np.abs(impedance)
+    residual_real = (impedance.real - Z_fit.real)/modulus
+    residual_imag = (impedance.imag - Z_fit.imag)/modulus
+    kk_residual = np.sqrt((np.mean(residual_real**2, axis=1) +
+                           np.mean(residual_imag**2, axis=1))/2)
+    return KKResult(kk_residual, kk_residual < threshold, residual_real,
+                    residual_imag, Z_fit)
@@ -0,0 +1,252 @@
+import collections
+
+import numpy as np
+
+from ..simulation.circuit_registry import get_circuit
+from .initial_guess import estimate_elements
+
+FitResult = collections.namedtuple('FitResult', ['parameters', 'rss',
+                                                 'residual', 'converged',
+                                                 'n_iter'])
+FitResult.__doc__ = '''
+Result of a batched equivalent circuit fit.
+
+parameters : dictionary
+             fitted value of each circuit element, as (N,) arrays
+rss : numpy.ndarray
+      (N,) weighted residual sum of squares of each spectrum
+residual : numpy.ndarray
+           (N,) root mean square of the weighted residuals of each spectrum
+converged : numpy.ndarray
+            (N,) True where the fit reached the convergence tolerance
+n_iter : numpy.ndarray
+         (N,) number of Levenberg-Marquardt iterations of each spectrum
+'''
+
+# A spectrum stops iterating when no step reduces its residuals, even with
+# such a large damping factor
+MAX_DAMPING = 1e12
+
+
+def stack_spectra(dataframes, freq_column='freq_hz', real_column='z_real_ohm',
+                  imag_column='z_imag_ohm'):
+    '''
+    Function that stacks the impedance spectra contained in a list of
+    dataframes, such as the ones returned by eisy_file_mgmt.fseries_fix_head,
+    into a single (N, F) complex array. All the spectra should be measured
+    over the same frequency range.
+
+    Parameters
+    ----------
+    dataframes : list of pandas.DataFrame
+                 the dataframes containing the frequency and the real and
+                 imaginary parts of each impedance spectrum
+    freq_column : str
+                  name of the column containing the frequency [Hz]
+    real_column : str
+                  name of the column containing the real part of the
+                  impedance [ohm]
+    imag_column : str
+                  name of the column containing the imaginary part of the
+                  impedance [ohm]
+
+    Returns
+    ----------
+    freq : numpy.ndarray
+           (F,) frequency range shared by all the spectra [Hz]
+    impedance : numpy.ndarray
+                (N, F) complex impedance of each spectrum [ohm]
+    '''
+    assert len(dataframes) != 0, 'no spectrum was given.'
+    freq = np.asarray(dataframes[0][freq_column], dtype=float)
+    impedance = np.empty((len(dataframes), len(freq)), dtype=complex)
+    for i, dataframe in enumerate(dataframes):
+        if not np.allclose(dataframe[freq_column], freq):
+            raise AssertionError('The spectrum {} was not measured over the '
+                                 'same frequency range'.format(i))
+        impedance[i].real = dataframe[real_column]
+        impedance[i].imag = dataframe[imag_column]
+    return freq, impedance
+
+
+def _evaluate(circuit_name, names, angular_freq, theta, impedance, weight):
+    '''
+    Function that returns the weighted residuals and their Jacobian with
+    respect to the logarithm of the circuit elements, with the real and
+    imaginary parts stacked along the last axis.
+    '''
+    values = np.exp(theta)
+    circuit_elements = {name: values[:, i] for i, name in enumerate(names)}
+    # trial steps can reach values overflowing the circuit functions. The
+    # resulting non-finite residuals are rejected by the fit.
+    with np.errstate(all='ignore'):
+        descriptor = get_circuit(circuit_name)
+        Z_complex = descriptor.evaluator(angular_freq, **circuit_elements)
+        jacobian = descriptor.jacobian(angular_freq, **circuit_elements)
+        # chain rule for the logarithmic parametrization: dZ/dlog(p)=p*dZ/dp
+        jacobian = np.stack([jacobian[name] for name in names], axis=-1) * \
+            values[:, np.newaxis, :]
+        residuals = (Z_complex - impedance)/weight
+        jacobian = jacobian/weight[..., np.newaxis]
+    residuals = np.concatenate([residuals.real, residuals.imag], axis=1)
+    jacobian = np.concatenate([jacobian.real, jacobian.imag], axis=1)
+    return residuals, jacobian
+
+
+def fittable_circuit(circuit_name):
+    '''
+    Function that returns the descriptor of a circuit of the circuit registry
+    (refer to simulation.circuit_registry), checking that it can be fitted:
+    the derivatives of its impedance should be given by its jacobian.
+    '''
+    descriptor = get_circuit(circuit_name)
+    if descriptor.jacobian is None:
+        raise AssertionError('The circuit {} is not supported by the fitting '
+                             'module, as it has no Jacobian'.format(
+                                 circuit_name))
+    return descriptor
+
+
+def _fit_chunk(circuit_name, angular_freq, impedance, theta, max_iter, tol,
+               damping):
+    '''
+    Function that runs the Levenberg-Marquardt iterations on a chunk of
+    spectra at once. Each spectrum keeps its own damping factor and stops
+    iterating as soon as it converges, or when its damping factor exceeds
+    MAX_DAMPING. The damping factors are returned, so that the iterations
+    can be resumed.
+    '''
+    names = get_circuit(circuit_name).elements
+    # alpha should not exceed one: log(alpha) <= 0
+    upper_bound = np.array([0 if name.startswith('alpha') else np.inf
+                            for name in names])
+    weight = np.abs(impedance)
+    n_spectra = len(impedance)
+
+    residuals, jacobian = _evaluate(circuit_name, names, angular_freq, theta,
+                                    impedance, weight)
+    rss = np.sum(residuals**2, axis=1)
+    damping = np.array(np.broadcast_to(damping, n_spectra), dtype=float)
+    converged = np.zeros(n_spectra, dtype=bool)
+    n_iter = np.zeros(n_spectra, dtype=int)
+    active = np.ones(n_spectra, dtype=bool)
+
+    for iteration in range(max_iter):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+        J = jacobian[idx]
+        hessian = np.einsum('nfp,nfq->npq', J, J)
+        gradient = np.einsum('nfp,nf->np', J, residuals[idx])
+        # Marquardt scaling of the damping by the diagonal of J^T J
+        diagonal = np.einsum('npp->np', hessian)
+        damped = hessian.copy()
+        damped[:, np.arange(len(names)), np.arange(len(names))] += \
+            damping[idx, np.newaxis]*(diagonal + 1e-12)
+        step = -np.linalg.solve(damped, gradient[..., np.newaxis])[..., 0]
+        # limit each step to a change of the circuit elements by a factor e
+        step /= np.maximum(np.max(np.abs(step), axis=1), 1)[:, np.newaxis]
+        trial = np.minimum(theta[idx] + step, upper_bound)
+
+        trial_residuals, trial_jacobian = _evaluate(
+            circuit_name, names, angular_freq, trial, impedance[idx],
+            weight[idx])
+        with np.errstate(all='ignore'):
+            trial_rss = np.sum(trial_residuals**2, axis=1)
+        accept = np.isfinite(trial_rss) & (trial_rss <= rss[idx])
+
+        accepted = idx[accept]
+        improvement = (rss[accepted] - trial_rss[accept]) / \
+            np.maximum(rss[accepted], np.finfo(float).tiny)
+        theta[accepted] = trial[accept]
+        rss[accepted] = trial_rss[accept]
+        residuals[accepted] = trial_residuals[accept]
+        jacobian[accepted] = trial_jacobian[accept]
+        damping[accepted] = np.maximum(damping[accepted]/10, 1e-12)
+        damping[idx[~accept]] *= 10
+        n_iter[idx] += 1
+
+        small_step = np.max(np.abs(step), axis=1) < tol
+        done = np.zeros(len(idx), dtype=bool)
+        done[accept] = (improvement < tol) | small_step[accept]
+        converged[idx[done]] = True
+        active[idx[done]] = False
+        # the damping grows without bound when no step reduces the residuals
+        active[damping > MAX_DAMPING] = False
+
+    return theta, rss, converged, n_iter, damping
+
+
+def fit_circuit(angular_freq, impedance, circuit_name, initial_guess=None,
+                max_iter=200, tol=1e-10, damping=1e-3, chunk_size=4096):
+    '''
+    Function that fits one of the circuit models of the circuits module to a
+    stack of impedance spectra sharing the same frequency range.
+
+    The independent least-squares problems are solved together with a
+    vectorized Levenberg-Marquardt algorithm, using the analytic Jacobians of
+    the circuits module. The circuit elements are fitted in logarithmic
+    scale, which keeps them positive, and the residuals are weighted by the
+    modulus of the measured impedance.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   (F,) angular frequency shared by the spectra [1/s]
+    impedance : array-like
+                (N, F) complex impedance of the spectra to fit [ohm]
+    circucit_name: str
+                   name of the circuit to fit, refer to fittable_circuit
+    initial_guess : dictionary
+                    starting value of each circuit element, either a single
+                    value or an array of N values. If None, the elements are
+                    estimated from the Nyquist plot of each spectrum with
+                    initial_guess.estimate_elements.
+    max_iter : int
+               maximum number of iterations per spectrum
+    tol : float
+          the fit of a spectrum stops when the relative decrease of its
+          residual sum of squares, or its step in log scale, gets below tol
+    damping : float
+              initial damping factor of the Levenberg-Marquardt algorithm
+    chunk_size : int
+                 number of spectra fitted together, which bounds the memory
+                 used to store the Jacobians
+
+    Returns
+    ----------
+    result : FitResult
+             named tuple containing the fitted circuit elements, the residual
+             sum of squares, the root mean square residual, the convergence
+             flag and the number of iterations of each spectrum.
+    '''
+    names = fittable_circuit(circuit_name).elements
+    angular_freq = np.asarray(angular_freq, dtype=float)
+    impedance = np.atleast_2d(np.asarray(impedance, dtype=complex))
+    assert impedance.shape[1] == len(angular_freq), 'the impedance and the\
+ frequency range do not match in length.'
+
+    if initial_guess is None:
+        initial_guess = estimate_elements(angular_freq, impedance,
+                                          circuit_name)
+    if set(initial_guess) != set(names):
+        raise AssertionError('The initial guess should contain the elements '
+                             '{}'.format(', '.join(names)))
+    theta = np.log(np.column_stack([
+        np.broadcast_to(np.asarray(initial_guess[name], dtype=float),
+                        len(impedance)) for name in names]))
+
+    n_spectra = len(impedance)
+    rss = np.empty(n_spectra)
+    converged = np.empty(n_spectra, dtype=bool)
+    n_iter = np.empty(n_spectra, dtype=int)
+    for start in range(0, n_spectra, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        theta[chunk], rss[chunk], converged[chunk], n_iter[chunk], _ = \
+            _fit_chunk(circuit_name, angular_freq, impedance[chunk],
+                       theta[chunk], max_iter, tol, damping)
+
+    values = np.exp(theta)
+    parameters = {name: values[:, i] for i, name in enumerate(names)}
+    residual = np.sqrt(rss/(2*len(angular_freq)))
+    return FitResult(parameters, rss, residual, converged, n_iter)
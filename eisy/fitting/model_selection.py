@@ -0,0 +1,223 @@
+import collections
+
+import numpy as np
+
+from ..simulation import circuits
+from ..simulation.circuit_registry import get_circuit
+from .initial_guess import estimate_elements
+from .least_squares import FitResult, MAX_DAMPING, _fit_chunk, \
+    fittable_circuit
+
+CRITERIA = ('aic', 'bic')
+
+ModelSelection = collections.namedtuple('ModelSelection', [
+    'circuit_names', 'best', 'confidence', 'ranking', 'criterion', 'weights',
+    'pruned', 'fits'])
+ModelSelection.__doc__ = '''
+Result of the selection of the equivalent circuit of a stack of spectra.
+
+circuit_names : tuple of str
+                the C candidate circuits, in the order of the columns of the
+                arrays below
+best : numpy.ndarray
+       (N,) name of the best circuit for each spectrum, None if every
+       candidate was pruned
+confidence : numpy.ndarray
+             (N,) Akaike (or Schwarz) weight of the best circuit, between 0
+             and 1, 0 if every candidate was pruned
+ranking : numpy.ndarray
+          (N, C) indices of the candidates sorted from the best to the worst
+criterion : numpy.ndarray
+            (N, C) information criterion of each candidate, inf if pruned
+weights : numpy.ndarray
+          (N, C) Akaike (or Schwarz) weight of each candidate, 0 if every
+          candidate was pruned
+pruned : numpy.ndarray
+         (N, C) True where the fit of the candidate was stopped early
+fits : dictionary
+       FitResult of each candidate, pruned fits included
+'''
+
+
+def information_criterion(rss, n_points, n_params, criterion='aic'):
+    '''
+    Function that returns the Akaike or the Bayesian information criterion of
+    a least-squares fit. Lower values indicate a better model.
+
+    Parameters
+    ----------
+    rss : array-like
+          residual sum of squares of the fits
+    n_points : int
+               number of fitted data points (twice the number of frequencies
+               of a spectrum, for the real and imaginary parts)
+    n_params : int
+               number of fitted parameters
+    criterion : str
+                either 'aic' or 'bic'
+    '''
+    if criterion not in CRITERIA:
+        raise AssertionError('The criterion should be one of {}'.format(
+                             ', '.join(CRITERIA)))
+    # a perfect fit would give an infinitely negative criterion
+    rss = np.maximum(rss, np.finfo(float).tiny)
+    penalty = 2 if criterion == 'aic' else np.log(n_points)
+    return n_points*np.log(rss/n_points) + penalty*np.asarray(n_params)
+
+
+def _select_chunk(circuit_names, angular_freq, impedance, criterion, margin,
+                  round_iter, max_iter, tol, damping):
+    '''
+    Function fitting all the candidate circuits to a chunk of spectra, in
+    rounds of round_iter iterations. After each round the candidates whose
+    residual sum of squares exceeds margin times the best one of the same
+    spectrum are pruned.
+    '''
+    n_spectra = len(impedance)
+    state = {}
+    for name in circuit_names:
+        guess = estimate_elements(angular_freq, impedance, name)
+        state[name] = {
+            'theta': np.log(np.column_stack(
+                [guess[element] for element in
+                 get_circuit(name).elements])),
+            'rss': np.full(n_spectra, np.inf),
+            'converged': np.zeros(n_spectra, dtype=bool),
+            'n_iter': np.zeros(n_spectra, dtype=int),
+            'damping': np.full(n_spectra, damping),
+            'pruned': np.zeros(n_spectra, dtype=bool)}
+
+    while True:
+        running = False
+        for name in circuit_names:
+            fit = state[name]
+            idx = np.flatnonzero(~fit['converged'] & ~fit['pruned'] &
+                                 (fit['n_iter'] < max_iter) &
+                                 (fit['damping'] <= MAX_DAMPING))
+            if idx.size == 0:
+                continue
+            running = True
+            # the spectra are fitted in groups with the same remaining
+            # budget, so that none exceeds max_iter
+            budget = np.minimum(round_iter, max_iter - fit['n_iter'][idx])
+            for n_round in np.unique(budget):
+                group = idx[budget == n_round]
+                theta, rss, converged, n_iter, damping_group = _fit_chunk(
+                    name, angular_freq, impedance[group],
+                    fit['theta'][group], n_round, tol, fit['damping'][group])
+                fit['theta'][group], fit['rss'][group] = theta, rss
+                fit['converged'][group] = converged
+                fit['damping'][group] = damping_group
+                fit['n_iter'][group] += n_iter
+        if not running:
+            break
+        rss = np.array([state[name]['rss'] for name in circuit_names])
+        best_rss = np.min(np.where(np.isnan(rss), np.inf, rss), axis=0)
+        for name, candidate_rss in zip(circuit_names, rss):
+            # candidates whose residuals are not finite are pruned as well
+            state[name]['pruned'] |= ~(candidate_rss <= margin*best_rss)
+
+    n_points = 2*len(angular_freq)
+    fits, values, pruned = {}, [], []
+    for name in circuit_names:
+        fit = state[name]
+        elements = get_circuit(name).elements
+        parameters = np.exp(fit['theta'])
+        fits[name] = FitResult(
+            {element: parameters[:, i] for i, element in enumerate(elements)},
+            fit['rss'], np.sqrt(fit['rss']/n_points), fit['converged'],
+            fit['n_iter'])
+        value = information_criterion(fit['rss'], n_points, len(elements),
+                                      criterion)
+        values.append(np.where(fit['pruned'], np.inf, value))
+        pruned.append(fit['pruned'])
+    return fits, np.column_stack(values), np.column_stack(pruned)
+
+
+def select_circuit(angular_freq, impedance, circuit_names=None,
+                   criterion='aic', margin=100, round_iter=10, max_iter=200,
+                   tol=1e-10, damping=1e-3, chunk_size=1024):
+    '''
+    Function that fits every candidate circuit to each spectrum of a stack
+    and ranks the candidates by an information criterion, which balances the
+    quality of the fit against the number of circuit elements.
+
+    The candidates are fitted together in rounds of a few Levenberg-Marquardt
+    iterations. After each round, a candidate is pruned for a spectrum when
+    its residual sum of squares exceeds the best one of that spectrum by the
+    factor margin, so that hopeless candidates do not use the whole
+    iteration budget.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   (F,) angular frequency shared by the spectra [1/s]
+    impedance : array-like
+                (N, F) complex impedance of the spectra [ohm]
+    circuit_names : list of str
+                    the candidate circuits, which should have a Jacobian
+                    (refer to least_squares.fittable_circuit) and elements
+                    that initial_guess.estimate_elements can estimate. If
+                    None, all the circuits in circuits.CIRCUIT_ELEMENTS.
+    criterion : str
+                'aic' (Akaike) or 'bic' (Bayesian) information criterion
+    margin : float
+             ratio between the residual sum of squares of a candidate and
+             the best one above which the candidate is pruned
+    round_iter : int
+                 number of iterations of each candidate between two pruning
+                 steps
+    max_iter : int
+               maximum number of iterations of each candidate
+    tol : float
+          convergence tolerance, refer to fit_circuit
+    damping : float
+              initial damping factor of the Levenberg-Marquardt algorithm
+    chunk_size : int
+                 number of spectra processed together
+
+    Returns
+    ----------
+    selection : ModelSelection
+                named tuple containing the best circuit of each spectrum, its
+                confidence, the ranking of the candidates and their fits.
+    '''
+    if circuit_names is None:
+        circuit_names = tuple(circuits.CIRCUIT_ELEMENTS)
+    circuit_names = tuple(circuit_names)
+    assert len(circuit_names) != 0, 'no candidate circuit was given.'
+    for name in circuit_names:
+        fittable_circuit(name)
+    if criterion not in CRITERIA:
+        raise AssertionError('The criterion should be one of {}'.format(
+                             ', '.join(CRITERIA)))
+    angular_freq = np.asarray(angular_freq, dtype=float)
+    impedance = np.atleast_2d(np.asarray(impedance, dtype=complex))
+    assert impedance.shape[1] == len(angular_freq), 'the impedance and the\
+ frequency range do not match in length.'
+
+    chunks = [_select_chunk(circuit_names, angular_freq,
+                            impedance[start:start + chunk_size], criterion,
+                            margin, round_iter, max_iter, tol, damping)
+              for start in range(0, len(impedance), chunk_size)]
+    fits = {name: FitResult(
+        {element: np.concatenate([chunk[0][name].parameters[element]
+                                  for chunk in chunks])
+         for element in get_circuit(name).elements},
+        *[np.concatenate([getattr(chunk[0][name], field)
+                          for chunk in chunks])
+          for field in FitResult._fields[1:]]) for name in circuit_names}
+    values = np.concatenate([chunk[1] for chunk in chunks])
+    pruned = np.concatenate([chunk[2] for chunk in chunks])
+
+    ranking = np.argsort(values, axis=1, kind='stable')
+    # the spectra for which every candidate was pruned have no best circuit
+    selected = np.isfinite(values).any(axis=1)
+    delta = values - np.where(selected, values.min(axis=1), 0)[:, np.newaxis]
+    weights = np.exp(-delta/2)
+    weights /= np.where(selected, weights.sum(axis=1), 1)[:, np.newaxis]
+    best = np.array(circuit_names, dtype=object)[ranking[:, 0]]
+    best[~selected] = None
+    confidence = weights[np.arange(len(weights)), ranking[:, 0]]
+    return ModelSelection(circuit_names, best, confidence, ranking, values,
+                          weights, pruned, fits)
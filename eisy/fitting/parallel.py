@@ -0,0 +1,336 @@
+import concurrent.futures
+import multiprocessing
+import os
+import sqlite3
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ..simulation.circuit_registry import get_circuit
+from .kramers_kronig import kk_test
+from .least_squares import FitResult, fit_circuit, fittable_circuit
+
+# Schema of the processed_data table, as defined by SQL_setup in
+# eisy_file_mgmt. The kk_residual column is added to the tables created
+# before it was introduced, such as the one in data/eisy_sql.db
+PROCESSED_DATA_SCHEMA = '''CREATE TABLE IF NOT EXISTS processed_data (
+    id VARCHAR NOT NULL,
+    ohmic_r FLOAT,
+    rc_fit FLOAT,
+    circuit_guess VARCHAR,
+    kk_residual FLOAT,
+    PRIMARY KEY (id)
+)'''
+
+# Columns appended to the fitted circuit elements in the shared output array
+_OUTPUT_COLUMNS = ('rss', 'residual', 'converged', 'n_iter')
+
+# Arrays shared with the worker processes, attached once per worker
+_shared = {}
+
+# The workers are spawned rather than forked: forking a process in which the
+# threads of Numba or of a BLAS library are running can deadlock the children.
+# As the spectra are passed through shared memory, spawning costs little more
+# than importing eisy in each worker.
+_context = multiprocessing.get_context('spawn')
+
+
+def _attach(input_name, output_name, n_spectra, n_freq, n_columns):
+    '''
+    Function run once by each worker process, which maps the shared memory
+    blocks holding the spectra and the fit results into numpy arrays.
+    '''
+    input_block = shared_memory.SharedMemory(name=input_name)
+    output_block = shared_memory.SharedMemory(name=output_name)
+    _shared['blocks'] = (input_block, output_block)
+    _shared['impedance'] = np.ndarray((n_spectra, n_freq), dtype=complex,
+                                      buffer=input_block.buf)
+    _shared['output'] = np.ndarray((n_spectra, n_columns), dtype=float,
+                                   buffer=output_block.buf)
+
+
+def _fit_block(start, stop, angular_freq, circuit_name, has_guess,
+               fit_kwargs):
+    '''
+    Function fitting the spectra start:stop of the shared array. The initial
+    guess, if any, is read from the output array and overwritten by the
+    fitted circuit elements.
+    '''
+    names = get_circuit(circuit_name).elements
+    output = _shared['output'][start:stop]
+    initial_guess = None
+    if has_guess:
+        initial_guess = {name: output[:, i] for i, name in enumerate(names)}
+    result = fit_circuit(angular_freq, _shared['impedance'][start:stop],
+                         circuit_name, initial_guess=initial_guess,
+                         **fit_kwargs)
+    for i, name in enumerate(names):
+        output[:, i] = result.parameters[name]
+    n_params = len(names)
+    for i, field in enumerate(_OUTPUT_COLUMNS):
+        output[:, n_params + i] = getattr(result, field)
+    return start, stop
+
+
+def _block_result(output, names):
+    '''
+    Function turning rows of the shared output array into a FitResult.
+    '''
+    n_params = len(names)
+    parameters = {name: output[:, i].copy() for i, name in enumerate(names)}
+    return FitResult(parameters, output[:, n_params].copy(),
+                     output[:, n_params + 1].copy(),
+                     output[:, n_params + 2].astype(bool),
+                     output[:, n_params + 3].astype(int))
+
+
+def iter_fit_parallel(angular_freq, impedance, circuit_name,
+                      initial_guess=None, n_workers=None, block_size=None,
+                      **fit_kwargs):
+    '''
+    Generator that fits a stack of impedance spectra with fit_circuit over a
+    pool of worker processes, yielding the results of each block of spectra
+    as soon as it is fitted.
+
+    The spectra are copied once into shared memory, from which the workers
+    read their blocks and into which they write the fitted values, so that
+    only the block boundaries are sent between the processes.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   (F,) angular frequency shared by the spectra [1/s]
+    impedance : array-like
+                (N, F) complex impedance of the spectra to fit [ohm]
+    circucit_name: str
+                   name of the circuit to fit, refer to
+                   least_squares.fittable_circuit
+    initial_guess : dictionary
+                    starting value of each circuit element, either a single
+                    value or an array of N values. If None, the default guess
+                    of fit_circuit is used.
+    n_workers : int
+                number of worker processes. If None, the number of CPUs.
+    block_size : int
+                 number of spectra fitted by a worker at a time. If None,
+                 the spectra are split in about four blocks per worker.
+    fit_kwargs : keyword arguments
+                 other arguments passed to fit_circuit (max_iter, tol, ...)
+
+    Yields
+    ----------
+    block : slice
+            the spectra to which the result refers
+    result : FitResult
+             the fit of the spectra in block
+    '''
+    names = fittable_circuit(circuit_name).elements
+    angular_freq = np.asarray(angular_freq, dtype=float)
+    impedance = np.atleast_2d(np.asarray(impedance, dtype=complex))
+    assert impedance.shape[1] == len(angular_freq), 'the impedance and the\
+ frequency range do not match in length.'
+    if initial_guess is not None and set(initial_guess) != set(names):
+        raise AssertionError('The initial guess should contain the elements '
+                             '{}'.format(', '.join(names)))
+
+    n_spectra, n_freq = impedance.shape
+    n_workers = n_workers or os.cpu_count() or 1
+    if block_size is None:
+        block_size = min(4096, max(1, -(-n_spectra // (4*n_workers))))
+    n_columns = len(names) + len(_OUTPUT_COLUMNS)
+
+    input_block = shared_memory.SharedMemory(
+        create=True, size=max(impedance.nbytes, 1))
+    output_block = shared_memory.SharedMemory(
+        create=True, size=max(n_spectra*n_columns*8, 1))
+    shared_impedance = output = None
+    try:
+        shared_impedance = np.ndarray(impedance.shape, dtype=complex,
+                                      buffer=input_block.buf)
+        shared_impedance[:] = impedance
+        output = np.ndarray((n_spectra, n_columns), dtype=float,
+                            buffer=output_block.buf)
+        if initial_guess is not None:
+            for i, name in enumerate(names):
+                output[:, i] = initial_guess[name]
+
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=n_workers, mp_context=_context,
+                initializer=_attach,
+                initargs=(input_block.name, output_block.name, n_spectra,
+                          n_freq, n_columns)) as executor:
+            futures = [executor.submit(_fit_block, start,
+                                       min(start + block_size, n_spectra),
+                                       angular_freq, circuit_name,
+                                       initial_guess is not None, fit_kwargs)
+                       for start in range(0, n_spectra, block_size)]
+            for future in concurrent.futures.as_completed(futures):
+                start, stop = future.result()
+                yield slice(start, stop), _block_result(output[start:stop],
+                                                        names)
+    finally:
+        # the views should be released before closing the shared memory
+        del shared_impedance, output
+        input_block.close()
+        input_block.unlink()
+        output_block.close()
+        output_block.unlink()
+
+
+def fit_parallel(angular_freq, impedance, circuit_name, initial_guess=None,
+                 n_workers=None, block_size=None, **fit_kwargs):
+    '''
+    Function that fits a stack of impedance spectra over a pool of worker
+    processes and gathers the results in a single FitResult. Refer to
+    iter_fit_parallel for the parameters.
+    '''
+    names = fittable_circuit(circuit_name).elements
+    n_spectra = len(np.atleast_2d(impedance))
+    parameters = {name: np.empty(n_spectra) for name in names}
+    rss, residual = np.empty(n_spectra), np.empty(n_spectra)
+    converged = np.empty(n_spectra, dtype=bool)
+    n_iter = np.empty(n_spectra, dtype=int)
+    for block, result in iter_fit_parallel(angular_freq, impedance,
+                                           circuit_name, initial_guess,
+                                           n_workers, block_size,
+                                           **fit_kwargs):
+        for name in names:
+            parameters[name][block] = result.parameters[name]
+        rss[block], residual[block] = result.rss, result.residual
+        converged[block], n_iter[block] = result.converged, result.n_iter
+    return FitResult(parameters, rss, residual, converged, n_iter)
+
+
+def _ohmic_resistance(parameters, circuit_name):
+    '''
+    Function returning the high frequency resistance of the fitted circuits.
+    '''
+    if 'Rs' in parameters:
+        return parameters['Rs']
+    if circuit_name.endswith('_series'):
+        return parameters['R']
+    # the impedance of a parallel connection vanishes at high frequency
+    return np.zeros(len(next(iter(parameters.values()))))
+
+
+def processed_data_records(ids, result, circuit_name, ohmic_r=None,
+                           kk_residual=None):
+    '''
+    Generator that turns the result of a fit into rows of the processed_data
+    table: (id, ohmic_r, rc_fit, circuit_guess, kk_residual).
+
+    ohmic_r is the fitted high frequency resistance, unless given, and rc_fit
+    the root mean square of the weighted fit residuals. circuit_guess is the
+    fitted circuit if the fit converged and None otherwise.
+
+    Parameters
+    ----------
+    ids : list of str
+          the identifier of each fitted spectrum
+    result : FitResult
+             the fit of the spectra
+    circucit_name: str
+                   name of the fitted circuit
+    ohmic_r : array-like
+              (N,) ohmic resistance of the spectra, such as the estimate of
+              initial_guess.high_frequency_resistance
+    kk_residual : array-like
+                  (N,) residual of the Kramers-Kronig test of the spectra, as
+                  returned by kramers_kronig.kk_test. If None, the column is
+                  left empty.
+    '''
+    assert len(ids) == len(result.rss), 'one id per spectrum is needed.'
+    if ohmic_r is None:
+        ohmic_r = _ohmic_resistance(result.parameters, circuit_name)
+    for i, spectrum_id in enumerate(ids):
+        yield (str(spectrum_id), float(ohmic_r[i]),
+               float(result.residual[i]),
+               circuit_name if result.converged[i] else None,
+               None if kk_residual is None else float(kk_residual[i]))
+
+
+def write_processed_data(connection, records):
+    '''
+    Function that inserts rows in the processed_data table, replacing the
+    rows with the same id. The table is created if it does not exist, and
+    the kk_residual column is added to the tables that miss it.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection or str
+                 open connection or path of the SQLite database
+    records : iterable
+              (id, ohmic_r, rc_fit, circuit_guess, kk_residual) rows, such
+              as the ones returned by processed_data_records
+
+    Returns
+    ----------
+    n_rows : int
+             number of rows written
+    '''
+    close = not isinstance(connection, sqlite3.Connection)
+    if close:
+        connection = sqlite3.connect(connection)
+    try:
+        with connection:
+            connection.execute(PROCESSED_DATA_SCHEMA)
+            columns = [row[1] for row in connection.execute(
+                'PRAGMA table_info(processed_data)')]
+            if 'kk_residual' not in columns:
+                connection.execute('ALTER TABLE processed_data ADD COLUMN '
+                                   'kk_residual FLOAT')
+            cursor = connection.executemany(
+                'INSERT OR REPLACE INTO processed_data (id, ohmic_r, rc_fit, '
+                'circuit_guess, kk_residual) VALUES (?, ?, ?, ?, ?)', records)
+        return cursor.rowcount
+    finally:
+        if close:
+            connection.close()
+
+
+def fit_to_database(connection, ids, angular_freq, impedance, circuit_name,
+                    initial_guess=None, n_workers=None, block_size=None,
+                    kramers_kronig=True, **fit_kwargs):
+    '''
+    Function that fits a stack of impedance spectra over a pool of worker
+    processes and streams the results of each block into the processed_data
+    table as soon as it is fitted, together with the residual of the
+    Kramers-Kronig test of the spectra.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection or str
+                 open connection or path of the SQLite database
+    ids : list of str
+          the identifier of each spectrum
+    kramers_kronig : bool
+                     if False, the Kramers-Kronig test is skipped
+    other parameters : refer to iter_fit_parallel
+
+    Returns
+    ----------
+    n_rows : int
+             number of rows written
+    '''
+    impedance = np.atleast_2d(impedance)
+    assert len(ids) == len(impedance), 'one id per spectrum is needed.'
+    close = not isinstance(connection, sqlite3.Connection)
+    if close:
+        connection = sqlite3.connect(connection)
+    n_rows = 0
+    try:
+        for block, result in iter_fit_parallel(angular_freq, impedance,
+                                               circuit_name, initial_guess,
+                                               n_workers, block_size,
+                                               **fit_kwargs):
+            # the test of a block runs while the workers fit the next ones
+            kk_residual = None
+            if kramers_kronig:
+                kk_residual = kk_test(angular_freq,
+                                      impedance[block]).kk_residual
+            n_rows += write_processed_data(connection, processed_data_records(
+                ids[block], result, circuit_name, kk_residual=kk_residual))
+    finally:
+        if close:
+            connection.close()
+    return n_rows
@@ -1,6 +1,10 @@
 # from .file_writer import *
 from .version import __version__
+from .alteration_pipeline import AlterationPipeline
+from .dataset_generator import generate_dataset, iter_dataset
+from .spectrum import ImpedanceSpectrum, SpectrumBatch
 
-__all__ = [__version__]
+__all__ = [__version__, 'AlterationPipeline', 'generate_dataset',
+           'iter_dataset', 'ImpedanceSpectrum', 'SpectrumBatch']
 
 # name = 'simulation'
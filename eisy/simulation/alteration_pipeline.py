@@ -0,0 +1,267 @@
+import collections
+
+import numpy as np
+
+from . import alterations
+from . import circuits
+from . import precision
+from .data_simulation import batch_simulation
+from .rng import generators
+
+# Parameters of the alterations of the alterations module that can be chained
+# in a pipeline, with their default values (None for required parameters)
+ALTERATIONS = {
+    'freq_noise': {'noise_amplitude': 0.4},
+    'complex_noise': {'noise_amplitude': None},
+    'voltage_noise': {'noise_amplitude': None, 'current_amplitude': 0.01},
+    'current_noise': {'noise_amplitude': None, 'voltage_amplitude': 0.01},
+    'outliers': {'percentage_outliers': None, 'outliers_amplitude': None}}
+
+AlterationStage = collections.namedtuple('AlterationStage',
+                                         ['alteration', 'params'])
+AlterationStage.__doc__ = '''
+Stage of an AlterationPipeline.
+
+alteration : str or callable
+             name of an alteration of ALTERATIONS, or function applying a
+             custom artifact, refer to AlterationPipeline.add
+params : dict
+         parameters of the alteration
+'''
+
+AlteredBatch = collections.namedtuple('AlteredBatch',
+                                      ['freq', 'angular_freq', 'impedance'])
+AlteredBatch.__doc__ = '''
+Batch of spectra returned by AlterationPipeline.simulate.
+
+freq : numpy.ndarray
+       (F,) frequency [Hz], or (N, F) frequency of each spectrum if the
+       pipeline adds noise to the frequency
+angular_freq : numpy.ndarray
+               angular frequency [1/s], with the shape of freq
+impedance : numpy.ndarray
+            (N, F) complex impedance with the alterations [ohm]
+'''
+
+
+class AlterationPipeline:
+    '''
+    Chain of alterations applied to a (N, F) batch of complex impedance
+    spectra, such as the noise models, the outliers and the frequency noise
+    of the alterations module, or custom artifacts. The stages work on a
+    single copy of the batch, modified in place, without the DataFrames and
+    the noise columns of the alterations module, so that several artifacts
+    can be applied to the same spectra.
+
+    The stages are fused where the noise models allow it:
+
+    - the noise of all the stages is scaled by the impedance before the
+      alterations, computed once for the whole pipeline, so the result of a
+      stage does not depend on the noise added by the previous ones
+    - the voltage noise is equivalent to a complex noise of the impedance,
+      and is added without computing the voltage
+    - the current noise is a complex noise of the admittance 1/Z, so the
+      consecutive current noise stages are added after a single conversion
+      to the admittance, whatever their voltage amplitude
+
+    Example
+    ----------
+    pipeline = AlterationPipeline().add('complex_noise', noise_amplitude=0.05
+                                        ).add('outliers',
+                                              percentage_outliers=0.05,
+                                              outliers_amplitude=0.5)
+    impedance_altered = pipeline(impedance, seed=0)
+
+    Parameters
+    ----------
+    stages : list of tuples
+             (alteration, params) of each stage, added with add
+    '''
+
+    def __init__(self, stages=()):
+        self.stages = []
+        for alteration, params in stages:
+            self.add(alteration, **params)
+
+    def __len__(self):
+        return len(self.stages)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ' -> '.join(
+            '{}({})'.format(getattr(stage.alteration, '__name__',
+                                    stage.alteration),
+                            ', '.join('{}={}'.format(key, value) for
+                                      key, value in stage.params.items()))
+            for stage in self.stages))
+
+    def add(self, alteration, **params):
+        '''
+        Function that adds a stage at the end of the pipeline.
+
+        Parameters
+        ----------
+        alteration : str or callable
+                     name of an alteration of ALTERATIONS, or function
+                     applying a custom artifact, called as
+                     function(impedance, rng, **params) with the (N, F)
+                     impedance and the random number generator of the
+                     pipeline. When the pipeline is given sample indices,
+                     rng is a list of generators, one per spectrum. The
+                     function returns the altered impedance, and can modify
+                     its input in place.
+                     'freq_noise' changes the frequencies at which the
+                     circuit is evaluated, so it should be the first stage,
+                     and the pipeline is then applied with simulate.
+        params : keyword arguments
+                 parameters of the alteration, refer to the batch functions
+                 of the alterations module
+
+        Returns
+        ----------
+        pipeline : AlterationPipeline
+                   the pipeline, so that the calls can be chained
+        '''
+        if callable(alteration):
+            self.stages.append(AlterationStage(alteration, params))
+            return self
+        if alteration not in ALTERATIONS:
+            raise AssertionError('The alteration should be a function or one '
+                                 'of {}'.format(', '.join(ALTERATIONS)))
+        defaults = ALTERATIONS[alteration]
+        unknown = set(params) - set(defaults)
+        if unknown:
+            raise AssertionError('Unknown parameters of {}: {}'.format(
+                                 alteration, ', '.join(sorted(unknown))))
+        params = dict(defaults, **params)
+        missing = [key for key, value in params.items() if value is None]
+        if missing:
+            raise AssertionError('The parameters {} of {} are required'.format(
+                                 ', '.join(missing), alteration))
+        if alteration == 'freq_noise' and self.stages:
+            raise AssertionError('The frequency noise should be the first '
+                                 'stage of the pipeline')
+        self.stages.append(AlterationStage(alteration, params))
+        return self
+
+    def _freq_stage(self):
+        '''
+        Function that returns the frequency noise stage, or None.
+        '''
+        if self.stages and self.stages[0].alteration == 'freq_noise':
+            return self.stages[0]
+        return None
+
+    def __call__(self, impedance, seed=None, sample_index=None):
+        '''
+        Function that applies the pipeline to a batch of spectra.
+
+        Parameters
+        ----------
+        impedance : array-like
+                    (F,) or (N, F) complex impedance [ohm]. Its dtype is
+                    kept, so complex64 batches stay in single precision.
+        seed : int, numpy.random.Generator or None
+               seed of the random number generator. If None, the run seed
+               of the rng module is used.
+        sample_index : array-like of int or None
+                       (N,) indices of the spectra in the dataset. If given,
+                       the alterations of each spectrum are drawn from its
+                       own stream, refer to alterations.batch_complex_noise.
+
+        Returns
+        ----------
+        impedance_altered : numpy.ndarray
+                            complex impedance with the alterations, with the
+                            shape and dtype of the input [ohm]
+        '''
+        if self._freq_stage() is not None:
+            raise AssertionError('The frequency noise requires the circuit, '
+                                 'use simulate')
+        impedance = alterations._complex_batch(impedance)
+        return self._apply(impedance.copy(), generators(seed, sample_index))
+
+    def simulate(self, freq_range, circuit_name, seed=None, sample_index=None,
+                 dtype=None, backend=None, **circuit_elements):
+        '''
+        Function that simulates a batch of spectra with
+        data_simulation.batch_simulation and applies the pipeline. With a
+        frequency noise stage, each spectrum is evaluated at its own noisy
+        frequencies, with the numpy backend.
+
+        Parameters
+        ----------
+        freq_range : array or str
+                     frequency range, as returned by circuits.freq_gen, or
+                     its ID
+        circuit_name : str
+                       name of a circuit of the circuit registry, or circuit
+                       string
+        seed, sample_index : refer to __call__
+        dtype, backend : refer to data_simulation.batch_simulation
+        circuit_elements : keyword arguments
+                           the circuit elements, as single values or arrays
+                           of N values
+
+        Returns
+        ----------
+        batch : AlteredBatch
+                named tuple containing the frequency and the altered
+                impedance of the spectra
+        '''
+        if isinstance(freq_range, str):
+            freq_range = circuits.get_freq_grid(freq_range)
+        real = precision.real_dtype(dtype)
+        freq = np.asarray(freq_range[0], dtype=real)
+        angular_freq = np.asarray(freq_range[1], dtype=real)
+        rng = generators(seed, sample_index)
+
+        stage = self._freq_stage()
+        if stage is not None:
+            if sample_index is not None:
+                n_spectra = np.size(sample_index)
+            else:
+                n_spectra = np.broadcast(*[np.asarray(value) for value in
+                                           circuit_elements.values()]).size
+            freq, angular_freq = alterations._frequency_noise(
+                rng, freq, angular_freq, stage.params['noise_amplitude'],
+                (n_spectra, len(freq)))
+            backend = 'numpy'
+        impedance = batch_simulation((freq, angular_freq), circuit_name,
+                                     backend=backend, dtype=real,
+                                     **circuit_elements)
+        return AlteredBatch(freq, angular_freq, self._apply(impedance, rng))
+
+    def _apply(self, impedance, rng):
+        '''
+        Function that applies in place the stages following the frequency
+        noise to the impedance.
+        '''
+        stages = self.stages[1:] if self._freq_stage() else self.stages
+        # the scales of the noise models, from the impedance before the
+        # alterations
+        reference = impedance[..., -1:].real.copy()
+        if any(stage.alteration == 'current_noise' for stage in stages):
+            admittance_reference = (1/impedance[..., :1]).real
+
+        in_admittance = False
+        for stage in stages:
+            if (stage.alteration == 'current_noise') != in_admittance:
+                np.reciprocal(impedance, out=impedance)
+                in_admittance = not in_admittance
+            params = stage.params
+            if callable(stage.alteration):
+                altered = stage.alteration(impedance, rng, **params)
+                if altered is not impedance:
+                    impedance[...] = altered
+            elif stage.alteration == 'outliers':
+                alterations._add_outliers(
+                    impedance, reference, params['percentage_outliers'],
+                    params['outliers_amplitude'], rng)
+            else:
+                scale = params['noise_amplitude']*(
+                    admittance_reference if in_admittance else reference)
+                impedance += scale*alterations._polar_noise(
+                    rng, impedance.shape, impedance.dtype)
+        if in_admittance:
+            np.reciprocal(impedance, out=impedance)
+        return impedance
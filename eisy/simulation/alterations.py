@@ -1,41 +1,252 @@
-import math
 import numpy as np
-import random
-from scipy.special import erfinv
 
+from .rng import generators
 
-def freq_noise(dataframe, noise_amplitude=0.4):
-    '''Returns a dataframe with noise added to the frequency'''
-    fibonacci = [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233]
-
-    f_noise = []
-    w_noise = []
-    for i in range(dataframe.shape[0]):
-        rd_number = random.choice(fibonacci)
-        if rd_number % 2 == 0:
-            f_noise.append(dataframe['freq [Hz]'][i] + noise_amplitude *
-                           (dataframe['freq [Hz]'][i]) *
-                           math.cos(dataframe['freq [Hz]'][i]))
-            w_noise.append(dataframe['angular_freq [1/s]'][i] +
-                           noise_amplitude *
-                           (dataframe['angular_freq [1/s]'][i]) *
-                           math.cos(dataframe['angular_freq [1/s]'][i]))
-        else:
-            f_noise.append(dataframe['freq [Hz]'][i] + noise_amplitude *
-                           (dataframe['freq [Hz]'][i]) *
-                           math.sin(dataframe['freq [Hz]'][i]))
-            w_noise.append(dataframe['angular_freq [1/s]'][i] +
-                           noise_amplitude *
-                           (dataframe['angular_freq [1/s]'][i]) *
-                           math.sin(dataframe['angular_freq [1/s]'][i]))
 
+# the Fibonacci numbers drawn by frequency_noise: the frequency of a point
+# gets a sine perturbation for an odd number, and a cosine one otherwise
+_FIBONACCI = np.array([0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233])
+_FIBONACCI_ODD = _FIBONACCI % 2 == 1
+
+
+def freq_noise(dataframe, noise_amplitude=0.4, seed=None):
+    '''Returns a dataframe with noise added to the frequency'''
+    f_noise, w_noise = frequency_noise(dataframe['freq [Hz]'].to_numpy(),
+                                       dataframe['angular_freq [1/s]'
+                                                 ].to_numpy(),
+                                       noise_amplitude, seed=seed)
     dataframe['freq_noise [Hz]'] = f_noise
     dataframe['angular_freq_noise [1/s]'] = w_noise
-    # need to add few lines here
     return dataframe
 
 
-def complex_noise(dataframe, noise_amplitude):
+def _per_sample(rng, shape, draw):
+    '''
+    Function that calls draw(generator, shape) to draw random numbers with
+    the given leading shape. When rng is a list of generators, one per
+    spectrum, the row of each spectrum is drawn from its own generator.
+    '''
+    if not isinstance(rng, list):
+        return draw(rng, shape)
+    assert len(rng) == np.prod(shape[:-1], dtype=int), 'one sample index\
+ should be given per spectrum.'
+    rows = np.stack([draw(generator, shape[-1:]) for generator in rng])
+    return rows.reshape(shape + rows.shape[2:])
+
+
+def frequency_noise(freq, angular_freq, noise_amplitude=0.4, seed=None,
+                    sample_index=None):
+    '''
+    Function that returns the frequency and the angular frequency with noise
+    added, as arrays of the same dtype as the inputs. This is the noise
+    model of freq_noise, which can be applied before the impedance is
+    computed. A Fibonacci number is drawn for each point: the frequency is
+    perturbed by noise_amplitude*f*sin(f) when it is odd, and by
+    noise_amplitude*f*cos(f) otherwise. The draws of all the points are
+    made at once and applied with a mask.
+
+    Parameters
+    ----------
+    freq : array-like
+           (F,) or (N, F) frequency [Hz]
+    angular_freq : array-like
+                   angular frequency [1/s], with the shape of freq
+    noise_amplitude: float
+                     scale of the noise, relative to the frequency
+    seed : int, numpy.random.Generator or None
+           seed of the random number generator, refer to
+           batch_complex_noise
+    sample_index : array-like of int or None
+                   (N,) indices of the spectra in the dataset, refer to
+                   batch_complex_noise. If freq is a single (F,) range
+                   and several indices are given, one noisy range is
+                   returned for each spectrum.
+
+    Returns
+    -------
+    f_noise : numpy.ndarray
+              frequency with noise [Hz]
+    w_noise : numpy.ndarray
+              angular frequency with noise [1/s]
+    '''
+    freq = np.asarray(freq)
+    angular_freq = np.asarray(angular_freq)
+    shape = np.broadcast_shapes(freq.shape, angular_freq.shape)
+    if sample_index is not None and \
+            np.size(sample_index) != np.prod(shape[:-1], dtype=int):
+        # a shared frequency range gets the noise of each spectrum
+        shape = (np.size(sample_index),) + shape[-1:]
+    return _frequency_noise(generators(seed, sample_index), freq,
+                            angular_freq, noise_amplitude, shape)
+
+
+def _frequency_noise(rng, freq, angular_freq, noise_amplitude, shape):
+    '''
+    Function that applies the noise model of frequency_noise, drawing the
+    Fibonacci numbers of the given shape from rng.
+    '''
+    odd = _FIBONACCI_ODD[_per_sample(
+        rng, shape, lambda generator, size: generator.integers(
+            len(_FIBONACCI), size=size))]
+
+    f_noise = freq + noise_amplitude*freq*np.where(odd, np.sin(freq),
+                                                   np.cos(freq))
+    w_noise = angular_freq + noise_amplitude*angular_freq*np.where(
+        odd, np.sin(angular_freq), np.cos(angular_freq))
+    return f_noise.astype(freq.dtype, copy=False), \
+        w_noise.astype(angular_freq.dtype, copy=False)
+
+
+def _polar_noise(rng, shape, dtype):
+    '''
+    Function that draws the noise of the noise models with unit scale: a
+    normally distributed amplitude with a uniformly distributed phase,
+    returned as complex numbers of the given dtype. When rng is a list of
+    generators, one per spectrum, each spectrum is drawn from its own
+    generator.
+    '''
+    real = np.finfo(dtype).dtype
+
+    def draw(generator, size):
+        amplitude = generator.standard_normal(size, dtype=real)
+        phase = generator.random(size, dtype=real)*real.type(2*np.pi)
+        return amplitude*np.cos(phase) + 1j*(amplitude*np.sin(phase))
+
+    return _per_sample(rng, shape, draw).astype(dtype, copy=False)
+
+
+def _complex_batch(impedance):
+    '''
+    Function that returns the impedance as a complex array, keeping complex64
+    arrays in single precision.
+    '''
+    impedance = np.asarray(impedance)
+    if not np.iscomplexobj(impedance):
+        impedance = impedance.astype(complex)
+    return impedance
+
+
+def batch_complex_noise(impedance, noise_amplitude, seed=None,
+                        sample_index=None):
+    '''
+    Function that returns a batch of spectra with noise added to the real and
+    imaginary parts of the impedance. The noise of each point has a normally
+    distributed amplitude, with a standard deviation of noise_amplitude
+    times the real part of the impedance at the last frequency of the
+    spectrum, and a uniformly distributed phase. All the noise is drawn at
+    once from a numpy.random.Generator.
+
+    Parameters
+    ----------
+    impedance : array-like
+                (F,) or (N, F) complex impedance [ohm]
+    noise_amplitude: float
+                     A number between 0 and 1 representing the percentage of
+                     the signal to use when scaling the amplitude of the noise
+    seed : int, numpy.random.Generator or None
+           seed of the random number generator. If None, the run seed of
+           the rng module is used.
+    sample_index : array-like of int or None
+                   (N,) indices of the spectra in the dataset. If given, the
+                   noise of each spectrum is drawn from its own stream,
+                   derived from the seed and its index (refer to
+                   rng.sample_generators), so that any spectrum can be
+                   regenerated alone.
+
+    Returns
+    -------
+    impedance_noise : numpy.ndarray
+                      complex impedance with noise, with the shape and dtype
+                      of the input [ohm]
+    '''
+    impedance = _complex_batch(impedance)
+    rng = generators(seed, sample_index)
+    noisescale = noise_amplitude*impedance[..., -1:].real
+    return impedance + noisescale*_polar_noise(rng, impedance.shape,
+                                               impedance.dtype)
+
+
+def batch_current_noise(impedance, noise_amplitude, voltage_amplitude=0.01,
+                        seed=None, sample_index=None):
+    '''
+    Function that returns a batch of spectra with noise added to the current
+    output signal. The current, voltage_amplitude/Z, gets the noise model of
+    batch_complex_noise, scaled by the real part of the current at the first
+    frequency of each spectrum.
+
+    Parameters
+    ----------
+    impedance : array-like
+                (F,) or (N, F) complex impedance [ohm]
+    noise_amplitude: float
+                     A number between 0 and 1 representing the percentage of
+                     the signal to use when scaling the amplitude of the noise
+    voltage_amplitude: float
+                       The amplitude of the voltage input signal expressed
+                       in [V]
+    seed, sample_index : refer to batch_complex_noise
+
+    Returns
+    -------
+    impedance_noise : numpy.ndarray
+                      complex impedance with noise [ohm]
+    '''
+    impedance = _complex_batch(impedance)
+    rng = generators(seed, sample_index)
+    current = voltage_amplitude/impedance
+    noisescale = noise_amplitude*current[..., :1].real
+    current = current + noisescale*_polar_noise(rng, impedance.shape,
+                                                impedance.dtype)
+    return voltage_amplitude/current
+
+
+def batch_voltage_noise(impedance, noise_amplitude, current_amplitude=0.01,
+                        seed=None, sample_index=None):
+    '''
+    Function that returns a batch of spectra with noise added to the voltage
+    output signal. The voltage, current_amplitude*Z, gets the noise model of
+    batch_complex_noise, scaled by the real part of the voltage at the last
+    frequency of each spectrum.
+
+    Parameters
+    ----------
+    impedance : array-like
+                (F,) or (N, F) complex impedance [ohm]
+    noise_amplitude: float
+                     A number between 0 and 1 representing the percentage of
+                     the signal to use when scaling the amplitude of the noise
+    current_amplitude: float
+                       The amplitude of the current input signal expressed
+                       in [A]
+    seed, sample_index : refer to batch_complex_noise
+
+    Returns
+    -------
+    impedance_noise : numpy.ndarray
+                      complex impedance with noise [ohm]
+    '''
+    impedance = _complex_batch(impedance)
+    rng = generators(seed, sample_index)
+    voltage = current_amplitude*impedance
+    noisescale = noise_amplitude*voltage[..., -1:].real
+    voltage = voltage + noisescale*_polar_noise(rng, impedance.shape,
+                                                impedance.dtype)
+    return voltage/current_amplitude
+
+
+def _noise_columns(dataframe, impedance_noise):
+    '''
+    Function that adds the real and imaginary parts of the impedance with
+    noise to the dataframe, with the dtype of the impedance columns.
+    '''
+    dataframe['Re_Z_noise [ohm]'] = impedance_noise.real.astype(
+        dataframe['Re_Z [ohm]'].dtype, copy=False)
+    dataframe['Im_Z_noise [ohm]'] = impedance_noise.imag.astype(
+        dataframe['Im_Z [ohm]'].dtype, copy=False)
+    return dataframe
+
+
+def complex_noise(dataframe, noise_amplitude, seed=None):
     '''
     Function that returns a dataframe with noise added to the real and
     imaginary parts of the impedance
@@ -47,6 +258,9 @@ def complex_noise(dataframe, noise_amplitude):
     noise_amplitude: float
                       A number between 0 and 1 representing the percentage of
                       the signal to use when scaling the amplitude of the noise
+    seed : int, numpy.random.Generator or None
+           seed of the random number generator, refer to
+           batch_complex_noise
 
     Returns
     -------
@@ -54,27 +268,14 @@ def complex_noise(dataframe, noise_amplitude):
                A pandas dataframe containing the dataset with added colomns
                containing the modified signal
     '''
-
-    # noisescale = noise_scaling(noise_amplitude, 'complex_noise', dataframe)
-    noisescale = noise_amplitude * dataframe['Re_Z [ohm]'].iloc[-1]
-    noise = []
-    real_noisy = []
-    imag_noisy = []
-    for i in range(len(dataframe.index)):
-        rdm1 = random.random()
-        noise.append(np.sqrt(2)*noisescale*erfinv(2*rdm1-1))
-        rdm2 = random.random()
-        real_noise = noise[i] * np.cos(rdm2*2*np.pi)
-        imag_noise = noise[i] * np.sin(rdm2*2*np.pi)
-        real_noisy.append(dataframe['Re_Z [ohm]'][i] + real_noise)
-        imag_noisy.append(dataframe['Im_Z [ohm]'][i] + imag_noise)
-
-    dataframe['Re_Z_noise [ohm]'] = real_noisy
-    dataframe['Im_Z_noise [ohm]'] = imag_noisy
-    return dataframe
+    impedance = dataframe['Re_Z [ohm]'].to_numpy() + \
+        1j*dataframe['Im_Z [ohm]'].to_numpy()
+    return _noise_columns(dataframe, batch_complex_noise(
+        impedance, noise_amplitude, seed=seed))
 
 
-def current_noise(dataframe, noise_amplitude, voltage_amplitude=0.01):
+def current_noise(dataframe, noise_amplitude, voltage_amplitude=0.01,
+                  seed=None):
     '''
     Function that returns a dataframe with noise added to current output signal
 
@@ -88,35 +289,22 @@ def current_noise(dataframe, noise_amplitude, voltage_amplitude=0.01):
     voltage_amplitude: float
                        The amplitude of the voltage input signal expressed
                        in [V]
+    seed : int, numpy.random.Generator or None
+           seed of the random number generator, refer to
+           batch_current_noise
     Returns
     -------
     dataframe: pandas.DataFrame
                A pandas dataframe containing the dataset with added colomns
                containing the modified signal
     '''
-    current = voltage_amplitude/dataframe['complex_Z [ohm]']
-    noisescale = noise_amplitude * current.iloc[0].real
-    noise = []
-    real = []
-    imag = []
-    current_noise = []
-    for i in range(len(current)):
-        rdm1 = random.random()
-        noise.append(np.sqrt(2)*noisescale*erfinv(2*rdm1-1))
-        rdm2 = random.random()
-        real_noise = noise[i] * np.cos(rdm2*2*np.pi)
-        imag_noise = noise[i] * np.sin(rdm2*2*np.pi)
-        real.append(current.to_numpy().real[i] + real_noise)
-        imag.append(current.to_numpy().imag[i] + imag_noise)
-        current_noise.append(real[i]+1j*imag[i])
-
-    complex_impedance = voltage_amplitude/np.array(current_noise)
-    dataframe['Re_Z_noise [ohm]'] = complex_impedance.real
-    dataframe['Im_Z_noise [ohm]'] = complex_impedance.imag
-    return dataframe
+    return _noise_columns(dataframe, batch_current_noise(
+        dataframe['complex_Z [ohm]'].to_numpy(), noise_amplitude,
+        voltage_amplitude=voltage_amplitude, seed=seed))
 
 
-def voltage_noise(dataframe, noise_amplitude, current_amplitude=0.01):
+def voltage_noise(dataframe, noise_amplitude, current_amplitude=0.01,
+                  seed=None):
     '''
     Function that returns a dataframe with noise added to voltage output signal
 
@@ -130,36 +318,80 @@ def voltage_noise(dataframe, noise_amplitude, current_amplitude=0.01):
     current_amplitude: float
                        The amplitude of the current input signal expressed
                        in [A]
+    seed : int, numpy.random.Generator or None
+           seed of the random number generator, refer to
+           batch_voltage_noise
     Returns
     -------
     dataframe: pandas.DataFrame
                A pandas dataframe containing the dataset with added colomns
                containing the modified signal
     '''
+    return _noise_columns(dataframe, batch_voltage_noise(
+        dataframe['complex_Z [ohm]'].to_numpy(), noise_amplitude,
+        current_amplitude=current_amplitude, seed=seed))
 
-    voltage = current_amplitude*dataframe['complex_Z [ohm]']
-    noisescale = noise_amplitude * voltage.iloc[-1].real
-    imag = []
-    real = []
-    noise = []
-    voltage_noise = []
-    for i in range(len(voltage)):
-        rdm1 = random.random()
-        noise.append(np.sqrt(2)*noisescale*erfinv(2*rdm1-1))
-        rdm2 = random.random()
-        real_noise = noise[i] * np.cos(rdm2*2*np.pi)
-        imag_noise = noise[i] * np.sin(rdm2*2*np.pi)
-        real.append(voltage.to_numpy().real[i] + real_noise)
-        imag.append(voltage.to_numpy().imag[i] + imag_noise)
-        voltage_noise.append(real[i]+1j*imag[i])
-
-    complex_impedance = np.array(voltage_noise)/current_amplitude
-    dataframe['Re_Z_noise [ohm]'] = complex_impedance.real
-    dataframe['Im_Z_noise [ohm]'] = complex_impedance.imag
-    return dataframe
 
+def batch_outliers(impedance, percentage_outliers, outliers_amplitude,
+                   seed=None, sample_index=None):
+    '''
+    Function that returns a batch of spectra in which a random selection of
+    points are made outliers. Each point is selected with a probability of
+    percentage_outliers, and a selected point is moved by
+    +/- outliers_amplitude*Re(Z_last)*(2r - 1)*exp(2j*pi*r), with r
+    uniformly distributed and Re(Z_last) the real part of the impedance at
+    the last frequency of the spectrum. The selection is a mask over the
+    whole batch, and only the selected points are computed.
 
-def outliers(dataframe, percentage_outliers, outliers_amplitude):
+    Parameters
+    ----------
+    impedance : array-like
+                (F,) or (N, F) complex impedance [ohm]
+    percentage_outliers : float
+                          A number between 0 and 1 indicating the percentge
+                          of points to modify as outliers
+    outliers_amplitude : float or int
+                         A number indicating the percentge of
+                         the signal the outliers will be scaled by.
+    seed, sample_index : refer to batch_complex_noise
+
+    Returns
+    -------
+    impedance_outliers : numpy.ndarray
+                         complex impedance with outliers, with the shape and
+                         dtype of the input [ohm]
+    '''
+    impedance = _complex_batch(impedance)
+    impedance_outliers = impedance.copy()
+    _add_outliers(impedance_outliers, impedance[..., -1:].real,
+                  percentage_outliers, outliers_amplitude,
+                  generators(seed, sample_index))
+    return impedance_outliers
+
+
+def _add_outliers(impedance, reference, percentage_outliers,
+                  outliers_amplitude, rng):
+    '''
+    Function that adds in place the outliers of batch_outliers to the
+    impedance, scaled by reference, the (..., 1) real part of the impedance
+    at the last frequency.
+    '''
+    real = impedance.real.dtype
+    # selection, magnitude and sign of each point
+    draws = _per_sample(rng, impedance.shape,
+                        lambda generator, size: generator.random(
+                            size + (3,), dtype=real))
+    mask = draws[..., 0] < percentage_outliers
+
+    rdm = draws[..., 1][mask]
+    sign = np.where(draws[..., 2][mask] < 0.5, real.type(-1), real.type(1))
+    scale = np.broadcast_to(reference, impedance.shape)[mask]
+    impedance[mask] += sign*scale*outliers_amplitude*(2*rdm - 1) * \
+        np.exp(2j*np.pi*rdm)
+    return impedance
+
+
+def outliers(dataframe, percentage_outliers, outliers_amplitude, seed=None):
     '''Function that randomly creates outliers in the impedance response
 
     The function will modify a percentage of the data to be outliers, with
@@ -177,24 +409,17 @@ def outliers(dataframe, percentage_outliers, outliers_amplitude):
     outliers_amplitude : float or int
                          A number indicating the percentge of
                          the signal the outliers will be scaled by.
+    seed : int, numpy.random.Generator or None
+           seed of the random number generator, refer to batch_outliers
     Returns
     -------
     dataframe: pandas.DataFrame
                A pandas dataframe containing the dataset with added colomns
                containing the modified signal
     '''
-    complex_response = dataframe['complex_Z [ohm]'].copy()
-    for i in range(len(complex_response)):
-        rdm = random.random()
-        complex_response[i] = complex_response[i] + \
-            (random.choice([-1, 1]) * dataframe['Re_Z [ohm]'].iloc[-1] *
-             outliers_amplitude * (2*rdm-1) * np.exp(1j*rdm*2*np.pi) *
-             (1 if rdm < outliers_amplitude else 0))
-
-    dataframe['Re_Z_noise [ohm]'] = complex_response.to_numpy().real
-    dataframe['Im_Z_noise [ohm]'] = complex_response.to_numpy().imag
-
-    return dataframe
+    return _noise_columns(dataframe, batch_outliers(
+        dataframe['complex_Z [ohm]'].to_numpy(), percentage_outliers,
+        outliers_amplitude, seed=seed))
 
 
 def normalize(impedance_array):
@@ -0,0 +1,300 @@
+import functools
+import re
+
+import numpy as np
+
+from .circuits import _element_column, _jw_alpha
+
+# Regular expression splitting a circuit string into its tokens. An element
+# is an upper case letter indicating its type, followed by an optional lower
+# case/numeric label (e.g. 'Rs', 'Rp1', 'Q2').
+_TOKENS = re.compile(r'\s*(?:([RCQWL][a-z0-9]*)|([-()\[\]]))')
+
+# Parameters required by each type of circuit element
+_ELEMENT_PARAMETERS = {'R': ('R',), 'C': ('C',), 'Q': ('Q', 'alpha'),
+                       'W': ('sigma',), 'L': ('L',)}
+
+
+def _tokenize(circuit_string):
+    '''
+    Function that splits a circuit string into element and symbol tokens.
+    '''
+    tokens = []
+    position = 0
+    circuit_string = circuit_string.strip()
+    while position < len(circuit_string):
+        match = _TOKENS.match(circuit_string, position)
+        if not match:
+            raise AssertionError('Invalid character in the circuit string '
+                                 '{} at position {}'.format(circuit_string,
+                                                            position))
+        tokens.append(match.group(1) or match.group(2))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    '''
+    Recursive descent parser turning the tokens of a circuit string into an
+    expression tree of nested tuples:
+
+        ('element', type, label)
+        ('series', [child, child, ...])
+        ('parallel', [child, child, ...])
+    '''
+
+    def __init__(self, circuit_string):
+        self.circuit_string = circuit_string
+        self.tokens = _tokenize(circuit_string)
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def error(self, message):
+        raise AssertionError('Invalid circuit string {}: {}'.format(
+                             self.circuit_string, message))
+
+    def parse(self):
+        tree = self.series(closing=None)
+        if self.peek() is not None:
+            self.error("unexpected '{}'".format(self.peek()))
+        return tree
+
+    def series(self, closing):
+        children = []
+        while self.peek() is not None and self.peek() != closing:
+            if self.peek() == '-':
+                self.take()
+                continue
+            if self.peek() in (')', ']'):
+                self.error("unbalanced '{}'".format(self.peek()))
+            children.append(self.item())
+        if closing is not None and self.take() != closing:
+            self.error("missing '{}'".format(closing))
+        if not children:
+            self.error('empty series connection')
+        if len(children) == 1:
+            return children[0]
+        return ('series', children)
+
+    def parallel(self):
+        branches = []
+        while self.peek() != ')':
+            if self.peek() is None:
+                self.error("missing ')'")
+            if self.peek() == '-':
+                self.error('series branches inside a parallel connection '
+                           'should be enclosed in square brackets, '
+                           'e.g. (Q[R-W])')
+            branches.append(self.item())
+        self.take()
+        if not branches:
+            self.error('empty parallel connection')
+        if len(branches) == 1:
+            return branches[0]
+        return ('parallel', branches)
+
+    def item(self):
+        token = self.take()
+        if token == '(':
+            return self.parallel()
+        if token == '[':
+            return self.series(closing=']')
+        if token in ('-', ')', ']', None):
+            self.error("unexpected '{}'".format(token))
+        return ('element', token[0], token[1:])
+
+
+def parse_circuit(circuit_string):
+    '''
+    Function that parses a circuit string into an expression tree.
+
+    The notation follows the one used in the docstrings of the circuits
+    module: elements connected in series are separated by '-', elements
+    in parallel are enclosed in round brackets, and a series branch inside a
+    parallel connection is enclosed in square brackets. For example:
+
+        -Rs-(RC)-          solution resistance in series with a RC element
+        -Rs-(RQ)-(RQ)-     two RQ elements in series
+        -Rs-(Q[Rp-W])-     simplified Randles circuit
+
+    Supported elements are R (resistor), C (capacitor), Q (constant phase
+    element), W (semi-infinite Warburg element) and L (inductor).
+
+    Parameters
+    ----------
+    circuit_string : str
+                     string representation of the circuit
+
+    Returns
+    ----------
+    tree : tuple
+           expression tree of the circuit, composed by ('series', children),
+           ('parallel', children) and ('element', type, name) nodes.
+    parameters : tuple
+                 names of the circuit element values needed to evaluate the
+                 circuit, in order of appearance.
+    '''
+    tree = _Parser(circuit_string).parse()
+
+    # Unlabeled elements of a type that appears more than once are numbered in
+    # order of appearance: -Rs-(RQ)-(RQ)- needs R1, Q1, alpha1, R2, Q2, alpha2
+    elements = []
+    _collect_elements(tree, elements)
+    unlabeled = {}
+    for kind, label in elements:
+        if not label:
+            unlabeled[kind] = unlabeled.get(kind, 0) + 1
+    counter = {}
+
+    def name_elements(node):
+        if node[0] != 'element':
+            return (node[0], [name_elements(child) for child in node[1]])
+        kind, label = node[1], node[2]
+        if not label and unlabeled[kind] > 1:
+            counter[kind] = counter.get(kind, 0) + 1
+            label = str(counter[kind])
+        return ('element', kind, label)
+
+    tree = name_elements(tree)
+    parameters = []
+    named = []
+    _collect_elements(tree, named)
+    for kind, label in named:
+        for parameter in _ELEMENT_PARAMETERS[kind]:
+            name = parameter + label
+            if name in parameters:
+                raise AssertionError('The circuit element {} appears more '
+                                     'than once in {}'.format(name,
+                                                              circuit_string))
+            parameters.append(name)
+    return tree, tuple(parameters)
+
+
+def _collect_elements(node, elements):
+    '''
+    Function that appends the (type, label) of every element of the tree to
+    the elements list, in order of appearance.
+    '''
+    if node[0] == 'element':
+        elements.append((node[1], node[2]))
+    else:
+        for child in node[1]:
+            _collect_elements(child, elements)
+
+
+def _build_kernel(node):
+    '''
+    Function that turns a node of the expression tree into a function of the
+    angular frequency terms and of the circuit element values.
+    '''
+    if node[0] == 'series':
+        children = [_build_kernel(child) for child in node[1]]
+
+        def series(terms, values):
+            Z_complex = children[0](terms, values)
+            for child in children[1:]:
+                Z_complex = Z_complex + child(terms, values)
+            return Z_complex
+        return series
+
+    if node[0] == 'parallel':
+        children = [_build_kernel(child) for child in node[1]]
+
+        def parallel(terms, values):
+            admittance = 1/children[0](terms, values)
+            for child in children[1:]:
+                admittance = admittance + 1/child(terms, values)
+            return 1/admittance
+        return parallel
+
+    kind, label = node[1], node[2]
+    if kind == 'R':
+        name = 'R' + label
+        return lambda terms, values: values[name]
+    if kind == 'C':
+        name = 'C' + label
+        return lambda terms, values: 1/(values[name]*terms['jw'])
+    if kind == 'L':
+        name = 'L' + label
+        return lambda terms, values: values[name]*terms['jw']
+    if kind == 'W':
+        name = 'sigma' + label
+        return lambda terms, values: values[name]*terms['warburg']
+    q_name, alpha_name = 'Q' + label, 'alpha' + label
+    return lambda terms, values: 1/(values[q_name] *
+                                    _jw_alpha(terms['w'],
+                                              values[alpha_name]))
+
+
+class CompiledCircuit:
+    '''
+    Vectorized evaluator of the impedance response of a circuit string.
+    Instances are created by compile_circuit and are called like the
+    functions of the circuits module: the circuit element values are given
+    as keyword arguments, either as single values or as arrays of N values.
+    '''
+
+    def __init__(self, circuit_string):
+        self.circuit_string = circuit_string
+        self.tree, self.parameters = parse_circuit(circuit_string)
+        self._kernel = _build_kernel(self.tree)
+
+    def __repr__(self):
+        return 'CompiledCircuit({!r})'.format(self.circuit_string)
+
+    def __call__(self, angular_freq, **circuit_elements):
+        if set(circuit_elements) != set(self.parameters):
+            raise AssertionError('The circuit {} requires the elements {}'
+                                 .format(self.circuit_string,
+                                         ', '.join(self.parameters)))
+        angular_freq = np.asarray(angular_freq)
+        terms = {'w': angular_freq, 'jw': angular_freq*1j,
+                 'warburg': (1-1j)*angular_freq**(-0.5)}
+        values = {name: _element_column(value)
+                  for name, value in circuit_elements.items()}
+        Z_complex = self._kernel(terms, values)
+        # A circuit made only of resistors does not depend on the frequency
+        shape = np.broadcast_shapes(np.shape(Z_complex), angular_freq.shape)
+        if np.shape(Z_complex) != shape:
+            Z_complex = np.broadcast_to(Z_complex, shape) + 0j
+        return Z_complex
+
+
+@functools.lru_cache(maxsize=128)
+def compile_circuit(circuit_string):
+    '''
+    Function that compiles a circuit string into a vectorized evaluator of
+    its impedance response. Compiled circuits are cached, so a circuit
+    string is parsed only once per session.
+
+    Parameters
+    ----------
+    circuit_string : str
+                     string representation of the circuit, refer to
+                     parse_circuit for the notation.
+
+    Returns
+    ----------
+    compiled_circuit : CompiledCircuit
+                       callable taking the angular frequency and the
+                       circuit element values and returning the complex
+                       impedance response, (F,) or (N, F) [ohm].
+    '''
+    return CompiledCircuit(circuit_string)
+
+
+def is_circuit_string(circuit_name):
+    '''
+    Function that returns True if circuit_name is a circuit string (e.g.
+    '-Rs-(RC)-') rather than the name of a function of the circuits module.
+    '''
+    return any(symbol in circuit_name for symbol in '-()[]')
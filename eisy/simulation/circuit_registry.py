@@ -0,0 +1,211 @@
+import collections
+import functools
+
+from . import circuits
+from .circuit_compiler import compile_circuit, is_circuit_string
+
+CircuitDescriptor = collections.namedtuple('CircuitDescriptor', [
+    'name', 'elements', 'units', 'evaluator', 'jacobian', 'file_tag'])
+CircuitDescriptor.__doc__ = '''
+Description of a circuit that can be simulated and fitted.
+
+name : str
+       name of the circuit
+elements : tuple of str
+           names of the circuit elements, in the order used when their
+           values are stacked in arrays
+units : tuple of str
+        unit of each circuit element, written in the metadata of the
+        simulation files
+evaluator : callable
+            function of the angular frequency and of the circuit elements,
+            given as keyword arguments, returning the complex impedance, such
+            as the functions of the circuits module. Arrays of N element
+            values should give a (N, F) impedance.
+jacobian : callable or None
+           function with the same arguments returning the derivatives of the
+           impedance with respect to each element, as a dictionary. Circuits
+           without a Jacobian cannot be fitted.
+file_tag : str
+           tag of the circuit in the names of the simulation files
+'''
+
+# Units of the circuit elements, from the prefix of their name
+ELEMENT_UNITS = (('alpha', '-'), ('sigma', '-'), ('R', 'ohm'), ('C', 'F'),
+                 ('L', 'H'), ('Q', '[s^(alpha-1)/ohm]'))
+
+# Tags of the simulation files of the circuits of the circuits module: the
+# number of arcs of their Nyquist plot, or a diffusion tail
+_FILE_TAGS = {'RC_series': 'none', 'RQ_series': 'none', 'RC_parallel': 'one',
+              'RQ_parallel': 'one', 'RsRC': 'one', 'RsRQ': 'one',
+              'RsRCRC': 'two', 'RsRQRQ': 'two', 'Randles_simplified': 'tail'}
+
+# name (or alias) -> CircuitDescriptor
+_CIRCUITS = {}
+
+
+def element_unit(element_name):
+    '''
+    Function that returns the unit of a circuit element from its name, such
+    as 'ohm' for 'Rp1' or '-' for 'alpha2'.
+    '''
+    for prefix, unit in ELEMENT_UNITS:
+        if element_name.startswith(prefix):
+            return unit
+    return '-'
+
+
+def _make_descriptor(name, evaluator, elements=None, units=None,
+                     jacobian=None, file_tag=None):
+    '''
+    Function that returns the descriptor of a circuit without registering
+    it, refer to register_circuit for the parameters.
+    '''
+    if isinstance(evaluator, str):
+        evaluator = compile_circuit(evaluator)
+        if elements is None:
+            elements = evaluator.parameters
+    assert callable(evaluator), 'the evaluator should be a function or a\
+ circuit string.'
+    if elements is None:
+        raise AssertionError('The elements of the circuit {} should be '
+                             'given'.format(name))
+    elements = tuple(elements)
+    if units is None:
+        units = tuple(element_unit(element) for element in elements)
+    if len(units) != len(elements):
+        raise AssertionError('One unit should be given for each element of '
+                             'the circuit {}'.format(name))
+    return CircuitDescriptor(name, elements, tuple(units), evaluator,
+                             jacobian, file_tag or name)
+
+
+@functools.lru_cache(maxsize=128)
+def _string_descriptor(circuit_string):
+    '''
+    Function that returns the descriptor of a circuit string. The
+    descriptors are not registered, and only the ones of the most recent
+    circuit strings are cached, as the evaluators of compile_circuit.
+    '''
+    return _make_descriptor(circuit_string, circuit_string,
+                            file_tag='custom')
+
+
+def register_circuit(name, evaluator, elements=None, units=None,
+                     jacobian=None, file_tag=None, aliases=(),
+                     overwrite=False):
+    '''
+    Function that adds a circuit to the registry, so that it can be
+    simulated by data_simulation and file_writer, and fitted by the fitting
+    module if its Jacobian is given.
+
+    Parameters
+    ----------
+    name : str
+           name of the circuit
+    evaluator : callable or str
+                function of the angular frequency and of the circuit
+                elements returning the complex impedance, or a circuit
+                string such as '-Rs-(RQ)-(RQ)-', refer to the
+                circuit_compiler module
+    elements : tuple of str
+               names of the circuit elements. They can be omitted for
+               circuit strings.
+    units : tuple of str
+            unit of each element. If None, it is deduced from the element
+            names, refer to element_unit.
+    jacobian : callable
+               function returning the derivatives of the impedance with
+               respect to each element, refer to CircuitDescriptor
+    file_tag : str
+               tag of the circuit in the names of the simulation files. If
+               None, the name of the circuit.
+    aliases : tuple of str
+              other names under which the circuit is registered
+    overwrite : bool
+                If False, registering a name already in use raises an
+                AssertionError.
+
+    Returns
+    ----------
+    descriptor : CircuitDescriptor
+                 the registered circuit
+    '''
+    descriptor = _make_descriptor(name, evaluator, elements, units,
+                                  jacobian, file_tag)
+    for key in (name,) + tuple(aliases):
+        if key in _CIRCUITS and not overwrite:
+            raise AssertionError('A circuit named {} is already '
+                                 'registered'.format(key))
+    for key in (name,) + tuple(aliases):
+        _CIRCUITS[key] = descriptor
+    return descriptor
+
+
+def get_circuit(circuit_name):
+    '''
+    Function that returns the descriptor of a registered circuit, or of a
+    circuit string, which is compiled the first time it is used. The
+    circuit strings are not added to the registry.
+
+    Parameters
+    ----------
+    circuit_name : str
+                   name or alias of a registered circuit, or circuit string
+
+    Returns
+    ----------
+    descriptor : CircuitDescriptor
+                 the description of the circuit
+    '''
+    try:
+        return _CIRCUITS[circuit_name]
+    except KeyError:
+        pass
+    assert isinstance(circuit_name, str), 'the circuit name should be a string'
+    if is_circuit_string(circuit_name):
+        return _string_descriptor(circuit_name)
+    raise AssertionError('The circuit {} is not registered'.format(
+                         circuit_name))
+
+
+def unregister_circuit(name):
+    '''
+    Function that removes a circuit and its aliases from the registry.
+
+    Parameters
+    ----------
+    name : str
+           name or alias of a registered circuit
+    '''
+    if name not in _CIRCUITS:
+        raise AssertionError('The circuit {} is not registered'.format(name))
+    descriptor = _CIRCUITS[name]
+    for key in [key for key, value in _CIRCUITS.items()
+                if value is descriptor]:
+        del _CIRCUITS[key]
+
+
+def registered_circuits(fittable=False):
+    '''
+    Function that returns the names of the registered circuits, without
+    their aliases and circuit strings.
+
+    Parameters
+    ----------
+    fittable : bool
+               If True, only the circuits with a Jacobian are returned.
+    '''
+    return tuple(name for name, descriptor in _CIRCUITS.items()
+                 if name == descriptor.name and
+                 not is_circuit_string(name) and
+                 (descriptor.jacobian is not None or not fittable))
+
+
+for _name, _elements in circuits.CIRCUIT_ELEMENTS.items():
+    # 'Randles' is the name used by the earlier versions of file_writer
+    register_circuit(_name, getattr(circuits, 'cir_' + _name), _elements,
+                     jacobian=getattr(circuits, 'jac_' + _name),
+                     file_tag=_FILE_TAGS[_name],
+                     aliases=('Randles',) if _name == 'Randles_simplified'
+                     else ())
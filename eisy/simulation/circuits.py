@@ -1,5 +1,29 @@
+import hashlib
+from collections import OrderedDict
+
 import numpy as np
 
+# Names of the circuit elements of each circuit function (without the 'cir_'
+# prefix), in the order used when the element values are stacked in arrays
+CIRCUIT_ELEMENTS = {'RC_parallel': ('R', 'C'),
+                    'RC_series': ('R', 'C'),
+                    'RQ_parallel': ('R', 'Q', 'alpha'),
+                    'RQ_series': ('R', 'Q', 'alpha'),
+                    'RsRC': ('Rs', 'Rp', 'C'),
+                    'RsRQ': ('Rs', 'Rp', 'Q', 'alpha'),
+                    'RsRQRQ': ('Rs', 'Rp1', 'Q1', 'alpha1', 'Rp2', 'Q2',
+                               'alpha2'),
+                    'RsRCRC': ('Rs', 'Rp1', 'C1', 'Rp2', 'C2'),
+                    'Randles_simplified': ('Rs', 'Rp', 'Q', 'alpha', 'sigma')}
+
+# Registry of the frequency grids: grid ID -> (frequency, angular frequency),
+# and (high_freq, low_freq, decades) -> grid ID for the grids of freq_gen.
+# The registry keeps at most MAX_FREQ_GRIDS ranges, dropping the least
+# recently used ones first
+MAX_FREQ_GRIDS = 1024
+_FREQ_GRIDS = OrderedDict()
+_FREQ_GEN_IDS = {}
+
 
 def freq_gen(high_freq, low_freq, decades=10):
     '''
@@ -7,14 +31,18 @@ def freq_gen(high_freq, low_freq, decades=10):
     impedance response of an electrical circuit Frequency Generator with
     logspaced freqencies
 
+    The frequency ranges are interned: calling the function again with the
+    same arguments returns the same read-only arrays, which can also be
+    retrieved from their ID with get_freq_grid.
+
     Parameters
     ----------
     high_freq : single value (int or float)
                 initial frequency value (high frequency domain) [Hz]
-    high_freq : single value (int or float)
-                final frequency value (low frequency domain) [Hz]
+    low_freq : single value (int or float)
+               final frequency value (low frequency domain) [Hz]
     decades : integer
-              number of frequency decades to be used as range. Default value
+              number of frequency points per decade. Default value
               is set to be 10 [-]
 
     Returns
@@ -22,11 +50,106 @@ def freq_gen(high_freq, low_freq, decades=10):
     [0] = frequency range [Hz]
     [1] = Angular frequency range [1/s]
     '''
-    f_decades = int(np.log10(int(high_freq)) - np.log10(low_freq))
-    f_range = np.logspace(np.log10(int(high_freq)), np.log10(low_freq),
-                          np.around(decades*f_decades), endpoint=True)
+    return get_freq_grid(freq_grid_id(high_freq, low_freq, decades))
+
+
+def freq_grid_id(high_freq, low_freq, decades=10):
+    '''
+    Function that returns the ID of the frequency range generated by
+    freq_gen with the same arguments, generating and registering the range
+    the first time it is requested.
+    '''
+    key = (int(high_freq), float(low_freq), decades)
+    if _FREQ_GEN_IDS.get(key) not in _FREQ_GRIDS:
+        f_decades = int(np.log10(int(high_freq)) - np.log10(low_freq))
+        f_range = np.logspace(np.log10(int(high_freq)), np.log10(low_freq),
+                              np.around(decades*f_decades), endpoint=True)
+        _FREQ_GEN_IDS[key] = register_freq_grid(f_range)
+    return _FREQ_GEN_IDS[key]
+
+
+def register_freq_grid(freq):
+    '''
+    Function that registers a frequency range, such as the one of a measured
+    spectrum, and returns its ID. The ID is computed from the frequency
+    values, so it is the same in every session and identical ranges share
+    the same ID and arrays.
+
+    Only the MAX_FREQ_GRIDS most recently used ranges are kept, so callers
+    processing many spectra on the same range should register it once and
+    pass its ID around rather than registering the range of every spectrum.
+
+    Parameters
+    ----------
+    freq : array-like
+           frequency range [Hz]
+
+    Returns
+    ----------
+    grid_id : str
+              ID of the frequency range, to be used with get_freq_grid
+    '''
+    f_range = np.array(freq, dtype=float)
+    grid_id = hashlib.sha1(f_range.tobytes()).hexdigest()[:16]
+    if grid_id in _FREQ_GRIDS:
+        _FREQ_GRIDS.move_to_end(grid_id)
+        return grid_id
     w_range = 2 * np.pi * f_range
-    return f_range, w_range
+    f_range.flags.writeable = False
+    w_range.flags.writeable = False
+    _FREQ_GRIDS[grid_id] = (f_range, w_range)
+    while len(_FREQ_GRIDS) > MAX_FREQ_GRIDS:
+        _FREQ_GRIDS.popitem(last=False)
+    return grid_id
+
+
+def get_freq_grid(grid_id):
+    '''
+    Function that returns the registered frequency range with the given ID,
+    as returned by freq_gen: (frequency [Hz], angular frequency [1/s]).
+    '''
+    if grid_id not in _FREQ_GRIDS:
+        raise AssertionError('No frequency range is registered with the ID '
+                             '{}'.format(grid_id))
+    _FREQ_GRIDS.move_to_end(grid_id)
+    return _FREQ_GRIDS[grid_id]
+
+
+def _element_column(element_value):
+    '''
+    Function that prepares a circuit element value for broadcasting against
+    the frequency range. Single values are returned unchanged, while an array
+    of N values is reshaped into a (N, 1) column, so that the impedance
+    response of N circuits is computed as a (N, F) matrix in a single pass.
+
+    Parameters
+    ----------
+    element_value : single value or array-like
+                    value(s) of the circuit element
+
+    Returns
+    ----------
+    element_value : single value or array-like
+                    value(s) of the circuit element, with a trailing axis
+                    added when an array is given
+    '''
+    element_array = np.asarray(element_value)
+    if element_array.ndim == 0:
+        return element_value
+    return element_array[..., np.newaxis]
+
+
+def _jw_alpha(angular_freq, alpha):
+    '''
+    Function that returns the term (j*w)**alpha of a constant phase element
+    as w**alpha*exp(j*alpha*pi/2), which only needs a real power and keeps
+    the precision of the angular frequency: complex powers are slower,
+    especially in single precision.
+    '''
+    magnitude = np.power(angular_freq, alpha)
+    rotation = np.exp(0.5j*np.pi*np.asarray(alpha))
+    return magnitude*rotation.astype(np.result_type(magnitude, 1j),
+                                     copy=False)
 
 
 def cir_RC_parallel(angular_freq, **circuit_elements):
@@ -42,23 +165,25 @@ def cir_RC_parallel(angular_freq, **circuit_elements):
 
    **circuit_elements : dictionary or keyword arguments
 
-        resistance : single value (int or float)
+        resistance : single value or array-like (int or float)
                      Solution resistance [ohm]
-        capacitance : single value (int or float)
+        capacitance : single value or array-like (int or float)
                       Capacitance of an electrode surface [F]
 
     Returns
     ---------
     Z_complex : array-like
-                impedance response of the circuit under investigation [ohm]
+                impedance response of the circuit under investigation [ohm].
+                The shape is (F,) for single element values and (N, F) when
+                N sets of circuit elements are given
     '''
     # circuit_string = '-(RC)-'
     # define the elements from the input dictionary
     if len(circuit_elements) != 2:
         raise AssertionError('The wrong number of circuit elements was'
                              'inputted')
-    resistance = circuit_elements['R']
-    capacitance = circuit_elements['C']
+    resistance = _element_column(circuit_elements['R'])
+    capacitance = _element_column(circuit_elements['C'])
     # compute the impedance response as a complex array
     Z_complex = resistance/(1+resistance*capacitance*(angular_freq*1j))
     return Z_complex
@@ -79,23 +204,25 @@ def cir_RC_series(angular_freq, **circuit_elements):
 
     **circuit_elements : dictionary or keyword arguments
 
-        resistance : single value (int or float)
+        resistance : single value or array-like (int or float)
                      Solution resistance [ohm]
-        capacitance : single value (int or float)
+        capacitance : single value or array-like (int or float)
                       Capacitance of an electrode surface [F]
 
     Returns
     ---------
     Z_complex : array-like
-                impedance response of the circuit under investigation [ohm]
+                impedance response of the circuit under investigation [ohm].
+                The shape is (F,) for single element values and (N, F) when
+                N sets of circuit elements are given
     '''
     # circuit_string = '-RC-'
 
     if len(circuit_elements) != 2:
         raise AssertionError('The wrong number of circuit elements was'
                              'inputted')
-    resistance = circuit_elements['R']
-    capacitance = circuit_elements['C']
+    resistance = _element_column(circuit_elements['R'])
+    capacitance = _element_column(circuit_elements['C'])
     # compute the impedance response as a complex array
     Z_complex = resistance + 1/(capacitance*(angular_freq*1j))
     return Z_complex
@@ -114,30 +241,32 @@ def cir_RQ_parallel(angular_freq, **circuit_elements):
 
    **circuit_elements : dictionary or keyword arguments
 
-        resistance : single value (int or float)
+        resistance : single value or array-like (int or float)
                        Solution resistance [Ohm]
-        constant_phase_element : single value (int or float)
+        constant_phase_element : single value or array-like (int or float)
                                  Constant phase angle [s^(alpha-1)/ohm]
-        alpha : single value -float
+        alpha : single value or array-like (float)
                 Exponent of the constant phase element. Should be a value
                 between 0 and 1 [-]
 
     Returns
     ---------
     Z_complex : array-like
-                impedance response of the circuit under investigation [Ohm]
+                impedance response of the circuit under investigation [Ohm].
+                The shape is (F,) for single element values and (N, F) when
+                N sets of circuit elements are given
     '''
     # circuit_string = '-(RQ)-'
     if len(circuit_elements) != 3:
         raise AssertionError('The wrong number of circuit elements was'
                              'inputted')
-    resistance = circuit_elements['R']
-    constant_phase_element = circuit_elements['Q']
-    alpha = circuit_elements['alpha']
+    resistance = _element_column(circuit_elements['R'])
+    constant_phase_element = _element_column(circuit_elements['Q'])
+    alpha = _element_column(circuit_elements['alpha'])
 
     # compute the impedance response as a complex array
-    Z_complex = resistance/(1+resistance*constant_phase_element*(
-                 angular_freq*1j)**alpha)
+    Z_complex = resistance/(1+resistance*constant_phase_element *
+                            _jw_alpha(angular_freq, alpha))
     return Z_complex
 
 
@@ -156,30 +285,32 @@ def cir_RQ_series(angular_freq, **circuit_elements):
 
     **circuit_elements : dictionary or keyword arguments
 
-        resistance : single value (int or float)
+        resistance : single value or array-like (int or float)
                      Solution resistance [ohm]
-        constant_phase_element : single value (int or float)
+        constant_phase_element : single value or array-like (int or float)
                                  Constant phase angle [s^(alpha-1)/ohm]
-        alpha : single value -float
+        alpha : single value or array-like (float)
                 Exponent of the constant phase element. Should be a value
                 between 0 and 1 [-]
 
     Returns
     ---------
     Z_complex : array-like
-                impedance response of the circuit under investigation [Oom]
+                impedance response of the circuit under investigation [Ohm].
+                The shape is (F,) for single element values and (N, F) when
+                N sets of circuit elements are given
     '''
     # circuit_string = '-R-Q-'
 
     if len(circuit_elements) != 3:
         raise AssertionError('The wrong number of circuit elements was'
                              'inputted')
-    resistance = circuit_elements['R']
-    constant_phase_element = circuit_elements['Q']
-    alpha = circuit_elements['alpha']
+    resistance = _element_column(circuit_elements['R'])
+    constant_phase_element = _element_column(circuit_elements['Q'])
+    alpha = _element_column(circuit_elements['alpha'])
     # compute the impedance response as a complex array
-    Z_complex = resistance + 1/(constant_phase_element*(
-                                angular_freq*1j)**alpha)
+    Z_complex = resistance + 1/(constant_phase_element *
+                                _jw_alpha(angular_freq, alpha))
     return Z_complex
 
 
@@ -196,27 +327,29 @@ def cir_RsRC(angular_freq, **circuit_elements):
 
     **circuit_elements : dictionary or keyword arguments
 
-        solution_resistance : single value (int or float)
+        solution_resistance : single value or array-like (int or float)
                               Solution resistance [ohm]
-        parallel_resistance : single value (int or float)
+        parallel_resistance : single value or array-like (int or float)
                               resistance of the element in parallel with
                               the capacitor [ohm]
-        capacitance : single value (int or float)
+        capacitance : single value or array-like (int or float)
                       Capacitance of an electrode surface [F]
 
     Returns
     ---------
     Z_complex : array-like
-                impedance response of the circuit under investigation [Ohm]
+                impedance response of the circuit under investigation [Ohm].
+                The shape is (F,) for single element values and (N, F) when
+                N sets of circuit elements are given
     '''
     # circuit_string = '-Rs-(RC)-'
 
     if len(circuit_elements) != 3:
         raise AssertionError('The wrong number of circuit elements was'
                              'inputted')
-    solution_resistance = circuit_elements['Rs']
-    parallel_resistance = circuit_elements['Rp']
-    capacitance = circuit_elements['C']
+    solution_resistance = _element_column(circuit_elements['Rs'])
+    parallel_resistance = _element_column(circuit_elements['Rp'])
+    capacitance = _element_column(circuit_elements['C'])
 
     # compute the impedance response as a complex array
     Z_parallel = parallel_resistance/(1 + parallel_resistance *
@@ -239,36 +372,38 @@ def cir_RsRQ(angular_freq, **circuit_elements):
 
     **circuit_elements : dictionary or keyword arguments
 
-        solution_resistance : single value (int or float)
+        solution_resistance : single value or array-like (int or float)
                               Solution resistance [ohm]
-        parallel_resistance : single value (int or float)
+        parallel_resistance : single value or array-like (int or float)
                               resistance of the element in parallel with
                               the capacitor [ohm]
-        constant_phase_element : single value (int or float)
+        constant_phase_element : single value or array-like (int or float)
                                  Constant phase angle [s^(alpha-1)/ohm]
-        alpha : single value -float
+        alpha : single value or array-like (float)
                 Exponent of the constant phase element. Should be a value
                 between 0 and 1 [-]
 
     Returns
     ---------
     Z_complex : array-like
-                impedance response of the circuit under investigation [Ohm]
+                impedance response of the circuit under investigation [Ohm].
+                The shape is (F,) for single element values and (N, F) when
+                N sets of circuit elements are given
     '''
     # circuit_string = '-Rs-(RC)-'
 
     if len(circuit_elements) != 4:
         raise AssertionError('The wrong number of circuit elements was'
                              'inputted')
-    solution_resistance = circuit_elements['Rs']
-    parallel_resistance = circuit_elements['Rp']
-    constant_phase_element = circuit_elements['Q']
-    alpha = circuit_elements['alpha']
+    solution_resistance = _element_column(circuit_elements['Rs'])
+    parallel_resistance = _element_column(circuit_elements['Rp'])
+    constant_phase_element = _element_column(circuit_elements['Q'])
+    alpha = _element_column(circuit_elements['alpha'])
 
     # compute the impedance response as a complex array
     Z_parallel = parallel_resistance/(1 + parallel_resistance *
-                                      constant_phase_element*(
-                                        angular_freq*1j)**alpha)
+                                      constant_phase_element *
+                                      _jw_alpha(angular_freq, alpha))
     Z_complex = solution_resistance + Z_parallel
     return Z_complex
 
@@ -288,50 +423,52 @@ def cir_RsRQRQ(angular_freq, **circuit_elements):
 
    **circuit_elements : dictionary or keyword arguments
 
-        solution_resistance : single value (int or float)
+        solution_resistance : single value or array-like (int or float)
                               Solution resistance [ohm]
-        parallel_resistance_1 : single value (int or float)
+        parallel_resistance_1 : single value or array-like (int or float)
                                 first combination of resistor in parallel with
                                 constant phase element [ohm]
-        constant_phase_element_1 : single value (int or float)
+        constant_phase_element_1 : single value or array-like (int or float)
                                    First constant phas angle [s^(alpha-1)/ohm]
-        alpha_1 : single value -float
+        alpha_1 : single value or array-like (float)
                   Exponent of the first constant phase element.
                   Should be a value between 0 and 1 [-]
-        parallel_resistance_2 : single value (int or float)
+        parallel_resistance_2 : single value or array-like (int or float)
                                 Second combination of resistor in parallel with
                                 constant phase element [ohm]
-        constant_phase_element_2 : single value (int or float)
+        constant_phase_element_2 : single value or array-like (int or float)
                                   Second Constant phase angle [s^(alpha-1)/ohm]
-        alpha_2 : single value -float
+        alpha_2 : single value or array-like (float)
                   Exponent of the second constant phase element.
                   Should be a value between 0 and 1 [-]
 
     Returns
     ---------
     Z_complex : array-like
-                impedance response of the circuit under investigation [Ohm]
+                impedance response of the circuit under investigation [Ohm].
+                The shape is (F,) for single element values and (N, F) when
+                N sets of circuit elements are given
     '''
     # circuit_string = '-Rs-(RQ)-(RQ)-'
 
     if len(circuit_elements) != 7:
         raise AssertionError('The wrong number of circuit elements was'
                              'inputted')
-    solution_resistance = circuit_elements['Rs']
-    parallel_resistance_1 = circuit_elements['Rp1']
-    constant_phase_element_1 = circuit_elements['Q1']
-    alpha_1 = circuit_elements['alpha1']
-    parallel_resistance_2 = circuit_elements['Rp2']
-    constant_phase_element_2 = circuit_elements['Q2']
-    alpha_2 = circuit_elements['alpha2']
+    solution_resistance = _element_column(circuit_elements['Rs'])
+    parallel_resistance_1 = _element_column(circuit_elements['Rp1'])
+    constant_phase_element_1 = _element_column(circuit_elements['Q1'])
+    alpha_1 = _element_column(circuit_elements['alpha1'])
+    parallel_resistance_2 = _element_column(circuit_elements['Rp2'])
+    constant_phase_element_2 = _element_column(circuit_elements['Q2'])
+    alpha_2 = _element_column(circuit_elements['alpha2'])
 
     # compute the impedance response as a complex array
     Z_parallel_1 = (parallel_resistance_1 /
                     (1+parallel_resistance_1*constant_phase_element_1
-                     * (angular_freq*1j)**alpha_1))
+                     * _jw_alpha(angular_freq, alpha_1)))
     Z_parallel_2 = (parallel_resistance_2 /
                     (1+parallel_resistance_2*constant_phase_element_2
-                     * (angular_freq*1j)**alpha_2))
+                     * _jw_alpha(angular_freq, alpha_2)))
     Z_complex = solution_resistance + Z_parallel_1 + Z_parallel_2
 
     return Z_complex
@@ -351,36 +488,38 @@ def cir_RsRCRC(angular_freq, **circuit_elements):
 
     **circuit_elements : dictionary or keyword arguments
 
-        solution_resistance : single value (int or float)
+        solution_resistance : single value or array-like (int or float)
                               Solution resistance [ohm]
-        parallel_resistance_1 : single value (int or float)
+        parallel_resistance_1 : single value or array-like (int or float)
                                 first combination of resistor in parallel with
                                 capacitor [ohm]
-        capacitance_1 : single value (int or float)
+        capacitance_1 : single value or array-like (int or float)
                         Capacitance of an electrode surface whichi is part of
                          the first combination of RC in parallel [F]
-        parallel_resistance_2 : single value (int or float)
+        parallel_resistance_2 : single value or array-like (int or float)
                                 second combination of resistor in parallel with
                                 capacitor [ohm]
-        capacitance_2 : single value (int or float)
+        capacitance_2 : single value or array-like (int or float)
                         Capacitance of an electrode surface whichi is part of
                         the second combination of RC in parallel [F]
 
     Returns
     ---------
     Z_complex : array-like
-                impedance response of the circuit under investigation [Ohm]
+                impedance response of the circuit under investigation [Ohm].
+                The shape is (F,) for single element values and (N, F) when
+                N sets of circuit elements are given
     '''
     # circuit_string = '-Rs-(RC)-(RC)-'
 
     if len(circuit_elements) != 5:
         raise AssertionError('The wrong number of circuit elements was'
                              'inputted')
-    solution_resistance = circuit_elements['Rs']
-    parallel_resistance_1 = circuit_elements['Rp1']
-    capacitance_1 = circuit_elements['C1']
-    parallel_resistance_2 = circuit_elements['Rp2']
-    capacitance_2 = circuit_elements['C2']
+    solution_resistance = _element_column(circuit_elements['Rs'])
+    parallel_resistance_1 = _element_column(circuit_elements['Rp1'])
+    capacitance_1 = _element_column(circuit_elements['C1'])
+    parallel_resistance_2 = _element_column(circuit_elements['Rp2'])
+    capacitance_2 = _element_column(circuit_elements['C2'])
 
     # compute the impedance response as a complex array
     Z_parallel_1 = (parallel_resistance_1/(1 + parallel_resistance_1 *
@@ -406,38 +545,333 @@ def cir_Randles_simplified(angular_freq, **circuit_elements):
 
     **circuit_elements : dictionary or keyword arguments
 
-        solution_resistance : single value (int or float)
+        solution_resistance : single value or array-like (int or float)
                               Solution resistance [ohm]
-        parallel_resistance : single value (int or float)
+        parallel_resistance : single value or array-like (int or float)
                               resistance of the element in parallel with
                               the capacitor [ohm]
-        constant_phase_element : single value (int or float)
+        constant_phase_element : single value or array-like (int or float)
                                    Constant phase angle [s^(alpha-1)/ohm]
-        alpha : single value (float)
+        alpha : single value or array-like (float)
                   Exponent of the constant phase element.
                   Should be a value between 0 and 1 [-]
-        sigma: single value (float)
+        sigma: single value or array-like (float)
 
     Returns
     ---------
     Z_complex : array-like
-                impedance response of the circuit under investigation [Ohm]
+                impedance response of the circuit under investigation [Ohm].
+                The shape is (F,) for single element values and (N, F) when
+                N sets of circuit elements are given
     '''
     # circuit_string = '-Rs-(Q-(RW))-'
 
     if len(circuit_elements) != 5:
         raise AssertionError('The wrong number of circuit elements was'
                              'inputted')
-    solution_resistance = circuit_elements['Rs']
-    parallel_resistance = circuit_elements['Rp']
-    constant_phase_element = circuit_elements['Q']
-    alpha = circuit_elements['alpha']
-    sigma = circuit_elements['sigma']
+    solution_resistance = _element_column(circuit_elements['Rs'])
+    parallel_resistance = _element_column(circuit_elements['Rp'])
+    constant_phase_element = _element_column(circuit_elements['Q'])
+    alpha = _element_column(circuit_elements['alpha'])
+    sigma = _element_column(circuit_elements['sigma'])
 
     # compute the impedance response as a complex array
-    Z_Q = 1/(constant_phase_element*(angular_freq*1j)**alpha)
+    Z_Q = 1/(constant_phase_element*_jw_alpha(angular_freq, alpha))
     Z_R = parallel_resistance
     Z_w = sigma*(angular_freq**(-0.5))-1j*sigma*(angular_freq**(-0.5))
     Z_complex = solution_resistance + 1/(1/Z_Q + 1/(Z_R+Z_w))
 
     return Z_complex
+
+
+def _broadcast_jacobian(jacobian, circuit_elements):
+    '''
+    Function that broadcasts the derivatives of the impedance response to the
+    common (F,) or (N, F) shape of the impedance response.
+    '''
+    shape = np.broadcast_shapes(*[np.shape(value)
+                                  for value in jacobian.values()],
+                                *[np.shape(_element_column(value))
+                                  for value in circuit_elements.values()])
+    return {name: np.broadcast_to(value, shape)
+            for name, value in jacobian.items()}
+
+
+def _RC_derivatives(angular_freq, resistance, capacitance):
+    '''
+    Function that returns the derivatives of the impedance of a resistor in
+    parallel with a capacitor, R/(1+jwRC), with respect to R and C.
+    '''
+    denominator = (1 + resistance*capacitance*(angular_freq*1j))**2
+    dZ_dR = 1/denominator
+    dZ_dC = -resistance**2*(angular_freq*1j)/denominator
+    return dZ_dR, dZ_dC
+
+
+def _RQ_derivatives(angular_freq, resistance, constant_phase_element, alpha):
+    '''
+    Function that returns the derivatives of the impedance of a resistor in
+    parallel with a constant phase element, R/(1+RQ(jw)^alpha), with respect
+    to R, Q and alpha.
+    '''
+    jw_alpha = _jw_alpha(angular_freq, alpha)
+    denominator = (1 + resistance*constant_phase_element*jw_alpha)**2
+    dZ_dR = 1/denominator
+    dZ_dQ = -resistance**2*jw_alpha/denominator
+    dZ_dalpha = dZ_dQ*constant_phase_element*np.log(angular_freq*1j)
+    return dZ_dR, dZ_dQ, dZ_dalpha
+
+
+def jac_RC_parallel(angular_freq, **circuit_elements):
+    '''
+    Function that returns the analytic derivatives of the impedance response
+    of cir_RC_parallel with respect to each circuit element.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   Angular frequency [1/s]
+    **circuit_elements : dictionary or keyword arguments
+                         R and C, as in cir_RC_parallel
+
+    Returns
+    ---------
+    jacobian : dictionary
+               derivative of the complex impedance with respect to each
+               circuit element, with the same shape as the impedance response
+    '''
+    resistance = _element_column(circuit_elements['R'])
+    capacitance = _element_column(circuit_elements['C'])
+    dZ_dR, dZ_dC = _RC_derivatives(angular_freq, resistance, capacitance)
+    return _broadcast_jacobian({'R': dZ_dR, 'C': dZ_dC}, circuit_elements)
+
+
+def jac_RC_series(angular_freq, **circuit_elements):
+    '''
+    Function that returns the analytic derivatives of the impedance response
+    of cir_RC_series with respect to each circuit element.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   Angular frequency [1/s]
+    **circuit_elements : dictionary or keyword arguments
+                         R and C, as in cir_RC_series
+
+    Returns
+    ---------
+    jacobian : dictionary
+               derivative of the complex impedance with respect to each
+               circuit element, with the same shape as the impedance response
+    '''
+    capacitance = _element_column(circuit_elements['C'])
+    dZ_dC = -1/(capacitance**2*(angular_freq*1j))
+    return _broadcast_jacobian({'R': 1.0, 'C': dZ_dC}, circuit_elements)
+
+
+def jac_RQ_parallel(angular_freq, **circuit_elements):
+    '''
+    Function that returns the analytic derivatives of the impedance response
+    of cir_RQ_parallel with respect to each circuit element.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   Angular frequency [1/s]
+    **circuit_elements : dictionary or keyword arguments
+                         R, Q and alpha, as in cir_RQ_parallel
+
+    Returns
+    ---------
+    jacobian : dictionary
+               derivative of the complex impedance with respect to each
+               circuit element, with the same shape as the impedance response
+    '''
+    resistance = _element_column(circuit_elements['R'])
+    constant_phase_element = _element_column(circuit_elements['Q'])
+    alpha = _element_column(circuit_elements['alpha'])
+    dZ_dR, dZ_dQ, dZ_dalpha = _RQ_derivatives(angular_freq, resistance,
+                                              constant_phase_element, alpha)
+    return _broadcast_jacobian({'R': dZ_dR, 'Q': dZ_dQ, 'alpha': dZ_dalpha},
+                               circuit_elements)
+
+
+def jac_RQ_series(angular_freq, **circuit_elements):
+    '''
+    Function that returns the analytic derivatives of the impedance response
+    of cir_RQ_series with respect to each circuit element.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   Angular frequency [1/s]
+    **circuit_elements : dictionary or keyword arguments
+                         R, Q and alpha, as in cir_RQ_series
+
+    Returns
+    ---------
+    jacobian : dictionary
+               derivative of the complex impedance with respect to each
+               circuit element, with the same shape as the impedance response
+    '''
+    constant_phase_element = _element_column(circuit_elements['Q'])
+    alpha = _element_column(circuit_elements['alpha'])
+    Z_Q = 1/(constant_phase_element*_jw_alpha(angular_freq, alpha))
+    dZ_dQ = -Z_Q/constant_phase_element
+    dZ_dalpha = -Z_Q*np.log(angular_freq*1j)
+    return _broadcast_jacobian({'R': 1.0, 'Q': dZ_dQ, 'alpha': dZ_dalpha},
+                               circuit_elements)
+
+
+def jac_RsRC(angular_freq, **circuit_elements):
+    '''
+    Function that returns the analytic derivatives of the impedance response
+    of cir_RsRC with respect to each circuit element.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   Angular frequency [1/s]
+    **circuit_elements : dictionary or keyword arguments
+                         Rs, Rp and C, as in cir_RsRC
+
+    Returns
+    ---------
+    jacobian : dictionary
+               derivative of the complex impedance with respect to each
+               circuit element, with the same shape as the impedance response
+    '''
+    parallel_resistance = _element_column(circuit_elements['Rp'])
+    capacitance = _element_column(circuit_elements['C'])
+    dZ_dRp, dZ_dC = _RC_derivatives(angular_freq, parallel_resistance,
+                                    capacitance)
+    return _broadcast_jacobian({'Rs': 1.0, 'Rp': dZ_dRp, 'C': dZ_dC},
+                               circuit_elements)
+
+
+def jac_RsRQ(angular_freq, **circuit_elements):
+    '''
+    Function that returns the analytic derivatives of the impedance response
+    of cir_RsRQ with respect to each circuit element.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   Angular frequency [1/s]
+    **circuit_elements : dictionary or keyword arguments
+                         Rs, Rp, Q and alpha, as in cir_RsRQ
+
+    Returns
+    ---------
+    jacobian : dictionary
+               derivative of the complex impedance with respect to each
+               circuit element, with the same shape as the impedance response
+    '''
+    parallel_resistance = _element_column(circuit_elements['Rp'])
+    constant_phase_element = _element_column(circuit_elements['Q'])
+    alpha = _element_column(circuit_elements['alpha'])
+    dZ_dRp, dZ_dQ, dZ_dalpha = _RQ_derivatives(angular_freq,
+                                               parallel_resistance,
+                                               constant_phase_element, alpha)
+    return _broadcast_jacobian({'Rs': 1.0, 'Rp': dZ_dRp, 'Q': dZ_dQ,
+                                'alpha': dZ_dalpha}, circuit_elements)
+
+
+def jac_RsRQRQ(angular_freq, **circuit_elements):
+    '''
+    Function that returns the analytic derivatives of the impedance response
+    of cir_RsRQRQ with respect to each circuit element.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   Angular frequency [1/s]
+    **circuit_elements : dictionary or keyword arguments
+                         Rs, Rp1, Q1, alpha1, Rp2, Q2 and alpha2, as in
+                         cir_RsRQRQ
+
+    Returns
+    ---------
+    jacobian : dictionary
+               derivative of the complex impedance with respect to each
+               circuit element, with the same shape as the impedance response
+    '''
+    jacobian = {}
+    for i in ('1', '2'):
+        dZ_dRp, dZ_dQ, dZ_dalpha = _RQ_derivatives(
+            angular_freq, _element_column(circuit_elements['Rp' + i]),
+            _element_column(circuit_elements['Q' + i]),
+            _element_column(circuit_elements['alpha' + i]))
+        jacobian['Rp' + i] = dZ_dRp
+        jacobian['Q' + i] = dZ_dQ
+        jacobian['alpha' + i] = dZ_dalpha
+    jacobian['Rs'] = 1.0
+    return _broadcast_jacobian(jacobian, circuit_elements)
+
+
+def jac_RsRCRC(angular_freq, **circuit_elements):
+    '''
+    Function that returns the analytic derivatives of the impedance response
+    of cir_RsRCRC with respect to each circuit element.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   Angular frequency [1/s]
+    **circuit_elements : dictionary or keyword arguments
+                         Rs, Rp1, C1, Rp2 and C2, as in cir_RsRCRC
+
+    Returns
+    ---------
+    jacobian : dictionary
+               derivative of the complex impedance with respect to each
+               circuit element, with the same shape as the impedance response
+    '''
+    jacobian = {}
+    for i in ('1', '2'):
+        dZ_dRp, dZ_dC = _RC_derivatives(
+            angular_freq, _element_column(circuit_elements['Rp' + i]),
+            _element_column(circuit_elements['C' + i]))
+        jacobian['Rp' + i] = dZ_dRp
+        jacobian['C' + i] = dZ_dC
+    jacobian['Rs'] = 1.0
+    return _broadcast_jacobian(jacobian, circuit_elements)
+
+
+def jac_Randles_simplified(angular_freq, **circuit_elements):
+    '''
+    Function that returns the analytic derivatives of the impedance response
+    of cir_Randles_simplified with respect to each circuit element.
+
+    Parameters
+    ----------
+    angular_freq : array-like
+                   Angular frequency [1/s]
+    **circuit_elements : dictionary or keyword arguments
+                         Rs, Rp, Q, alpha and sigma, as in
+                         cir_Randles_simplified
+
+    Returns
+    ---------
+    jacobian : dictionary
+               derivative of the complex impedance with respect to each
+               circuit element, with the same shape as the impedance response
+    '''
+    parallel_resistance = _element_column(circuit_elements['Rp'])
+    constant_phase_element = _element_column(circuit_elements['Q'])
+    alpha = _element_column(circuit_elements['alpha'])
+    sigma = _element_column(circuit_elements['sigma'])
+
+    # Z = Rs + 1/Y, with the admittance Y = Q(jw)^alpha + 1/(Rp + Z_w)
+    jw_alpha = _jw_alpha(angular_freq, alpha)
+    warburg = (1 - 1j)*angular_freq**(-0.5)
+    faradaic = parallel_resistance + sigma*warburg
+    admittance = constant_phase_element*jw_alpha + 1/faradaic
+    dZ_dY = -1/admittance**2
+    dZ_dRp = dZ_dY*(-1/faradaic**2)
+    dZ_dQ = dZ_dY*jw_alpha
+    dZ_dalpha = dZ_dQ*constant_phase_element*np.log(angular_freq*1j)
+    dZ_dsigma = dZ_dRp*warburg
+    return _broadcast_jacobian({'Rs': 1.0, 'Rp': dZ_dRp, 'Q': dZ_dQ,
+                                'alpha': dZ_dalpha, 'sigma': dZ_dsigma},
+                               circuit_elements)
@@ -0,0 +1,228 @@
+import math
+import os
+import warnings
+
+import numpy as np
+
+from .circuits import CIRCUIT_ELEMENTS
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# The backend used by data_simulation.batch_simulation can be selected with
+# the EISY_CIRCUIT_BACKEND environment variable ('numpy' or 'numba') or with
+# set_backend. The NumPy backend is used whenever Numba is not installed.
+BACKENDS = ('numpy', 'numba')
+_backend = os.environ.get('EISY_CIRCUIT_BACKEND', 'numpy').lower()
+
+if numba is not None:
+    prange = numba.prange
+else:
+    prange = range
+
+
+def _jit(kernel):
+    '''
+    Function that compiles a kernel with Numba, parallelizing the loop over
+    the parameter sets. Without Numba the kernel is returned as plain Python.
+    '''
+    if numba is None:
+        return kernel
+    return numba.njit(parallel=True, cache=True)(kernel)
+
+
+def available():
+    '''
+    Function that returns True if Numba is installed.
+    '''
+    return numba is not None
+
+
+def set_backend(backend):
+    '''
+    Function that selects the backend used to evaluate batches of circuits.
+
+    Parameters
+    ----------
+    backend : str
+              either 'numpy' or 'numba'
+    '''
+    global _backend
+    backend = backend.lower()
+    if backend not in BACKENDS:
+        raise AssertionError('The backend should be one of {}'.format(
+                             ', '.join(BACKENDS)))
+    _backend = backend
+
+
+def get_backend(backend=None):
+    '''
+    Function that returns the backend to be used to evaluate batches of
+    circuits. If the Numba backend is requested but Numba is not installed,
+    the NumPy backend is returned instead.
+
+    Parameters
+    ----------
+    backend : str
+              the requested backend. If None, the backend selected with
+              set_backend or the EISY_CIRCUIT_BACKEND environment variable
+              is used.
+    '''
+    backend = (backend or _backend).lower()
+    if backend not in BACKENDS:
+        raise AssertionError('The backend should be one of {}'.format(
+                             ', '.join(BACKENDS)))
+    if backend == 'numba' and numba is None:
+        warnings.warn('Numba is not installed, the numpy backend is used to '
+                      'evaluate the circuits.')
+        return 'numpy'
+    return backend
+
+
+# Each kernel fills out[n, f] with the impedance of the n-th set of circuit
+# elements (params[n, :], ordered as in circuits.CIRCUIT_ELEMENTS) at the
+# angular frequency angular_freq[f], in a single pass without temporaries.
+# The CPE term (jw)^alpha is computed as w^alpha*(cos(alpha*pi/2) +
+# j*sin(alpha*pi/2)), with the trigonometric part evaluated once per set.
+
+@_jit
+def _RC_parallel(angular_freq, params, out):
+    for n in prange(params.shape[0]):
+        R, C = params[n, 0], params[n, 1]
+        for f in range(angular_freq.shape[0]):
+            out[n, f] = R/complex(1.0, R*C*angular_freq[f])
+
+
+@_jit
+def _RC_series(angular_freq, params, out):
+    for n in prange(params.shape[0]):
+        R, C = params[n, 0], params[n, 1]
+        for f in range(angular_freq.shape[0]):
+            out[n, f] = complex(R, -1.0/(C*angular_freq[f]))
+
+
+@_jit
+def _RQ_parallel(angular_freq, params, out):
+    for n in prange(params.shape[0]):
+        R, Q, alpha = params[n, 0], params[n, 1], params[n, 2]
+        cpe = complex(math.cos(alpha*math.pi/2), math.sin(alpha*math.pi/2))
+        for f in range(angular_freq.shape[0]):
+            out[n, f] = R/(1.0 + R*Q*angular_freq[f]**alpha*cpe)
+
+
+@_jit
+def _RQ_series(angular_freq, params, out):
+    for n in prange(params.shape[0]):
+        R, Q, alpha = params[n, 0], params[n, 1], params[n, 2]
+        cpe = complex(math.cos(alpha*math.pi/2), math.sin(alpha*math.pi/2))
+        for f in range(angular_freq.shape[0]):
+            out[n, f] = R + 1.0/(Q*angular_freq[f]**alpha*cpe)
+
+
+@_jit
+def _RsRC(angular_freq, params, out):
+    for n in prange(params.shape[0]):
+        Rs, Rp, C = params[n, 0], params[n, 1], params[n, 2]
+        for f in range(angular_freq.shape[0]):
+            out[n, f] = Rs + Rp/complex(1.0, Rp*C*angular_freq[f])
+
+
+@_jit
+def _RsRQ(angular_freq, params, out):
+    for n in prange(params.shape[0]):
+        Rs, Rp, Q, alpha = params[n, 0], params[n, 1], params[n, 2], \
+            params[n, 3]
+        cpe = complex(math.cos(alpha*math.pi/2), math.sin(alpha*math.pi/2))
+        for f in range(angular_freq.shape[0]):
+            out[n, f] = Rs + Rp/(1.0 + Rp*Q*angular_freq[f]**alpha*cpe)
+
+
+@_jit
+def _RsRQRQ(angular_freq, params, out):
+    for n in prange(params.shape[0]):
+        Rs = params[n, 0]
+        Rp1, Q1, alpha1 = params[n, 1], params[n, 2], params[n, 3]
+        Rp2, Q2, alpha2 = params[n, 4], params[n, 5], params[n, 6]
+        cpe1 = complex(math.cos(alpha1*math.pi/2),
+                       math.sin(alpha1*math.pi/2))
+        cpe2 = complex(math.cos(alpha2*math.pi/2),
+                       math.sin(alpha2*math.pi/2))
+        for f in range(angular_freq.shape[0]):
+            w = angular_freq[f]
+            out[n, f] = (Rs + Rp1/(1.0 + Rp1*Q1*w**alpha1*cpe1) +
+                         Rp2/(1.0 + Rp2*Q2*w**alpha2*cpe2))
+
+
+@_jit
+def _RsRCRC(angular_freq, params, out):
+    for n in prange(params.shape[0]):
+        Rs = params[n, 0]
+        Rp1, C1, Rp2, C2 = params[n, 1], params[n, 2], params[n, 3], \
+            params[n, 4]
+        for f in range(angular_freq.shape[0]):
+            w = angular_freq[f]
+            out[n, f] = (Rs + Rp1/complex(1.0, Rp1*C1*w) +
+                         Rp2/complex(1.0, Rp2*C2*w))
+
+
+@_jit
+def _Randles_simplified(angular_freq, params, out):
+    for n in prange(params.shape[0]):
+        Rs, Rp, Q, alpha, sigma = params[n, 0], params[n, 1], params[n, 2], \
+            params[n, 3], params[n, 4]
+        cpe = complex(math.cos(alpha*math.pi/2), math.sin(alpha*math.pi/2))
+        for f in range(angular_freq.shape[0]):
+            w = angular_freq[f]
+            warburg = sigma/math.sqrt(w)
+            faradaic = complex(Rp + warburg, -warburg)
+            out[n, f] = Rs + 1.0/(Q*w**alpha*cpe + 1.0/faradaic)
+
+
+KERNELS = {'RC_parallel': _RC_parallel, 'RC_series': _RC_series,
+           'RQ_parallel': _RQ_parallel, 'RQ_series': _RQ_series,
+           'RsRC': _RsRC, 'RsRQ': _RsRQ, 'RsRQRQ': _RsRQRQ,
+           'RsRCRC': _RsRCRC, 'Randles_simplified': _Randles_simplified}
+
+
+def evaluate(circuit_name, angular_freq, **circuit_elements):
+    '''
+    Function that evaluates the impedance response of N sets of circuit
+    elements with the fused kernel of the indicated circuit.
+
+    Parameters
+    ----------
+    circucit_name: str
+                   name of the circuit function in the circuits module,
+                   without the 'cir_' prefix.
+    angular_freq : array-like
+                   Angular frequency [1/s]
+    circuit_elements : dictionary or keyword arguments
+                       the circuit elements composing the called circuit.
+                       Each value can be a single number or an array of N
+                       values.
+
+    Returns
+    ----------
+    Z_complex : numpy.ndarray
+                (N, F) matrix containing the complex impedance of each set
+                of circuit elements [ohm]
+    '''
+    if circuit_name not in KERNELS:
+        raise AssertionError('No kernel is available for the circuit '
+                             '{}'.format(circuit_name))
+    names = CIRCUIT_ELEMENTS[circuit_name]
+    if set(circuit_elements) != set(names):
+        raise AssertionError('The circuit {} requires the elements {}'.format(
+                             circuit_name, ', '.join(names)))
+    values = np.broadcast_arrays(*[np.asarray(circuit_elements[name],
+                                              dtype=np.float64)
+                                   for name in names])
+    params = np.ascontiguousarray(np.column_stack([np.atleast_1d(value)
+                                                   for value in values]))
+    angular_freq = np.ascontiguousarray(angular_freq, dtype=np.float64)
+    Z_complex = np.empty((params.shape[0], angular_freq.shape[0]),
+                         dtype=np.complex128)
+    KERNELS[circuit_name](angular_freq, params, Z_complex)
+    return Z_complex
@@ -2,11 +2,14 @@ import numpy as np
 import pandas as pd
 
 from . import circuits
+from . import circuits_jit
 from . import alterations
+from . import precision
+from .circuit_registry import get_circuit
 
 
 def to_dataframe(freq_range, impedance_array, alteration=None,
-                 noise_amplitude=None, **kwargs):
+                 noise_amplitude=None, dtype=None, **kwargs):
     """ Function returning a df with impedance and frequency data
 
     Function that creates a dataframe containing impedance data and the
@@ -32,6 +35,9 @@ def to_dataframe(freq_range, impedance_array, alteration=None,
     noise_amplitude : float
                  Scale of the noise added to the data. This number should be
                  contained betweed 0 and 1.
+    dtype : str or numpy.dtype
+            precision of the columns, 'float64' or 'float32'. If None, the
+            precision selected in the precision module is used.
 
     Returns
     ----------
@@ -50,17 +56,22 @@ def to_dataframe(freq_range, impedance_array, alteration=None,
 and the impedance respons do not match in length. '
     assert len(impedance_array) == 5, 'the impedance array inputted is not\
 the right dimensions. The number of columns exceed the expected value (5)'
-    assert isinstance(impedance_array[0][1], complex), 'the first column of\
+    assert np.iscomplexobj(impedance_array[0]), 'the first column of\
 the impedance response should be populated by complex numberes'
+    real = precision.real_dtype(dtype)
+    complex_dtype = precision.complex_dtype(dtype)
     # Create a dictionary containng the keys and values of data to be
     # converted ina pandas dataframe. The 'keys' will be used as column names.
-    impedance_dict = {'freq [Hz]': freq_range[0],
-                      'angular_freq [1/s]': freq_range[1],
-                      'complex_Z [ohm]': impedance_array[0],
-                      'Re_Z [ohm]': impedance_array[1],
-                      'Im_Z [ohm]': impedance_array[2],
-                      '|Z| [ohm]': impedance_array[3],
-                      'phase_angle [rad]': impedance_array[4]
+    impedance_dict = {'freq [Hz]': np.asarray(freq_range[0], dtype=real),
+                      'angular_freq [1/s]': np.asarray(freq_range[1],
+                                                       dtype=real),
+                      'complex_Z [ohm]': np.asarray(impedance_array[0],
+                                                    dtype=complex_dtype),
+                      'Re_Z [ohm]': np.asarray(impedance_array[1], dtype=real),
+                      'Im_Z [ohm]': np.asarray(impedance_array[2], dtype=real),
+                      '|Z| [ohm]': np.asarray(impedance_array[3], dtype=real),
+                      'phase_angle [rad]': np.asarray(impedance_array[4],
+                                                      dtype=real)
                       }
     if kwargs:
         for key, value in kwargs.items():
@@ -107,7 +118,7 @@ def impedance_array(complex_impedance):
 
 
 def circuit_simulation(freq_range, circuit_name, alteration=None,
-                       noise_amplitude=None, **circuit_elements):
+                       noise_amplitude=None, dtype=None, **circuit_elements):
     '''Function that returns a df containing simualated impedance data
 
     Function that takes imputs parameters to simulated the impedance response
@@ -126,7 +137,10 @@ def circuit_simulation(freq_range, circuit_name, alteration=None,
                 freq_range[1]- the angualr frequncy [1/s]
     circucit_name: str
                    A string containng the name of the circuit to be simulated.
-                   Refer to the circuits module for the list of accepted names.
+                   Refer to the circuit_registry module for the list of
+                   accepted names.
+                   Circuit strings such as '-Rs-(RQ)-(RQ)-' are also
+                   accepted, refer to the circuit_compiler module.
     alteration : str
                  string indicating if the data simulated has been modified to
                  add noise or other instrument artifacts. If present, this
@@ -135,6 +149,9 @@ def circuit_simulation(freq_range, circuit_name, alteration=None,
     noise_amplitude : float
                  Scale of the noise added to the data. This number should be
                  contained betweed 0 and 1.
+    dtype : str or numpy.dtype
+            precision of the simulation, 'float64' or 'float32'. If None,
+            the precision selected in the precision module is used.
     circuit_elements : dictionary or keyword arguments
                        input argument composed by the circuit elements
                        composing the called circuit. Refer to the circuits
@@ -148,47 +165,134 @@ def circuit_simulation(freq_range, circuit_name, alteration=None,
                            data.
     '''
 
-    circuit_function_name = 'cir_' + circuit_name
-    # make sure the correct number of inputs is given based on teh crcuit name
-    # provided
-    assert isinstance(circuit_name, str), 'the circuit name should be a string'
-
-    if circuit_name.split('_')[0] == 'RC':
-        assert len(circuit_elements) == 2, 'the number of circuit\
-elements should be 2'
-    if circuit_name.split('_')[0] == 'RQ':
-        assert len(circuit_elements) == 3, 'the number of circuit\
-elements should be 3'
-    if circuit_name == 'RsRC':
-        assert len(circuit_elements) == 3, 'the number of circuit\
-elements should be 3'
-    if circuit_name == 'RsRCRC':
-        assert len(circuit_elements) == 5, 'the number of circuit\
-elements should be 5'
-    if circuit_name == 'RsRQRQ':
-        assert len(circuit_elements) == 7, 'the number of circuit\
-elements should be 7'
-    if circuit_name == 'Randles':
-        assert len(circuit_elements) == 5, 'the number of circuit\
-elements should be 5'
-
-    circuit_function = getattr(circuits, circuit_function_name)
-
-    assert circuit_function != 0, 'The function could not be found in the\
-indicated module.'
-
-    complex_impedance = circuit_function(freq_range[1], **circuit_elements)
+    circuit_function = _circuit_function(circuit_name, circuit_elements)
+    real = precision.real_dtype(dtype)
+    circuit_elements = _cast_elements(circuit_elements, real)
 
+    angular_freq = np.asarray(freq_range[1], dtype=real)
+    if alteration != 'freq_noise':
+        complex_impedance = circuit_function(angular_freq, **circuit_elements)
+        impedance_data = impedance_array(complex_impedance)
+        return to_dataframe(freq_range, impedance_data, alteration=alteration,
+                            noise_amplitude=noise_amplitude, dtype=real)
+
+    # the clean and the noisy frequency ranges are evaluated in one call
+    f_noise, w_noise = alterations.frequency_noise(
+        np.asarray(freq_range[0], dtype=real), angular_freq, noise_amplitude)
+    complex_impedance, complex_impedance_noise = circuit_function(
+        np.stack([angular_freq, w_noise]), **circuit_elements)
     impedance_data = impedance_array(complex_impedance)
-    impedance_data_df = to_dataframe(freq_range, impedance_data,
-                                     alteration=alteration,
-                                     noise_amplitude=noise_amplitude)
-    if alteration == 'freq_noise':
-        complex_impedance_noise = circuit_function(
-                                impedance_data_df['angular_freq_noise [1/s]'],
-                                **circuit_elements)
-        impedance_data_df['Im_Z_noise [ohm]'] = \
-            complex_impedance_noise.to_numpy().imag
-        impedance_data_df['Re_Z_noise [ohm]'] = \
-            complex_impedance_noise.to_numpy().real
-    return impedance_data_df
+    return to_dataframe(freq_range, impedance_data, dtype=real,
+                        **{'freq_noise [Hz]': f_noise,
+                           'angular_freq_noise [1/s]': w_noise,
+                           'Re_Z_noise [ohm]': complex_impedance_noise.real,
+                           'Im_Z_noise [ohm]': complex_impedance_noise.imag})
+
+
+def batch_simulation(freq_range, circuit_name, backend=None, dtype=None,
+                     **circuit_elements):
+    '''Function that returns the impedance response of N circuits at once
+
+    Function that simulates the impedance response of N sets of circuit
+    elements over the indicated frequency range in one vectorized pass, instead
+    of calling circuit_simulation once per set. Each circuit element can be
+    given as a single value, shared by all the sets, or as an array of N
+    values.
+
+    Parameters
+    ----------
+    freq_range : array
+                an array containing the frequency and angular frequency values
+                used to determine the corresponding impedance response.
+                freq_range[0]- the frequency response [Hz]
+                freq_range[1]- the angualr frequncy [1/s]
+                The ID of a frequency range registered in the circuits
+                module (refer to circuits.freq_grid_id) is also accepted.
+    circucit_name: str
+                   A string containng the name of the circuit to be simulated.
+                   Refer to the circuit_registry module for the list of
+                   accepted names.
+                   Circuit strings such as '-Rs-(RQ)-(RQ)-' are also
+                   accepted, refer to the circuit_compiler module.
+    backend : str
+              'numpy' or 'numba'. The numba backend evaluates the circuit
+              with a fused kernel parallelized over the sets of circuit
+              elements, refer to the circuits_jit module. If None, the
+              backend selected in the circuits_jit module is used.
+    dtype : str or numpy.dtype
+            precision of the simulation, 'float64' or 'float32'. The
+            impedance is returned as complex128 or complex64 respectively.
+            If None, the precision selected in the precision module is
+            used.
+    circuit_elements : dictionary or keyword arguments
+                       input argument composed by the circuit elements
+                       composing the called circuit. Each value can be a
+                       single number or an array of N values.
+
+    Returns
+    ----------
+    complex_impedance : numpy.ndarray
+                        (N, F) matrix containing the complex impedance of
+                        each set of circuit elements [ohm]
+    '''
+    if isinstance(freq_range, str):
+        freq_range = circuits.get_freq_grid(freq_range)
+    circuit_function = _circuit_function(circuit_name, circuit_elements)
+    real = precision.real_dtype(dtype)
+    circuit_elements = _cast_elements(circuit_elements, real)
+    n_sets = np.broadcast(*[np.asarray(value) for value in
+                            circuit_elements.values()]).shape
+    assert len(n_sets) <= 1, 'the circuit elements should be given as\
+single values or one-dimensional arrays'
+
+    circuit_name = get_circuit(circuit_name).name
+    if (circuits_jit.get_backend(backend) == 'numba' and
+            circuit_name in circuits_jit.KERNELS):
+        # the kernels compute in double precision
+        return circuits_jit.evaluate(circuit_name, freq_range[1],
+                                     **circuit_elements).astype(
+            precision.complex_dtype(real), copy=False)
+    complex_impedance = circuit_function(np.asarray(freq_range[1],
+                                                    dtype=real),
+                                         **circuit_elements)
+    return np.atleast_2d(complex_impedance)
+
+
+def _cast_elements(circuit_elements, dtype):
+    '''
+    Function that converts the circuit element values to the real dtype of
+    the simulation, so that the impedance is computed in that precision.
+    '''
+    return {name: np.asarray(value, dtype=dtype)
+            for name, value in circuit_elements.items()}
+
+
+def _circuit_function(circuit_name, circuit_elements):
+    '''Function that returns the circuit function to be simulated
+
+    Function that checks that the circuit elements given are the ones of the
+    circuit indicated in circuit_name and returns its evaluator, looked up
+    in the circuit registry.
+
+    Parameters
+    ----------
+    circucit_name: str
+                   A string containng the name of the circuit to be simulated.
+                   Refer to the circuit_registry module for the list of
+                   accepted names. A circuit string (e.g. '-Rs-(RQ)-(RQ)-')
+                   can be given instead, refer to the circuit_compiler module.
+    circuit_elements : dictionary
+                       the circuit elements composing the called circuit.
+
+    Returns
+    ----------
+    circuit_function : function
+                       the function computing the impedance response of the
+                       indicated circuit.
+    '''
+    descriptor = get_circuit(circuit_name)
+    if len(circuit_elements) != len(descriptor.elements) or \
+            not all(name in circuit_elements for name in descriptor.elements):
+        raise AssertionError('The circuit {} requires the elements {}'.format(
+                             circuit_name, ', '.join(descriptor.elements)))
+    return descriptor.evaluator
@@ -0,0 +1,217 @@
+import collections
+
+import numpy as np
+
+from . import circuits
+from .circuit_registry import get_circuit
+from .data_simulation import batch_simulation
+from .rng import generators
+
+SAMPLERS = ('lhs', 'sobol', 'uniform')
+
+Dataset = collections.namedtuple('Dataset', ['circuit_name', 'names',
+                                             'parameters', 'grid_id',
+                                             'impedance'])
+Dataset.__doc__ = '''
+Batch of simulated impedance spectra.
+
+circuit_name : str
+               the simulated circuit
+names : tuple of str
+        names of the circuit elements, in the order of the columns of
+        parameters
+parameters : numpy.ndarray
+             (N, P) circuit element values of each spectrum
+grid_id : str
+          ID of the frequency range, refer to circuits.get_freq_grid
+impedance : numpy.ndarray
+            (N, F) complex impedance of each spectrum [ohm]
+'''
+
+
+def _parse_ranges(param_ranges, names):
+    '''
+    Function that returns the fixed values and the (name, low, high, scale)
+    bounds of the sampled elements, in logarithmic units for the elements
+    sampled in logarithmic scale.
+    '''
+    fixed, sampled = {}, []
+    for name in names:
+        value = param_ranges[name]
+        if np.ndim(value) == 0:
+            fixed[name] = float(value)
+            continue
+        if len(value) == 2:
+            low, high, scale = value[0], value[1], 'linear'
+        elif len(value) == 3:
+            low, high, scale = value
+        else:
+            raise AssertionError('The range of {} should be (low, high) or '
+                                 '(low, high, scale)'.format(name))
+        if scale not in ('linear', 'log'):
+            raise AssertionError("The scale of {} should be 'linear' or "
+                                 "'log'".format(name))
+        if not low <= high:
+            raise AssertionError('The range of {} is empty'.format(name))
+        if scale == 'log':
+            assert low > 0, 'the range of {} should be positive for a\
+ logarithmic scale.'.format(name)
+            low, high = np.log10(low), np.log10(high)
+        sampled.append((name, low, high, scale))
+    return fixed, sampled
+
+
+def sample_parameters(param_ranges, n, sampler='lhs', seed=None,
+                      names=None):
+    '''
+    Function that draws n sets of circuit element values within the given
+    ranges.
+
+    Parameters
+    ----------
+    param_ranges : dictionary
+                   range of each circuit element: a single value for fixed
+                   elements, (low, high) for elements sampled uniformly and
+                   (low, high, 'log') for elements sampled uniformly in
+                   logarithmic scale
+    n : int
+        number of sets
+    sampler : str
+              'lhs' (Latin hypercube), 'sobol' (scrambled Sobol sequence) or
+              'uniform' (independent uniform draws). The quasi-random
+              samplers cover the parameter space more evenly. The Sobol
+              sequence is balanced only when n is a power of two.
+    seed : int or numpy.random.Generator
+           seed of the random number generator. If None, the run seed of
+           the rng module is used.
+    names : tuple of str
+            order of the columns of the returned array. If None, the order
+            of param_ranges.
+
+    Returns
+    ----------
+    parameters : numpy.ndarray
+                 (n, P) circuit element values
+    '''
+    if sampler not in SAMPLERS:
+        raise AssertionError('The sampler should be one of {}'.format(
+                             ', '.join(SAMPLERS)))
+    names = tuple(param_ranges) if names is None else tuple(names)
+    fixed, sampled = _parse_ranges(param_ranges, names)
+    rng = generators(seed)
+
+    if not sampled:
+        unit = np.empty((n, 0))
+    elif sampler == 'uniform':
+        unit = rng.random((n, len(sampled)))
+    else:
+        from scipy.stats import qmc
+        if sampler == 'lhs':
+            engine = qmc.LatinHypercube(len(sampled), seed=rng)
+        else:
+            engine = qmc.Sobol(len(sampled), seed=rng)
+        unit = engine.random(n)
+
+    parameters = np.empty((n, len(names)))
+    column = {name: i for i, name in enumerate(names)}
+    for name, value in fixed.items():
+        parameters[:, column[name]] = value
+    for j, (name, low, high, scale) in enumerate(sampled):
+        values = low + (high - low)*unit[:, j]
+        parameters[:, column[name]] = 10**values if scale == 'log' else values
+    return parameters
+
+
+def iter_dataset(circuit_name, param_ranges, n, sampler='lhs', seed=None,
+                 freq_range=None, chunk_size=10000, backend=None,
+                 dtype=None):
+    '''
+    Generator that simulates n impedance spectra of a circuit, with circuit
+    element values drawn within the given ranges, and yields them in chunks
+    of chunk_size spectra. All the element values are drawn up front, so the
+    dataset does not depend on chunk_size.
+
+    Parameters
+    ----------
+    circuit_name : str
+                   name of a circuit of the circuit registry, or circuit
+                   string such as '-Rs-(RQ)-(RQ)-'
+    param_ranges : dictionary
+                   range of each circuit element, refer to sample_parameters
+    n : int
+        number of spectra
+    sampler : str
+              'lhs', 'sobol' or 'uniform', refer to sample_parameters
+    seed : int or numpy.random.Generator
+           seed of the random number generator
+    freq_range : array or str
+                 frequency range, as returned by circuits.freq_gen, or its
+                 ID. If None, circuits.freq_gen(10**6, 0.01).
+    chunk_size : int
+                 number of spectra simulated together
+    backend : str
+              'numpy' or 'numba', refer to data_simulation.batch_simulation
+    dtype : str or numpy.dtype
+            precision of the impedance, 'float64' or 'float32', refer to
+            data_simulation.batch_simulation
+
+    Yields
+    ----------
+    dataset : Dataset
+              named tuple containing the element values and the impedance of
+              a chunk of spectra
+    '''
+    names = get_circuit(circuit_name).elements
+    if set(param_ranges) != set(names):
+        raise AssertionError('The circuit {} requires the ranges of the '
+                             'elements {}'.format(circuit_name,
+                                                  ', '.join(names)))
+    assert chunk_size > 0, 'the chunk size should be positive.'
+    if freq_range is None:
+        grid_id = circuits.freq_grid_id(10**6, 0.01)
+    elif isinstance(freq_range, str):
+        grid_id = freq_range
+    else:
+        grid_id = circuits.register_freq_grid(freq_range[0])
+    freq_range = circuits.get_freq_grid(grid_id)
+
+    parameters = sample_parameters(param_ranges, n, sampler, seed, names)
+    for start in range(0, n, chunk_size):
+        chunk = parameters[start:start + chunk_size]
+        impedance = batch_simulation(
+            freq_range, circuit_name, backend=backend, dtype=dtype,
+            **{name: chunk[:, i] for i, name in enumerate(names)})
+        yield Dataset(circuit_name, names, chunk, grid_id, impedance)
+
+
+def generate_dataset(circuit_name, param_ranges, n, sampler='lhs', seed=None,
+                     freq_range=None, chunk_size=10000, backend=None,
+                     dtype=None):
+    '''
+    Function that simulates n impedance spectra of a circuit, with circuit
+    element values drawn within the given ranges, and returns them as a
+    single Dataset. Refer to iter_dataset for the parameters, and to use
+    datasets that do not fit in memory.
+
+    Example
+    ----------
+    generate_dataset('RsRQ', {'Rs': (10, 100), 'Rp': (100, 1000),
+                              'Q': (1e-6, 1e-4, 'log'), 'alpha': (0.7, 1)},
+                     n=1024, sampler='sobol', seed=0)
+    '''
+    assert n > 0, 'the number of spectra should be positive.'
+    parameters, impedance = None, None
+    for chunk in iter_dataset(circuit_name, param_ranges, n, sampler, seed,
+                              freq_range, chunk_size, backend, dtype):
+        if impedance is None:
+            # the storage of the whole dataset is allocated once
+            parameters = np.empty((n, len(chunk.names)))
+            impedance = np.empty((n, chunk.impedance.shape[1]),
+                                 dtype=chunk.impedance.dtype)
+            start = 0
+        stop = start + len(chunk.parameters)
+        parameters[start:stop] = chunk.parameters
+        impedance[start:stop] = chunk.impedance
+        start = stop
+    return Dataset(chunk.circuit_name, chunk.names, parameters,
+                   chunk.grid_id, impedance)
@@ -3,16 +3,20 @@ import time
 
 import numpy as np
 
-from . import alterations
+from .circuit_compiler import is_circuit_string
+from .circuit_registry import get_circuit
 from .data_simulation import circuit_simulation
 from .plotting import nyquist_plot, log_freq_plot, rgb_plot
+from .render_pool import plot_folders, rgb_channels
+from .renderer import response_arrays
 
 
 def file_writer(freq_range, circuit_name, alteration=None,
                 noise_amplitude=None, axis_off=None,
                 save_location='simulation_data/', source='simulation',
                 scatter=None, plot_type='nyquist',
-                transparent=None, save_image=None, **circuit_elements):
+                transparent=None, save_image=None, pool=None, store=None,
+                folders=None, **circuit_elements):
     ''' Function used to write a .csv file containing the metadata and raw data
      of the simulated impedance response.
 
@@ -66,6 +70,16 @@ def file_writer(freq_range, circuit_name, alteration=None,
                  in a .png file format.
                  The filename used for the file will be the same
                  as the raw data file created in this function.
+    pool : render_pool.RenderPool
+           pool of worker processes saving the plots, refer to save_plots
+    store : image_store.ImageStore
+            If given, the images of the plots are appended to the store
+            instead of being saved as .png files, refer to save_plots
+    folders : dictionary
+              folder of each plot to save, refer to save_plots. When many
+              spectra are written, computing them once with
+              render_pool.plot_folders avoids checking the folders for each
+              spectrum.
     circuit_elements : dictionary or keyword arguments
                        input argument composed by the circuit elements
                        composing the called circuit. Refer to the circuits
@@ -96,11 +110,12 @@ def file_writer(freq_range, circuit_name, alteration=None,
                         **circuit_elements)
         data_file.close()
 
-    if save_image:
+    if save_image or store is not None:
         save_plots(df, filename, plot_type=plot_type, alteration=alteration,
                    save_location=save_location,
                    axis_off=axis_off, save_image=save_image,
-                   scatter=scatter, transparent=transparent)
+                   scatter=scatter, transparent=transparent, pool=pool,
+                   store=store, folders=folders)
 
     return
 
@@ -151,14 +166,7 @@ def simulation_filename(circuit_name, alteration=None, noise_amplitude=None,
                    run and the number of simuation for that day.
 
     """
-    circuit_file_name = {'RC_series': 'none', 'RQ_series': 'none',
-                         'RC_parallel': 'one', 'RQ_parallel': 'one',
-                         'RsRC': 'one', 'RsRQ': 'one', 'RsRCRC': 'two',
-                         'RsRQRQ': 'two', 'Randles': 'tail'}
-    if circuit_name in circuit_file_name:
-        name = circuit_file_name[circuit_name]
-    else:
-        print('The indicated circuit in not support by the simuation module')
+    name = get_circuit(circuit_name).file_tag
 
     date = time.strftime('%y%m%d', time.localtime())
     assert isinstance(date, str), 'the date should be a string'
@@ -241,74 +249,17 @@ def write_metadata(data_file, serial_number, circuit_name, alteration=None,
 
     # If simulated data, record the circuit type, the circuit element values
     if source == 'sim' or 'simulation':
-        data_file.write('Circuit type: , -{}-'.format(circuit_name)+'\n')
-
-        if circuit_name.split('_')[0] == 'RC':
-            assert len(circuit_elements) == 2, 'the number of circuit\
-elements should be 2'
-            data_file.write('Circuit elements:,R = {} ohm;C = {} F'
-                            .format(circuit_elements['R'],
-                                    circuit_elements['C']) + '\n')
-        if circuit_name.split('_')[0] == 'RQ':
-            assert len(circuit_elements) == 3, 'the number of circuit\
-elements should be 3'
-            data_file.write('Circuit elements:,R = {} ohm;Q = {} '
-                            '[s^(alpha-1)/ohm];alpha = {} -'
-                            .format(circuit_elements['R'],
-                                    circuit_elements['Q'],
-                                    circuit_elements['alpha']
-                                    ) + '\n')
-        if circuit_name == 'RsRC':
-            assert len(circuit_elements) == 3, 'the number of circuit\
-elements should be 3'
-            data_file.write('Circuit elements:,Rs = {} ohm;Rp = {} ohm'
-                            ';C = {} F'
-                            .format(circuit_elements['Rs'],
-                                    circuit_elements['Rp'],
-                                    circuit_elements['C']) + '\n')
-        if circuit_name.split('_')[0] == 'RsRQ':
-            assert len(circuit_elements) == 4, 'the number of circuit\
-elements should be 3'
-            data_file.write('Circuit elements:,Rs = {} ohm;Rp = {} ohm;Q = {} '
-                            '[s^(alpha-1)/ohm];alpha = {} -'
-                            ''.format(circuit_elements['Rs'],
-                                      circuit_elements['Rp'],
-                                      circuit_elements['Q'],
-                                      circuit_elements['alpha']
-                                      ) + '\n')
-        if circuit_name == 'RsRCRC':
-            assert len(circuit_elements) == 5, 'the number of circuit\
-elements should be 5'
-            data_file.write('Circuit elements:,Rs = {} ohm;Rp1 = {} ohm; '
-                            'C1 = {} F;Rp2 = {} ohm;C2 = {} F'
-                            ''.format(circuit_elements['Rs'],
-                                      circuit_elements['Rp1'],
-                                      circuit_elements['C1'],
-                                      circuit_elements['Rp2'],
-                                      circuit_elements['C2']) + '\n')
-        if circuit_name == 'RsRQRQ':
-            assert len(circuit_elements) == 7, 'the number of circuit\
-elements should be 7'
-            data_file.write('Circuit elements:,Rs = {} ohm;Rp1 = {} ohm;'
-                            'Q1 = {} [s^(alpha-1)/ohm];alpha_1 = {} -;Rp2 = {}'
-                            ' ohm;Q2 = {} [s^(alpha-1)/ohm];alpha_2 = {} -'
-                            ''.format(circuit_elements['Rs'],
-                                      circuit_elements['Rp1'],
-                                      circuit_elements['Q1'],
-                                      circuit_elements['alpha1'],
-                                      circuit_elements['Rp2'],
-                                      circuit_elements['Q2'],
-                                      circuit_elements['alpha2']) + '\n')
-        if circuit_name == 'Randles':
-            assert len(circuit_elements) == 5, 'the number of circuit\
-elements should be 5'
-            data_file.write('Circuit elements:,Rs = {} ohm;Rp = {} ohm;Q = '
-                            '{} [s^(alpha-1)/ohm];alpha = {} -;sigma = {} -'
-                            ''.format(circuit_elements['Rs'],
-                                      circuit_elements['Rp'],
-                                      circuit_elements['Q'],
-                                      circuit_elements['alpha'],
-                                      circuit_elements['sigma']) + '\n')
+        descriptor = get_circuit(circuit_name)
+        if len(circuit_elements) != len(descriptor.elements):
+            raise AssertionError('the number of circuit elements should be '
+                                 '{}'.format(len(descriptor.elements)))
+        circuit_type = circuit_name if is_circuit_string(circuit_name) \
+            else '-{}-'.format(circuit_name)
+        data_file.write('Circuit type: , {}'.format(circuit_type)+'\n')
+        data_file.write('Circuit elements:,' + ';'.join(
+            '{} = {} {}'.format(element, circuit_elements[element], unit)
+            for element, unit in zip(descriptor.elements, descriptor.units))
+            + '\n')
     # Indication of alteration
     if alteration:
         data_file.write('Alteration:, {}'.format(alteration) + '\n' +
@@ -355,16 +306,11 @@ def write_data(data_file, freq_range, circuit_name, alteration=None,
     dataframe: pandas DataFrame
                pandas dataframe containing frequency and imepedance data
     '''
+    # the alteration is applied by circuit_simulation
     dataframe = circuit_simulation(freq_range, circuit_name,
                                    noise_amplitude=noise_amplitude,
                                    alteration=alteration,
                                    **circuit_elements)
-
-    if alteration:
-        noise_function = getattr(alterations, alteration)
-        dataframe = noise_function(dataframe, noise_amplitude)
-    else:
-        dataframe = dataframe
     dataframe.to_csv(data_file, mode='a')
     data_file.close()
 
@@ -374,7 +320,8 @@ def write_data(data_file, freq_range, circuit_name, alteration=None,
 def save_plots(response, filename, save_location='simuation_data/',
                alteration=None, plot_type='nyquist',
                axis_off=None, save_image=None,
-               scatter=None, transparent=None):
+               scatter=None, transparent=None, pool=None, store=None,
+               folders=None):
     ''' Function used to save the impedance response in a nyquist or Frequency
     versus real and imaginary components.
 
@@ -423,87 +370,58 @@ def save_plots(response, filename, save_location='simuation_data/',
     transparent : bool
                   Removes thebackground of the plot in the saving step. The
                   resulting .png file(s) will have a transparent background.
-
+    pool : render_pool.RenderPool
+           If given, the response is sent to the pool, which saves the same
+           plots in its worker processes. The pool only saves axis-off
+           images, in its own save_location and for its own plot_type,
+           which should be the ones given.
+    store : image_store.ImageStore
+            If given, the axis-off images of the plot_type of the store are
+            drawn with the rasterize module and appended to the store, with
+            the filename as serial number and the alteration ('none'
+            without alteration) as label, instead of being saved as .png
+            files. The other plotting options are the ones of the store.
+    folders : dictionary
+              folder of each plot to save, as returned by
+              render_pool.plot_folders for the save_location and plot_type.
+              If None, the folders are computed, and created if needed, at
+              each call: callers saving many spectra should compute them
+              once, as RenderPool does.
 
     Output
     ----------
     .png file(s) of the nyquist and/or frequency vs. complex impedance plots of
     the impedance response to be investigated.
     '''
-    save_location = save_location + 'plots/'
-    if not os.path.exists(save_location):
-        os.makedirs(save_location)
-    if plot_type == 'nyquist':
-        save_location = save_location + 'nyquist/'
-        if not os.path.exists(save_location):
-            os.makedirs(save_location)
-        filename_n = filename + '_nyquist'
-        nyquist_plot(response, filename=filename_n, save_image=save_image,
-                     alteration=alteration, transparent=transparent,
-                     axis_off=axis_off, save_location=save_location,
-                     scatter=scatter)
-    elif plot_type == 'log_freq':
-        filename_lg = filename + '_log-freq'
-
-        save_location = save_location + 'log_freq/'
-        if not os.path.exists(save_location):
-            os.makedirs(save_location)
-
-        log_freq_plot(response, filename=filename_lg, save_image=save_image,
-                      alteration=alteration, save_location=save_location,
-                      axis_off=axis_off, scatter=None, transparent=transparent)
-
-    elif plot_type == 'rgb':
-        filename_rgb = filename + '_rgb'
-        save_location = save_location + 'rgb/'
-        if not os.path.exists(save_location):
-            os.makedirs(save_location)
-        rgb_plot(np.log10(response['freq [Hz]']), response['Re_Z_noise [ohm]'],
-                 response['Im_Z [ohm]'], filename=filename_rgb,
-                 save_location=save_location, save_image=save_image)
-    elif plot_type == 'two':
-        filename_n = filename + '_nyquist'
-        save_location = save_location + 'nyquist/'
-        if not os.path.exists(save_location):
-            os.makedirs(save_location)
-        nyquist_plot(response, filename=filename_n, save_image=save_image,
-                     alteration=alteration, transparent=transparent,
-                     axis_off=axis_off, save_location=save_location,
-                     scatter=scatter)
-
-        filename_lg = filename + '_log-freq'
-        save_location = save_location + '../log_freq/'
-        if not os.path.exists(save_location):
-            os.makedirs(save_location)
-
-        log_freq_plot(response, filename=filename_lg, save_image=save_image,
-                      alteration=alteration, save_location=save_location,
-                      axis_off=axis_off, scatter=None, transparent=transparent)
-    elif plot_type == 'all':
-        filename_n = filename + '_nyquist'
-        save_location = save_location + 'nyquist/'
-        if not os.path.exists(save_location):
-            os.makedirs(save_location)
-        nyquist_plot(response, filename=filename_n, save_image=save_image,
-                     alteration=alteration, transparent=transparent,
-                     axis_off=axis_off, save_location=save_location,
-                     scatter=scatter)
-
-        filename_lg = filename + '_log-freq'
-        save_location = save_location + '../log_freq/'
-        if not os.path.exists(save_location):
-            os.makedirs(save_location)
-
-        log_freq_plot(response, filename=filename_lg, save_image=save_image,
-                      alteration=alteration, save_location=save_location,
-                      axis_off=axis_off, scatter=None, transparent=transparent)
-
-        filename_rgb = filename + '_rgb'
-        save_location = save_location + '../rgb/'
-        if not os.path.exists(save_location):
-            os.makedirs(save_location)
-
-        rgb_plot(response['Re_Z_noise [ohm]'], response['Im_Z_noise [ohm]'],
-                 save_image=save_image, save_location=save_location,
-                 filename=filename_rgb)
+    if store is not None:
+        store.add_response(response, filename, alteration)
+        return
+    if pool is not None:
+        if (save_location, plot_type) != (pool.save_location,
+                                          pool.plot_type):
+            raise AssertionError('The save location and the plot type '
+                                 'should be the ones of the pool')
+        assert save_image and axis_off, 'the pool only saves axis-off\
+ images.'
+        rgb = rgb_channels(response, plot_type) if 'rgb' in pool.folders \
+            else None
+        pool.submit(filename, *response_arrays(response, alteration),
+                    rgb=rgb, alteration=alteration, scatter=scatter,
+                    transparent=transparent)
+        return
+    if folders is None:
+        folders = plot_folders(save_location, plot_type)
+    if 'nyquist' in folders:
+        nyquist_plot(response, filename=filename + '_nyquist',
+                     save_image=save_image, alteration=alteration,
+                     transparent=transparent, axis_off=axis_off,
+                     save_location=folders['nyquist'], scatter=scatter)
+    if 'log_freq' in folders:
+        log_freq_plot(response, filename=filename + '_log-freq',
+                      save_image=save_image, alteration=alteration,
+                      save_location=folders['log_freq'], axis_off=axis_off,
+                      scatter=None, transparent=transparent)
+    if 'rgb' in folders:
+        rgb_plot(*rgb_channels(response, plot_type), save_image=save_image,
+                 save_location=folders['rgb'], filename=filename + '_rgb')
     return
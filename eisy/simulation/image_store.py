@@ -0,0 +1,622 @@
+import collections
+import os
+import struct
+
+import numpy as np
+
+from .rasterize import log_freq_image, nyquist_image, rgb_image
+from .render_pool import PLOT_TYPES
+from .renderer import response_arrays
+from .rng import generators
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+try:
+    import zarr
+except ImportError:
+    zarr = None
+
+BACKENDS = ('npy', 'hdf5', 'zarr')
+
+# The labels and the serial numbers are stored as fixed-width UTF-8 strings,
+# which all the backends support and which .npy files can memory-map.
+STRING_LENGTH = 128
+STRING_DTYPE = 'S{}'.format(STRING_LENGTH)
+
+# Arrays of a store, and prefix of their .npy files in the folder of the
+# npy backend, which only reads and writes these files
+ARRAY_NAMES = PLOT_TYPES['all'] + ('labels', 'serials')
+NPY_PREFIX = 'image_store_'
+
+# Size [bytes] of the header of the .npy files of the npy backend. The
+# header is rewritten with the number of images at each flush, and is padded
+# so that it keeps its size as the first dimension grows.
+NPY_HEADER_SIZE = 256
+
+StoredImages = collections.namedtuple('StoredImages',
+                                      ['images', 'labels', 'serials'])
+StoredImages.__doc__ = '''
+Content of an image store, returned by load_image_store.
+
+images : dictionary
+         (N, H, W) grayscale or (N, H, W, 3) RGB uint8 images of each plot
+         type, as a read-only memory map for the npy backend or as a lazy
+         array of the file for the hdf5 and zarr backends
+labels : numpy.ndarray
+         (N,) label of each image
+serials : numpy.ndarray
+          (N,) serial number of each image
+'''
+
+
+def available_backends():
+    '''
+    Function that returns the backends of the image store that can be used,
+    the hdf5 and zarr backends requiring the optional h5py and zarr packages.
+    '''
+    modules = {'npy': np, 'hdf5': h5py, 'zarr': zarr}
+    return tuple(backend for backend in BACKENDS
+                 if modules[backend] is not None)
+
+
+def _get_backend(path, backend=None):
+    '''
+    Function that returns the backend of a store: the requested one, or the
+    one of the extension of path ('.h5' or '.hdf5' for hdf5, '.zarr' for
+    zarr and npy otherwise).
+    '''
+    if backend is None:
+        extension = os.path.splitext(os.path.normpath(path))[1].lower()
+        backend = {'.h5': 'hdf5', '.hdf5': 'hdf5',
+                   '.zarr': 'zarr'}.get(extension, 'npy')
+    if backend not in BACKENDS:
+        raise AssertionError('The backend should be one of {}'.format(
+                             ', '.join(BACKENDS)))
+    if backend not in available_backends():
+        raise ImportError('The {} backend of the image store requires the {} '
+                          'package'.format(backend, {'hdf5': 'h5py',
+                                                     'zarr': 'zarr'}[backend]))
+    return backend
+
+
+def _encode_strings(values, n_images):
+    '''
+    Function that returns the (N,) fixed-width UTF-8 strings of the labels or
+    of the serial numbers of N images.
+    '''
+    values = np.broadcast_to(np.asarray(values, dtype=str), (n_images,))
+    encoded = np.char.encode(values, 'utf-8')
+    assert encoded.itemsize <= STRING_LENGTH, 'the labels and the serial\
+ numbers should be at most {} bytes long.'.format(STRING_LENGTH)
+    return encoded.astype(STRING_DTYPE)
+
+
+def spectrum_images(plot, freq, impedance, size=(50, 50), max_real=None,
+                    scatter=False):
+    '''
+    Function that draws the axis-off images of a type of plot with the
+    rasterize module, without going through .png files.
+
+    Parameters
+    ----------
+    plot : str
+           'nyquist', 'log_freq' or 'rgb'
+    freq : array-like
+           (F,) frequency [Hz], or (N, F) frequency of each spectrum
+    impedance : array-like
+                (F,) or (N, F) complex impedance [ohm]
+    size : tuple of int
+           (H, W) size of the Nyquist and log-frequency images. The rgb
+           images are (F, F, 3), one pixel per point, refer to
+           rasterize.rgb_image.
+    max_real : float or array-like
+               maximum of the real part of the impedance without
+               alterations, refer to rasterize.nyquist_image
+    scatter : bool
+              If True, the points of the Nyquist images are not joined
+
+    Returns
+    ----------
+    images : numpy.ndarray
+             (N, H, W) grayscale or (N, F, F, 3) RGB uint8 images
+    '''
+    impedance = np.atleast_2d(impedance)
+    if plot == 'nyquist':
+        return nyquist_image(impedance, size, scatter=scatter,
+                             max_real=max_real)
+    if plot == 'log_freq':
+        return log_freq_image(freq, impedance, size)
+    if plot == 'rgb':
+        return rgb_image(np.broadcast_to(np.log10(freq), impedance.shape),
+                         impedance.real, impedance.imag, dtype=np.uint8)
+    raise AssertionError("The plot should be 'nyquist', 'log_freq' or 'rgb'")
+
+
+def _npy_path(path, name):
+    '''
+    Function that returns the path of the .npy file of an array of a store
+    of the npy backend.
+    '''
+    return os.path.join(path, '{}{}.npy'.format(NPY_PREFIX, name))
+
+
+class _NpyArrays:
+    '''
+    Arrays of the npy backend: an uncompressed .npy file per array, named
+    after NPY_PREFIX, which np.load can memory-map. The other files of the
+    folder are left untouched. The data is appended at the end of the
+    files, and the shape in their header is updated by flush.
+    '''
+
+    def __init__(self, path, mode):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.files = {}
+        self.shapes = {}
+        self.dtypes = {}
+        for name in ARRAY_NAMES:
+            if not os.path.exists(_npy_path(path, name)):
+                continue
+            if mode == 'w':
+                os.remove(_npy_path(path, name))
+            else:
+                self._open(name)
+
+    def _open(self, name):
+        '''
+        Function that opens the file of an existing array after the images
+        counted in its header, which drops the images of an interrupted
+        write.
+        '''
+        data_file = open(_npy_path(self.path, name), 'r+b')
+        np.lib.format.read_magic(data_file)
+        shape, fortran_order, dtype = \
+            np.lib.format.read_array_header_1_0(data_file)
+        assert data_file.tell() == NPY_HEADER_SIZE and not fortran_order, \
+            'the file {} was not written by an image store.'.format(name)
+        data_file.seek(NPY_HEADER_SIZE + int(np.prod(shape))*dtype.itemsize)
+        data_file.truncate()
+        self.files[name] = data_file
+        self.shapes[name] = shape
+        self.dtypes[name] = dtype
+
+    def _write_header(self, name):
+        '''
+        Function that writes the header of a file with the current shape.
+        '''
+        descr = np.lib.format.dtype_to_descr(self.dtypes[name])
+        header = repr({'descr': descr, 'fortran_order': False,
+                       'shape': self.shapes[name]}).encode('latin1')
+        # magic string, version 1.0 and length of the header
+        prefix = b'\x93NUMPY\x01\x00' + \
+            struct.pack('<H', NPY_HEADER_SIZE - 10)
+        assert len(header) < NPY_HEADER_SIZE - 10, 'the shape {} does not\
+ fit in the header.'.format(self.shapes[name])
+        data_file = self.files[name]
+        position = data_file.tell()
+        data_file.seek(0)
+        data_file.write(prefix + header.ljust(NPY_HEADER_SIZE - 11) + b'\n')
+        data_file.seek(position)
+
+    def __contains__(self, name):
+        return name in self.files
+
+    def lengths(self):
+        return {name: shape[0] for name, shape in self.shapes.items()}
+
+    def create(self, name, item_shape, dtype, chunk_size, compression):
+        self.files[name] = open(_npy_path(self.path, name), 'w+b')
+        self.shapes[name] = (0,) + tuple(item_shape)
+        self.dtypes[name] = np.dtype(dtype)
+        self._write_header(name)
+        self.files[name].seek(NPY_HEADER_SIZE)
+
+    def append(self, name, values):
+        assert values.shape[1:] == self.shapes[name][1:], 'the images should\
+ have the shape {} of the store.'.format(self.shapes[name][1:])
+        self.files[name].write(np.ascontiguousarray(
+            values, dtype=self.dtypes[name]).tobytes())
+        self.shapes[name] = (self.shapes[name][0] + len(values),) + \
+            self.shapes[name][1:]
+
+    def flush(self):
+        for name, data_file in self.files.items():
+            self._write_header(name)
+            data_file.flush()
+
+    def close(self):
+        self.flush()
+        for data_file in self.files.values():
+            data_file.close()
+        self.files = {}
+
+
+class _Hdf5Arrays:
+    '''
+    Arrays of the hdf5 backend: chunked, gzip-compressed datasets of an
+    HDF5 file, resized at each append.
+    '''
+
+    def __init__(self, path, mode):
+        self.file = h5py.File(path, mode)
+
+    def __contains__(self, name):
+        return name in self.file
+
+    def lengths(self):
+        return {name: len(dataset) for name, dataset in self.file.items()}
+
+    def create(self, name, item_shape, dtype, chunk_size, compression):
+        self.file.create_dataset(
+            name, shape=(0,) + tuple(item_shape), dtype=dtype,
+            maxshape=(None,) + tuple(item_shape),
+            chunks=(chunk_size,) + tuple(item_shape), compression='gzip',
+            compression_opts=compression, shuffle=True)
+
+    def append(self, name, values):
+        dataset = self.file[name]
+        start = len(dataset)
+        dataset.resize(start + len(values), axis=0)
+        dataset[start:] = values
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class _ZarrArrays:
+    '''
+    Arrays of the zarr backend: chunked arrays of a Zarr group, compressed
+    with the default compressor of zarr.
+    '''
+
+    def __init__(self, path, mode):
+        self.group = zarr.open_group(path, mode=mode)
+
+    def __contains__(self, name):
+        return name in self.group
+
+    def lengths(self):
+        return {name: self.group[name].shape[0]
+                for name in self.group.array_keys()}
+
+    def create(self, name, item_shape, dtype, chunk_size, compression):
+        # the strings are stored with the variable-length string dtype of
+        # zarr, which has a specification unlike fixed-width bytes
+        if np.dtype(dtype).kind == 'S':
+            dtype = str
+        self.group.zeros(name=name, shape=(0,) + tuple(item_shape),
+                         chunks=(chunk_size,) + tuple(item_shape),
+                         dtype=dtype)
+
+    def append(self, name, values):
+        if values.dtype.kind == 'S':
+            values = np.char.decode(values, 'utf-8')
+        self.group[name].append(values, axis=0)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+_ARRAYS = {'npy': _NpyArrays, 'hdf5': _Hdf5Arrays, 'zarr': _ZarrArrays}
+
+
+class ImageStore:
+    '''
+    Store of the axis-off images of simulated spectra, as an alternative to
+    the .png files of file_writer.save_plots. The images of each type of
+    plot are drawn with the rasterize module and appended to a single
+    (N, ...) uint8 array, with the label and the serial number of each
+    spectrum in parallel (N,) arrays, so that a training set can be read
+    from a few files, or memory-mapped, without decoding thousands of
+    images. The images are buffered and written chunk_size at a time. Used
+    as a context manager.
+
+    The backends are:
+
+    - 'npy': uncompressed .npy files, named image_store_<array>.npy, in a
+      folder whose other files are not touched, memory-mapped by
+      load_image_store
+    - 'hdf5': an HDF5 file of chunked, gzip-compressed datasets (requires
+      h5py)
+    - 'zarr': a Zarr group of chunked, compressed arrays (requires zarr)
+
+    Example
+    ----------
+    with ImageStore('simulation_data/images', plot_type='two') as store:
+        for i, response in enumerate(responses):
+            store.add_response(response, 'spectrum{}'.format(i),
+                               alteration='complex_noise')
+
+    Parameters
+    ----------
+    path : str
+           folder of the npy backend, or file of the hdf5 and zarr backends
+    plot_type : str
+                plots stored for each spectrum: 'nyquist', 'log_freq', 'rgb',
+                'two' (nyquist and log_freq) or 'all'. An existing store
+                can only be appended to with the plots it contains.
+    size : tuple of int
+           (H, W) size of the Nyquist and log-frequency images in pixels
+    backend : str
+              'npy', 'hdf5' or 'zarr'. If None, the backend of the extension
+              of path, refer to available_backends.
+    chunk_size : int
+                 number of images buffered before a write, and size of the
+                 chunks of the hdf5 and zarr arrays
+    compression : int
+                  gzip compression level of the hdf5 backend, from 0 to 9
+    scatter : bool
+              If True, the points of the Nyquist images are not joined
+    mode : str
+           'a' to append to an existing store, 'w' to overwrite it
+    '''
+
+    def __init__(self, path, plot_type='nyquist', size=(50, 50),
+                 backend=None, chunk_size=1024, compression=4, scatter=False,
+                 mode='a'):
+        if plot_type not in PLOT_TYPES:
+            raise AssertionError('The plot type should be one of {}'.format(
+                                 ', '.join(PLOT_TYPES)))
+        assert mode in ('a', 'w'), "the mode should be 'a' or 'w'."
+        assert chunk_size > 0, 'the chunk size should be positive.'
+        self.path = path
+        self.plots = PLOT_TYPES[plot_type]
+        self.size = tuple(size)
+        self.backend = _get_backend(path, backend)
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.scatter = scatter
+        self._arrays = _ARRAYS[self.backend](path, mode)
+        lengths = self._arrays.lengths()
+        # the images appended to an existing store are only aligned with
+        # the stored ones if the same plots are stored for every spectrum
+        names = set(self.plots) | {'labels', 'serials'}
+        if lengths and (set(lengths) != names or
+                        len(set(lengths.values())) != 1):
+            self._arrays.close()
+            self._arrays = None
+            raise AssertionError('The arrays {} of the store {} should be '
+                                 'the ones of the plots {}, with the same '
+                                 'length'.format(
+                                     lengths, path, ', '.join(self.plots)))
+        self._n_stored = max(lengths.values(), default=0)
+        self._buffer = collections.defaultdict(list)
+        self._n_buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._n_stored + self._n_buffered
+
+    def __repr__(self):
+        return '{}({!r}, {}, {} images)'.format(
+            type(self).__name__, self.path, self.backend, len(self))
+
+    def append(self, freq, impedance, labels, serials, max_real=None):
+        '''
+        Function that draws the images of a batch of spectra and appends
+        them to the store.
+
+        Parameters
+        ----------
+        freq : array-like
+               (F,) frequency [Hz], or (N, F) frequency of each spectrum
+        impedance : array-like
+                    (F,) or (N, F) complex impedance plotted [ohm]
+        labels : str or array-like
+                 label of the spectra, or (N,) label of each spectrum
+        serials : str or array-like
+                  serial number or filename of the spectra, or (N,) serial
+                  number of each spectrum
+        max_real : float or array-like
+                   maximum of the real part of the impedance without
+                   alterations, refer to rasterize.nyquist_image
+        '''
+        impedance = np.atleast_2d(impedance)
+        self.append_images({plot: spectrum_images(
+            plot, freq, impedance, self.size, max_real, self.scatter)
+            for plot in self.plots}, labels, serials)
+
+    def add_response(self, response, serial, alteration=None, label=None):
+        '''
+        Function that appends the images of a dataframe returned by
+        data_simulation.circuit_simulation, refer to file_writer.save_plots.
+
+        Parameters
+        ----------
+        response : pandas.DataFrame
+                   impedance response
+        serial : str
+                 serial number or filename of the spectrum
+        alteration : str
+                     If given, the images of the altered impedance are
+                     stored.
+        label : str
+                label of the spectrum. If None, the alteration, or 'none'
+                without alteration.
+        '''
+        freq, impedance, max_real = response_arrays(response, alteration)
+        if label is None:
+            label = alteration or 'none'
+        self.append(freq, impedance, label, serial, max_real)
+
+    def append_images(self, images, labels, serials):
+        '''
+        Function that appends images drawn beforehand to the store.
+
+        Parameters
+        ----------
+        images : dictionary
+                 (N, ...) uint8 images of each plot of the store
+        labels, serials : refer to append
+        '''
+        assert set(images) == set(self.plots), 'images of the plots {}\
+ should be given.'.format(', '.join(self.plots))
+        images = {plot: np.asarray(values, dtype=np.uint8) for plot, values
+                  in images.items()}
+        n_images = len(images[self.plots[0]])
+        assert all(len(values) == n_images for values in images.values()), \
+            'the same number of images should be given for each plot.'
+        images['labels'] = _encode_strings(labels, n_images)
+        images['serials'] = _encode_strings(serials, n_images)
+        for name, values in images.items():
+            self._buffer[name].append(values)
+        self._n_buffered += n_images
+        if self._n_buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        '''
+        Function that writes the buffered images.
+        '''
+        for name, chunks in self._buffer.items():
+            values = np.concatenate(chunks)
+            if name not in self._arrays:
+                assert self._n_stored == 0, 'the store {} does not contain\
+ {} images.'.format(self.path, name)
+                self._arrays.create(name, values.shape[1:], values.dtype,
+                                    self.chunk_size, self.compression)
+            self._arrays.append(name, values)
+        self._buffer.clear()
+        self._n_stored += self._n_buffered
+        self._n_buffered = 0
+        self._arrays.flush()
+
+    def close(self):
+        '''
+        Function that writes the buffered images and closes the store.
+        '''
+        if self._arrays is not None:
+            self.flush()
+            self._arrays.close()
+            self._arrays = None
+
+
+def load_image_store(path, backend=None):
+    '''
+    Function that opens an image store written by ImageStore. The images are
+    not read: the npy backend returns read-only memory maps of the .npy
+    files, and the hdf5 and zarr backends their lazy arrays, which are read
+    when they are sliced. An hdf5 file stays open while its arrays are used.
+
+    Parameters
+    ----------
+    path : str
+           path of the store
+    backend : str
+              'npy', 'hdf5' or 'zarr'. If None, the backend of the extension
+              of path.
+
+    Returns
+    ----------
+    store : StoredImages
+            named tuple containing the images of each plot type and the
+            labels and serial numbers decoded as str
+    '''
+    backend = _get_backend(path, backend)
+    if backend == 'hdf5':
+        arrays = h5py.File(path, 'r')
+    elif backend == 'zarr':
+        arrays = zarr.open_group(path, mode='r')
+    else:
+        if not os.path.isdir(path):
+            raise AssertionError('The image store {} does not exist'.format(
+                                 path))
+        arrays = {name: np.load(_npy_path(path, name), mmap_mode='r')
+                  for name in ARRAY_NAMES if
+                  os.path.exists(_npy_path(path, name))}
+    if 'labels' not in arrays:
+        raise AssertionError('{} is not an image store'.format(path))
+    strings = {}
+    for name in ('labels', 'serials'):
+        values = np.asarray(arrays[name])
+        if values.dtype.kind == 'S':
+            strings[name] = np.char.decode(values, 'utf-8')
+        else:
+            strings[name] = np.array(values.tolist(), dtype=str)
+    images = {plot: arrays[plot] for plot in PLOT_TYPES['all'] if
+              plot in arrays}
+    return StoredImages(images, strings['labels'], strings['serials'])
+
+
+def learning_arrays(path, plot='nyquist', classes=None, split=0.1,
+                    seed=0, backend=None):
+    '''
+    Function that returns the training and validation sets of a type of plot
+    of an image store, which can be given to the fit method of a Keras model
+    instead of the iterators of Neural_Network.Keras_CNN.learning_set. As
+    with the validation_split of Keras, each class is split separately, so
+    that both sets contain every class whatever the order in which the store
+    was written. The images of each class composing the validation set are
+    drawn at random. The images of the sets are read from the store in its
+    order, with a trailing channel axis for the grayscale images.
+
+    Parameters
+    ----------
+    path, backend : refer to load_image_store
+    plot : str
+           'nyquist', 'log_freq' or 'rgb'
+    classes : list of str
+              labels of the classes, in the order of the columns of the
+              one-hot labels. If None, the sorted labels of the store.
+    split : float
+            fraction of the images of each class composing the validation
+            set
+    seed : int or numpy.random.Generator
+           seed of the draw of the validation set. If None, the run seed of
+           the rng module is used.
+
+    Returns
+    ----------
+    training_set : tuple
+                   (images, one-hot labels) of the training set
+    validation_set : tuple
+                     (images, one-hot labels) of the validation set
+    '''
+    store = load_image_store(path, backend)
+    if plot not in store.images:
+        raise AssertionError('The store does not contain {} images'.format(
+                             plot))
+    assert 0 <= split < 1, 'the split should be between 0 and 1.'
+    if classes is None:
+        classes = sorted(set(store.labels))
+    index = {label: i for i, label in enumerate(classes)}
+    unknown = set(store.labels) - set(index)
+    if unknown:
+        raise AssertionError('Labels of the store without class: {}'.format(
+                             ', '.join(sorted(unknown))))
+    class_index = np.array([index[label] for label in store.labels],
+                           dtype=int)
+    one_hot = np.eye(len(classes), dtype=np.float32)[class_index]
+
+    rng = generators(seed)
+    validation = np.zeros(len(class_index), dtype=bool)
+    for i in range(len(classes)):
+        members = np.flatnonzero(class_index == i)
+        n_validation = int(round(split*len(members)))
+        validation[rng.permutation(members)[:n_validation]] = True
+
+    images = store.images[plot]
+    sets = []
+    for mask in (~validation, validation):
+        selected = np.flatnonzero(mask)
+        # the images are read in the order of the store
+        subset = np.asarray(images[selected]) if len(selected) else \
+            np.zeros((0,) + images.shape[1:], dtype=images.dtype)
+        if subset.ndim == 3:
+            subset = subset[..., np.newaxis]
+        sets.append((subset, one_hot[selected]))
+    return tuple(sets)
@@ -1,7 +1,7 @@
 import matplotlib.pyplot as plt
-import numpy as np
 
-from .alterations import normalize
+from .rasterize import rgb_image
+from .renderer import get_renderer, response_arrays
 from matplotlib import rcParams
 
 # rcParams['figure.figsize'] = (8, 6)
@@ -23,6 +23,18 @@ rcParams['lines.markersize'] = 4
 rcParams['axes.unicode_minus'] = True
 
 
+def _render(response, plot_type, filename, alteration, scatter,
+            transparent):
+    '''
+    Function that saves the axis-off plot of a response as a .png file with
+    the renderer of the process, without creating a pyplot figure.
+    '''
+    freq, impedance, max_real = response_arrays(response, alteration)
+    get_renderer(plot_type, scatter=scatter, alteration=alteration,
+                 transparent=transparent).save('{}.png'.format(filename),
+                                               freq, impedance, max_real)
+
+
 def nyquist_plot(response, filename=None, save_location=None, alteration=None,
                  save_image=None, axis_off=None, transparent=None,
                  scatter=None, **kwargs):
@@ -75,6 +87,12 @@ def nyquist_plot(response, filename=None, save_location=None, alteration=None,
     -------
     The nyquist plot of the impedance response to be investigated.
     '''
+    if save_image and axis_off and not kwargs:
+        # the images are saved by the figure of the process, refer to the
+        # renderer module
+        _render(response, 'nyquist', save_location + filename, alteration,
+                scatter, transparent)
+        return
     plt.figure(figsize=(6, 6))
     if scatter:
         if alteration:
@@ -168,6 +186,10 @@ def log_freq_plot(response, filename=None, axis_off=None, scatter=None,
                    plot of the real and imaginary parts of the impedance
                    response to be investigated versus the frequency.
     '''
+    if save_image and axis_off and not kwargs:
+        _render(response, 'log_freq', save_location + filename, alteration,
+                None, transparent)
+        return
     plt.figure(figsize=(6, 5))
     if alteration:
         plt.semilogx(response['freq [Hz]'], response['Re_Z_noise [ohm]'],
@@ -249,26 +271,8 @@ def rgb_plot(red_array=None, green_array=None, blue_array=None,
     assert all(x == n[0] for x in n), 'the given arrays have different length.\
 Check that you are using the right inputs'
 
-    not_given = [k for (k, v) in given.items() if v is False]
-    for array in not_given:
-        arrays[array] = np.zeros(n[0])
-
-    # Normalize Data from 0 to 1 (aka RGB readable)
-    red_array = normalize(arrays['red_array'])
-    green_array = normalize(arrays['green_array'])
-    blue_array = normalize(arrays['blue_array'])
-
-    arbitrary_axis = np.linspace(0, 1, n[0])
-
-    r_big, a = np.meshgrid(red_array, arbitrary_axis)
-    g_big, a = np.meshgrid(green_array, arbitrary_axis)
-    b_big, a = np.meshgrid(blue_array, arbitrary_axis)
-
-    rgb_plot = np.ndarray(shape=(n[0], n[0], 3))
-
-    rgb_plot[:, :, 0] = r_big
-    rgb_plot[:, :, 1] = g_big
-    rgb_plot[:, :, 2] = b_big
+    rgb_plot = rgb_image(arrays['red_array'], arrays['green_array'],
+                         arrays['blue_array'], dtype=float)
 
     if plot:
         big, bax = plt.subplots(1, 1, figsize=[6, 6])
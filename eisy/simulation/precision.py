@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+
+# The floating point precision of the simulations can be selected with the
+# EISY_PRECISION environment variable ('float64' or 'float32') or with
+# set_precision. Single precision halves the memory of a batch of spectra,
+# which is enough for the images fed to the neural networks.
+PRECISIONS = {'float64': np.complex128, 'float32': np.complex64}
+_precision = os.environ.get('EISY_PRECISION', 'float64').lower()
+
+
+def _precision_name(dtype):
+    '''
+    Function that returns the name of the precision of a real or complex
+    dtype, such as 'float32' for numpy.float32 or numpy.complex64.
+    '''
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        raise AssertionError('The precision should be one of {}'.format(
+                             ', '.join(PRECISIONS)))
+    name = np.finfo(dtype).dtype.name if dtype.kind in 'fc' else dtype.name
+    if name not in PRECISIONS:
+        raise AssertionError('The precision should be one of {}'.format(
+                             ', '.join(PRECISIONS)))
+    return name
+
+
+def set_precision(dtype):
+    '''
+    Function that selects the precision used to simulate the impedance
+    response of the circuits.
+
+    Parameters
+    ----------
+    dtype : str or numpy.dtype
+            'float64' (double precision) or 'float32' (single precision).
+            The corresponding complex dtypes are also accepted.
+    '''
+    global _precision
+    _precision = _precision_name(dtype)
+
+
+def real_dtype(dtype=None):
+    '''
+    Function that returns the real dtype to be used in a simulation.
+
+    Parameters
+    ----------
+    dtype : str or numpy.dtype
+            the requested precision. If None, the precision selected with
+            set_precision or the EISY_PRECISION environment variable is
+            used.
+    '''
+    return np.dtype(_precision_name(dtype or _precision))
+
+
+def complex_dtype(dtype=None):
+    '''
+    Function that returns the complex dtype matching real_dtype(dtype), used
+    for the complex impedance.
+    '''
+    return np.dtype(PRECISIONS[_precision_name(dtype or _precision)])
@@ -0,0 +1,345 @@
+import numpy as np
+
+# The rasterizers draw the axis-off Nyquist and log-frequency plots of the
+# plotting module straight into arrays at the resolution fed to the neural
+# networks, instead of saving 600x600 PNG files with matplotlib that are
+# later downsampled by the image loader. A single (F,) spectrum gives a
+# (H, W) image and a (N, F) batch a (N, H, W) tensor. The color gradient
+# images of plotting.rgb_plot are encoded in the same way by rgb_image.
+
+# relative margins added by matplotlib around the data of a plot
+MARGIN = 0.05
+
+
+def _data_limits(values, margin=MARGIN):
+    '''
+    Function that returns the (N,) lower and upper limits of the axis of
+    each spectrum, with the margins of matplotlib around the finite values.
+    '''
+    finite = np.isfinite(values)
+    low = np.min(np.where(finite, values, np.inf), axis=-1)
+    high = np.max(np.where(finite, values, -np.inf), axis=-1)
+    span = high - low
+    return low - margin*span, high + margin*span
+
+
+def _pixels(values, low, high, n_pixels, flip=False):
+    '''
+    Function that maps the values of an axis to pixel coordinates, with the
+    limits mapped to the edges of the image.
+    '''
+    span = high - low
+    span = np.where(span > 0, span, 1)[..., np.newaxis]
+    position = (values - low[..., np.newaxis])/span
+    if flip:
+        position = 1 - position
+    return position*n_pixels - 0.5
+
+
+def _clip_segments(col0, row0, col1, row1, width, height):
+    '''
+    Function that clips the segments between consecutive points to the image
+    (Liang-Barsky), so that the points far outside the image, such as
+    outliers, do not produce long segments. Returns the clipped end points
+    and the mask of the visible segments.
+    '''
+    t_enter = np.zeros(col0.shape)
+    t_exit = np.ones(col0.shape)
+    visible = np.isfinite(col0) & np.isfinite(row0) & \
+        np.isfinite(col1) & np.isfinite(row1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start, end, n_pixels in ((col0, col1, width),
+                                     (row0, row1, height)):
+            delta = end - start
+            t_low = (-0.5 - start)/delta
+            t_high = (n_pixels - 0.5 - start)/delta
+            parallel = delta == 0
+            inside = (start >= -0.5) & (start <= n_pixels - 0.5)
+            visible &= ~parallel | inside
+            t_enter = np.where(parallel, t_enter, np.maximum(
+                t_enter, np.minimum(t_low, t_high)))
+            t_exit = np.where(parallel, t_exit, np.minimum(
+                t_exit, np.maximum(t_low, t_high)))
+        visible &= t_enter <= t_exit
+        # the end points of the segments with a non-finite point are NaN,
+        # and are masked by visible
+        return (col0 + t_enter*(col1 - col0), row0 + t_enter*(row1 - row0),
+                col0 + t_exit*(col1 - col0), row0 + t_exit*(row1 - row0),
+                visible)
+
+
+def _segment_points(cols, rows, width, height):
+    '''
+    Function that returns the spectrum index and the pixel coordinates of
+    the points of the segments between consecutive points of each
+    spectrum, sampled once per pixel.
+    '''
+    batch = np.broadcast_to(np.arange(cols.shape[0])[:, np.newaxis],
+                            cols[:, 1:].shape)
+    col0, row0, col1, row1, visible = _clip_segments(
+        cols[:, :-1], rows[:, :-1], cols[:, 1:], rows[:, 1:], width, height)
+    col0, row0, col1, row1, batch = (col0[visible], row0[visible],
+                                     col1[visible], row1[visible],
+                                     batch[visible])
+    counts = np.ceil(np.maximum(np.abs(col1 - col0),
+                                np.abs(row1 - row0))).astype(int) + 1
+    segment = np.repeat(np.arange(len(counts)), counts)
+    step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,
+                                               counts)
+    t = step/np.maximum(counts - 1, 1)[segment]
+    return (batch[segment],
+            col0[segment] + t*(col1 - col0)[segment],
+            row0[segment] + t*(row1 - row0)[segment])
+
+
+def _marker_stencil(marker_radius):
+    '''
+    Function that returns the pixel offsets of a disc shaped marker.
+    '''
+    offsets = np.arange(-int(marker_radius), int(marker_radius) + 1)
+    rows, cols = np.meshgrid(offsets, offsets, indexing='ij')
+    disc = rows**2 + cols**2 <= marker_radius**2
+    return rows[disc], cols[disc]
+
+
+def _output(out, shape, dtype, ink, background):
+    '''
+    Function that returns the image tensor filled with the background and
+    the values of the ink and of the background in its dtype.
+    '''
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    else:
+        assert out.shape == shape, 'out should be an array of shape {}.'\
+            .format(shape)
+        assert out.flags.c_contiguous, 'out should be C contiguous.'
+    full_scale = np.iinfo(out.dtype).max if out.dtype.kind in 'ui' else 1
+    out[...] = background*full_scale
+    return out, out.dtype.type(ink*full_scale)
+
+
+def _draw(image, batch, cols, rows, value):
+    '''
+    Function that sets the pixels at the given coordinates, dropping the ones
+    outside the image.
+    '''
+    n_images, height, width = image.shape
+    rows = np.rint(np.clip(rows, -1, height)).astype(int)
+    cols = np.rint(np.clip(cols, -1, width)).astype(int)
+    inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+    image.reshape(-1)[((batch*height + rows)*width + cols)[inside]] = value
+
+
+def _rasterize(image, curves, scatter, marker_radius, ink):
+    '''
+    Function that draws the markers, and unless scatter is True the
+    segments between them, of each (N, F) curve of pixel coordinates.
+    '''
+    height, width = image.shape[1:]
+    stencil_rows, stencil_cols = _marker_stencil(marker_radius)
+    for cols, rows in curves:
+        batch = np.broadcast_to(np.arange(cols.shape[0])[:, np.newaxis],
+                                cols.shape)
+        finite = np.isfinite(cols) & np.isfinite(rows)
+        _draw(image, batch[finite][:, np.newaxis],
+              cols[finite][:, np.newaxis] + stencil_cols,
+              rows[finite][:, np.newaxis] + stencil_rows, ink)
+        if not scatter:
+            _draw(image, *_segment_points(cols, rows, width, height), ink)
+
+
+def nyquist_image(impedance, size=(50, 50), scatter=False, marker_radius=0,
+                  ink=0.0, background=1.0, dtype=np.uint8, out=None,
+                  max_real=None):
+    '''
+    Function that draws the axis-off Nyquist plot of plotting.nyquist_plot,
+    -Im(Z) versus Re(Z), directly into an image array. The axis limits are
+    the ones of nyquist_plot: -0.1 ohm on the left, 1.1 times the maximum of
+    the real part on the top, and the margins of matplotlib elsewhere.
+
+    Parameters
+    ----------
+    impedance : array-like
+                (F,) or (N, F) complex impedance [ohm]
+    size : tuple of int
+           (H, W) size of the images in pixels
+    scatter : bool
+              If True, only the points are drawn, as with the 'scatter'
+              option of nyquist_plot. Otherwise consecutive points are
+              joined by lines, drawn solid at this resolution.
+    marker_radius : float
+                    radius of the markers in pixels. 0 draws single pixels.
+    ink, background : float
+                      values of the drawn pixels and of the background, as
+                      fractions of the full scale of dtype (255 for uint8, 1
+                      for floats). The defaults match the grayscale images
+                      read by the Keras loader, with dark points on a white
+                      background.
+    dtype : numpy.dtype
+            dtype of the images, such as numpy.uint8 or numpy.float32
+    out : numpy.ndarray
+          C contiguous (H, W) or (N, H, W) array in which the images are
+          drawn, whose dtype is used instead of dtype
+    max_real : float or array-like
+               maximum of the real part of the impedance without
+               alterations, or (N,) maximum of each spectrum, which sets the
+               top of the plot as in nyquist_plot. If None, the maximum of
+               the real part of impedance.
+
+    Returns
+    ----------
+    image : numpy.ndarray
+            (H, W) image, or (N, H, W) images of a batch
+    '''
+    impedance = np.asarray(impedance)
+    batch = np.atleast_2d(impedance)
+    height, width = size
+    x, y = batch.real, -batch.imag
+
+    x_low, x_high = _data_limits(x)
+    y_low, y_high = _data_limits(y)
+    x_low = np.full_like(x_low, -0.1)
+    if max_real is None:
+        max_real = np.max(np.where(np.isfinite(x), x, -np.inf), axis=-1)
+    y_high = 1.1*np.broadcast_to(np.asarray(max_real, dtype=x.dtype),
+                                 x_low.shape)
+
+    image, value = _output(out, (len(batch),) + tuple(size) if
+                           impedance.ndim > 1 else tuple(size), dtype, ink,
+                           background)
+    curves = [(_pixels(x, x_low, x_high, width),
+               _pixels(y, y_low, y_high, height, flip=True))]
+    _rasterize(image.reshape((-1, height, width)), curves, scatter,
+               marker_radius, value)
+    return image
+
+
+def log_freq_image(freq, impedance, size=(50, 50), scatter=False,
+                   marker_radius=0, ink=0.0, background=1.0, dtype=np.uint8,
+                   out=None):
+    '''
+    Function that draws the axis-off plot of plotting.log_freq_plot, the real
+    part and the opposite of the imaginary part of the impedance versus the
+    logarithm of the frequency, directly into an image array. Both curves
+    share the axes, with the margins of matplotlib.
+
+    Parameters
+    ----------
+    freq : array-like
+           (F,) frequency [Hz], or (N, F) frequency of each spectrum
+    impedance : array-like
+                (F,) or (N, F) complex impedance [ohm]
+    size, scatter, marker_radius, ink, background, dtype, out :
+        refer to nyquist_image
+
+    Returns
+    ----------
+    image : numpy.ndarray
+            (H, W) image, or (N, H, W) images of a batch
+    '''
+    impedance = np.asarray(impedance)
+    batch = np.atleast_2d(impedance)
+    height, width = size
+    log_freq = np.broadcast_to(np.log10(freq), batch.shape)
+    curves = np.stack([batch.real, -batch.imag], axis=-1).reshape(
+        len(batch), -1)
+
+    x_low, x_high = _data_limits(log_freq)
+    y_low, y_high = _data_limits(curves)
+
+    image, value = _output(out, (len(batch),) + tuple(size) if
+                           impedance.ndim > 1 else tuple(size), dtype, ink,
+                           background)
+    cols = _pixels(log_freq, x_low, x_high, width)
+    curves = [(cols, _pixels(values, y_low, y_high, height, flip=True))
+              for values in (batch.real, -batch.imag)]
+    _rasterize(image.reshape((-1, height, width)), curves, scatter,
+               marker_radius, value)
+    return image
+
+
+def normalize_batch(values):
+    '''
+    Function that normalizes each spectrum of a batch as
+    alterations.normalize: the values are shifted to zero when their
+    minimum is negative, and divided by their maximum when it is larger
+    than one.
+
+    Parameters
+    ----------
+    values : array-like
+             (F,) or (N, F) values
+
+    Returns
+    ----------
+    normalized : numpy.ndarray
+                 normalized values, with the shape of the input
+    '''
+    values = np.asarray(values, dtype=float)
+    values = values - np.minimum(np.min(values, axis=-1, keepdims=True), 0)
+    high = np.max(values, axis=-1, keepdims=True)
+    return values/np.where(high > 1, high, 1)
+
+
+def rgb_image(red_array=None, green_array=None, blue_array=None,
+              height=None, dtype=np.float32, out=None):
+    '''
+    Function that encodes spectra as the color gradient images of
+    plotting.rgb_plot: each array is normalized, refer to normalize_batch,
+    and drawn in one color channel along the x-axis, every row of the image
+    being the same. The (N, F, 3) colors of the spectra are computed once
+    and broadcast to the rows, without the meshgrid matrices of rgb_plot.
+
+    Parameters
+    ----------
+    red_array, green_array, blue_array : array-like
+                                         (F,) or (N, F) data of each color
+                                         channel, a (F,) array being shared
+                                         by all the spectra. At least one
+                                         array should be given, the missing
+                                         channels are black.
+    height : int
+             number of rows of the images. If None, the images are square,
+             as in rgb_plot.
+    dtype : numpy.dtype
+            dtype of the images: floats have values from 0 to 1, such as
+            numpy.float16 for the neural networks, and numpy.uint8 from 0 to
+            255
+    out : numpy.ndarray or False
+          (N, height, F, 3) array in which the images are written. If
+          False, a read-only view broadcasting the colors to the rows is
+          returned, without copying them.
+
+    Returns
+    ----------
+    image : numpy.ndarray
+            (height, F, 3) image, or (N, height, F, 3) images of a batch
+    '''
+    channels = [red_array, green_array, blue_array]
+    given = [np.asarray(channel) for channel in channels if
+             channel is not None]
+    assert len(given) != 0, 'no input array was given.'
+    assert all(channel.shape[-1:] == given[0].shape[-1:] for channel in
+               given), 'the given arrays have different length. Check that\
+ you are using the right inputs'
+    shape = np.broadcast_shapes(*[channel.shape for channel in given])
+
+    colors = np.zeros(shape + (3,))
+    for i, channel in enumerate(channels):
+        if channel is not None:
+            colors[..., i] = normalize_batch(channel)
+    dtype = np.dtype(dtype if out is None or out is False else out.dtype)
+    if dtype.kind in 'ui':
+        colors = np.rint(colors*np.iinfo(dtype).max)
+    colors = colors.astype(dtype)[..., np.newaxis, :, :]
+
+    height = shape[-1] if height is None else height
+    image_shape = shape[:-1] + (height,) + shape[-1:] + (3,)
+    if out is False:
+        return np.broadcast_to(colors, image_shape)
+    if out is None:
+        out = np.empty(image_shape, dtype=dtype)
+    assert out.shape == image_shape, 'out should be an array of shape {}.'\
+        .format(image_shape)
+    out[...] = colors
+    return out
@@ -0,0 +1,289 @@
+import concurrent.futures
+import multiprocessing
+import os
+
+import numpy as np
+
+from .plotting import rgb_plot
+from .renderer import get_renderer
+
+# Folder and filename suffix of each type of plot saved by
+# file_writer.save_plots, and the plots saved for each plot_type
+PLOT_FOLDERS = {'nyquist': ('nyquist/', '_nyquist'),
+                'log_freq': ('log_freq/', '_log-freq'),
+                'rgb': ('rgb/', '_rgb')}
+PLOT_TYPES = {'nyquist': ('nyquist',), 'log_freq': ('log_freq',),
+              'rgb': ('rgb',), 'two': ('nyquist', 'log_freq'),
+              'all': ('nyquist', 'log_freq', 'rgb')}
+
+# The workers are spawned, as in fitting.parallel, since forking a process
+# running the threads of Numba or of a BLAS library can deadlock.
+_context = multiprocessing.get_context('spawn')
+
+
+def plot_folders(save_location, plot_type='nyquist'):
+    '''
+    Function that returns the folder of each plot saved for plot_type, and
+    creates the folders that do not exist.
+
+    Parameters
+    ----------
+    save_location : str
+                    folder of the simulation, the plots being saved in its
+                    'plots/' folder
+    plot_type : str
+                'nyquist', 'log_freq', 'rgb', 'two' (nyquist and log_freq) or
+                'all'
+
+    Returns
+    ----------
+    folders : dictionary
+              path of the folder of each plot, ending with '/'
+    '''
+    if plot_type not in PLOT_TYPES:
+        raise AssertionError('The plot type should be one of {}'.format(
+                             ', '.join(PLOT_TYPES)))
+    folders = {}
+    for plot in PLOT_TYPES[plot_type]:
+        folder = save_location + 'plots/' + PLOT_FOLDERS[plot][0]
+        os.makedirs(folder, exist_ok=True)
+        folders[plot] = folder
+    return folders
+
+
+def rgb_channels(response, plot_type='rgb'):
+    '''
+    Function that returns the (red, green, blue) arrays of the rgb plot
+    saved by file_writer.save_plots for plot_type: the logarithm of the
+    frequency, the real part of the altered impedance and the imaginary part
+    of the impedance without alterations for 'rgb', and the real and
+    imaginary parts of the altered impedance (red and green) for 'all'.
+    '''
+    if plot_type == 'rgb':
+        return (np.log10(response['freq [Hz]'].to_numpy()),
+                response['Re_Z_noise [ohm]'].to_numpy(),
+                response['Im_Z [ohm]'].to_numpy())
+    return (response['Re_Z_noise [ohm]'].to_numpy(),
+            response['Im_Z_noise [ohm]'].to_numpy(), None)
+
+
+def render_spectrum(folders, filename, freq, impedance, max_real=None,
+                    rgb=None, alteration=None, scatter=None,
+                    transparent=None):
+    '''
+    Function that saves the plots of a spectrum as .png files in the given
+    folders, as file_writer.save_plots does. The Nyquist and log-frequency
+    plots are the axis-off plots of the plotting module, saved with the
+    renderers of the process, and the rgb plot is saved with
+    plotting.rgb_plot.
+
+    Parameters
+    ----------
+    folders : dictionary
+              folder of each plot to save, refer to plot_folders
+    filename : str
+               name of the simulation, completed by the suffix of each plot
+    freq : array-like
+           (F,) frequency [Hz]
+    impedance : array-like
+                (F,) complex impedance plotted, with or without alterations
+                [ohm]
+    max_real : float
+               maximum of the real part of the impedance without
+               alterations, refer to renderer.PlotRenderer.update
+    rgb : tuple of array-like
+          (red, green, blue) arrays of the rgb plot, None for an unused
+          channel, refer to rgb_channels. If None, the logarithm of the
+          frequency and the real and imaginary parts of impedance.
+    alteration, scatter, transparent : refer to file_writer.save_plots
+    '''
+    impedance = np.asarray(impedance)
+    for plot, folder in folders.items():
+        if plot == 'rgb':
+            if rgb is None:
+                rgb = (np.log10(freq), impedance.real, impedance.imag)
+            rgb_plot(*rgb, save_image=True, save_location=folder,
+                     filename=filename + PLOT_FOLDERS[plot][1])
+        else:
+            path = '{}{}{}.png'.format(folder, filename,
+                                       PLOT_FOLDERS[plot][1])
+            get_renderer(plot, scatter=scatter and plot == 'nyquist',
+                         alteration=alteration, transparent=transparent
+                         ).save(path, freq, impedance, max_real)
+
+
+def _render_chunk(folders, chunk):
+    '''
+    Function run by the workers, which saves the plots of a chunk of
+    spectra and returns their number.
+    '''
+    for filename, freq, impedance, max_real, rgb, options in chunk:
+        render_spectrum(folders, filename, freq, impedance, max_real, rgb,
+                        **options)
+    return len(chunk)
+
+
+class RenderPool:
+    '''
+    Pool of worker processes saving the plots of simulated spectra, used as
+    a context manager. The spectra are sent by submit in chunks, while the
+    workers render the plots of the previous ones with the renderers they
+    keep, so that the simulation and the rendering overlap. The number of
+    chunks waiting to be rendered is bounded: submit blocks when the queue
+    is full, which bounds the memory of long runs. The folders of the plots
+    are created once, when the pool is created. The plots are the ones
+    saved by file_writer.save_plots with axis_off and save_image.
+
+    Example
+    ----------
+    with RenderPool('simulation_data/', plot_type='all') as pool:
+        for filename, impedance in spectra:
+            pool.submit(filename, freq, impedance)
+
+    Parameters
+    ----------
+    save_location : str
+                    folder of the simulation, refer to plot_folders
+    plot_type : str
+                plots to save, refer to plot_folders
+    n_workers : int
+                number of worker processes. If None, the number of CPUs. If
+                0, the plots are rendered in the calling process.
+    chunk_size : int
+                 number of spectra sent to a worker at a time
+    max_pending : int
+                  maximum number of chunks sent and not yet rendered. If
+                  None, two per worker.
+    alteration, scatter, transparent : refer to file_writer.save_plots,
+                                       the default options of the spectra
+    '''
+
+    def __init__(self, save_location='simulation_data/', plot_type='nyquist',
+                 n_workers=None, chunk_size=64, max_pending=None,
+                 alteration=None, scatter=None, transparent=None):
+        assert chunk_size > 0, 'the chunk size should be positive.'
+        self.save_location = save_location
+        self.plot_type = plot_type
+        self.folders = plot_folders(save_location, plot_type)
+        self.options = {'alteration': alteration, 'scatter': scatter,
+                        'transparent': transparent}
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or 2*max(self.n_workers, 1)
+        self.n_rendered = 0
+        self._chunk = []
+        self._pending = set()
+        self._executor = None
+        if self.n_workers > 0:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.n_workers, mp_context=_context)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(wait=exc_type is None)
+
+    def submit(self, filename, freq, impedance, max_real=None, rgb=None,
+               **options):
+        '''
+        Function that adds a spectrum to the plots to save.
+
+        Parameters
+        ----------
+        filename, freq, impedance, max_real, rgb : refer to render_spectrum
+        options : keyword arguments
+                  alteration, scatter and transparent of the spectrum,
+                  replacing the ones of the pool
+        '''
+        unknown = set(options) - set(self.options)
+        if unknown:
+            raise AssertionError('Unknown options: {}'.format(
+                                 ', '.join(sorted(unknown))))
+        self._chunk.append((filename, np.asarray(freq),
+                            np.asarray(impedance), max_real, rgb,
+                            dict(self.options, **options)))
+        if len(self._chunk) >= self.chunk_size:
+            self._dispatch()
+
+    def _dispatch(self):
+        '''
+        Function that sends the current chunk to the workers, after waiting
+        for a place in the queue.
+        '''
+        chunk, self._chunk = self._chunk, []
+        if not chunk:
+            return
+        if self._executor is None:
+            self.n_rendered += _render_chunk(self.folders, chunk)
+            return
+        while len(self._pending) >= self.max_pending:
+            self._collect(concurrent.futures.FIRST_COMPLETED)
+        self._pending.add(self._executor.submit(
+            _render_chunk, self.folders, chunk))
+
+    def _collect(self, return_when):
+        '''
+        Function that waits for chunks to be rendered, raising the errors
+        of the workers.
+        '''
+        done, self._pending = concurrent.futures.wait(
+            self._pending, return_when=return_when)
+        for future in done:
+            self.n_rendered += future.result()
+
+    def close(self, wait=True):
+        '''
+        Function that renders the remaining spectra and stops the workers.
+
+        Parameters
+        ----------
+        wait : bool
+               If False, the spectra not yet rendered are dropped.
+        '''
+        if wait:
+            self._dispatch()
+            if self._pending:
+                self._collect(concurrent.futures.ALL_COMPLETED)
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+
+def render_batch(filenames, freq, impedance, save_location='simulation_data/',
+                 plot_type='nyquist', max_real=None, **pool_options):
+    '''
+    Function that saves the plots of a batch of spectra over a RenderPool.
+
+    Parameters
+    ----------
+    filenames : list of str
+                name of each spectrum
+    freq : array-like
+           (F,) frequency shared by the spectra, or (N, F) [Hz]
+    impedance : array-like
+                (N, F) complex impedance [ohm]
+    save_location, plot_type : refer to plot_folders
+    max_real : array-like
+               (N,) maximum of the real part of the impedance of each
+               spectrum without alterations, refer to render_spectrum
+    pool_options : keyword arguments
+                   n_workers, chunk_size, max_pending, alteration, scatter
+                   and transparent, refer to RenderPool
+
+    Returns
+    ----------
+    n_rendered : int
+                 number of spectra rendered
+    '''
+    impedance = np.atleast_2d(impedance)
+    freq = np.broadcast_to(freq, impedance.shape)
+    assert len(filenames) == len(impedance), 'one filename should be given\
+ per spectrum.'
+    with RenderPool(save_location, plot_type, **pool_options) as pool:
+        for i, filename in enumerate(filenames):
+            pool.submit(filename, freq[i], impedance[i],
+                        None if max_real is None else max_real[i])
+    return pool.n_rendered
@@ -0,0 +1,233 @@
+import struct
+import zlib
+
+import numpy as np
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .rasterize import _data_limits
+
+# Size [in] of the figures of plotting.nyquist_plot and log_freq_plot, and
+# the position of their axes with the default subplot parameters. The
+# renderers use a figure with the size of the axes plus the padding of
+# savefig(bbox_inches='tight'), so that they save the same axis-off images
+# without computing the tight bounding box at each save.
+FIGURE_SIZES = {'nyquist': (6, 6), 'log_freq': (6, 5)}
+SUBPLOT = {'left': 0.125, 'right': 0.9, 'bottom': 0.11, 'top': 0.88}
+PAD_INCHES = 0.1
+
+# (plot_type, options) -> PlotRenderer of the process
+_renderers = {}
+
+
+class PlotRenderer:
+    '''
+    Matplotlib Agg figure rendering the axis-off plots of
+    plotting.nyquist_plot and log_freq_plot, reused for every image. The
+    figure, its axes and its lines are created once, and each spectrum only
+    updates the data of the lines and the axis limits before the canvas is
+    saved. The pyplot module and its global state are not used, so
+    renderers can be kept by each worker process, refer to get_renderer.
+
+    Parameters
+    ----------
+    plot_type : str
+                'nyquist' or 'log_freq'
+    scatter : bool
+              If True, the points of the Nyquist plot are not joined by
+              lines, as with the 'scatter' option of nyquist_plot.
+    alteration : bool
+                 If True, the Nyquist plot is drawn in blue, as the altered
+                 data and the scatter plots in nyquist_plot.
+    transparent : bool
+                  Removes the background of the images.
+    dpi : int
+          resolution of the images
+    compress_level : int
+                     zlib compression level of the .png files, refer to
+                     encode_png
+    '''
+
+    def __init__(self, plot_type='nyquist', scatter=False, alteration=False,
+                 transparent=False, dpi=100, compress_level=3):
+        if plot_type not in FIGURE_SIZES:
+            raise AssertionError('The plot type should be one of {}'.format(
+                                 ', '.join(FIGURE_SIZES)))
+        self.plot_type = plot_type
+        self.compress_level = compress_level
+        width, height = FIGURE_SIZES[plot_type]
+        axes_width = width*(SUBPLOT['right'] - SUBPLOT['left'])
+        axes_height = height*(SUBPLOT['top'] - SUBPLOT['bottom'])
+        fig_width = axes_width + 2*PAD_INCHES
+        fig_height = axes_height + 2*PAD_INCHES
+
+        self.figure = Figure(figsize=(fig_width, fig_height), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_axes([
+            PAD_INCHES/fig_width, PAD_INCHES/fig_height,
+            axes_width/fig_width, axes_height/fig_height])
+        self.axes.set_axis_off()
+        if transparent:
+            self.figure.patch.set_alpha(0)
+            self.axes.patch.set_alpha(0)
+
+        # the line style of the plotting module
+        style = {'linewidth': 1, 'markersize': 4, 'markeredgewidth': 1}
+        if plot_type == 'nyquist':
+            self.lines = self.axes.plot(
+                [], [], 'o', linestyle='' if scatter else '--',
+                color='b' if alteration or scatter else 'C0', **style)
+        else:
+            self.axes.set_xscale('log')
+            self.lines = self.axes.plot([], [], 'bo--', [], [], 'ro--',
+                                        **style)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self.plot_type)
+
+    def update(self, freq, impedance, max_real=None):
+        '''
+        Function that draws a spectrum in the figure, with the axis limits
+        of nyquist_plot or log_freq_plot.
+
+        Parameters
+        ----------
+        freq : array-like
+               (F,) frequency [Hz]
+        impedance : array-like
+                    (F,) complex impedance [ohm]
+        max_real : float
+                   maximum of the real part of the impedance without
+                   alterations, which sets the top of the Nyquist plot. If
+                   None, the maximum of the real part of impedance.
+        '''
+        impedance = np.asarray(impedance)
+        x, y = impedance.real, -impedance.imag
+        if self.plot_type == 'nyquist':
+            self.lines[0].set_data(x, y)
+            x_low, x_high = _data_limits(x)
+            y_low, y_high = _data_limits(y)
+            if max_real is None:
+                max_real = np.max(x[np.isfinite(x)])
+            self.axes.set_xlim(-0.10, x_high)
+            self.axes.set_ylim(y_low, 1.1*max_real)
+        else:
+            freq = np.asarray(freq)
+            self.lines[0].set_data(freq, x)
+            self.lines[1].set_data(freq, y)
+            # the margins of a logarithmic axis are in logarithmic units
+            x_low, x_high = _data_limits(np.log10(freq))
+            y_low, y_high = _data_limits(np.concatenate([x, y]))
+            self.axes.set_xlim(10**x_low, 10**x_high)
+            self.axes.set_ylim(y_low, y_high)
+        return self
+
+    def save(self, filename, freq, impedance, max_real=None):
+        '''
+        Function that draws a spectrum, refer to update, and saves the image
+        as a .png file.
+
+        Parameters
+        ----------
+        filename : str or file-like
+                   path of the .png file
+        '''
+        png = encode_png(self._draw(freq, impedance, max_real),
+                         self.compress_level)
+        if hasattr(filename, 'write'):
+            filename.write(png)
+        else:
+            with open(filename, 'wb') as png_file:
+                png_file.write(png)
+
+    def to_array(self, freq, impedance, max_real=None):
+        '''
+        Function that draws a spectrum, refer to update, and returns the
+        (H, W, 4) RGBA image.
+        '''
+        return self._draw(freq, impedance, max_real).copy()
+
+    def _draw(self, freq, impedance, max_real):
+        '''
+        Function that draws a spectrum and returns a view of the RGBA buffer
+        of the canvas, valid until the next drawing.
+        '''
+        self.update(freq, impedance, max_real)
+        self.canvas.draw()
+        return np.asarray(self.canvas.buffer_rgba())
+
+
+def _png_chunk(chunk_type, data):
+    '''
+    Function that returns a chunk of a .png file, with its length and CRC.
+    '''
+    return struct.pack('>I', len(data)) + chunk_type + data + \
+        struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def encode_png(image, compress_level=3):
+    '''
+    Function that encodes an 8-bit image as a .png file. The rows are not
+    filtered before the zlib compression, which makes the encoding several
+    times faster than with the adaptive filters of matplotlib and PIL for
+    the plots with a uniform background, at the cost of slightly larger
+    files.
+
+    Parameters
+    ----------
+    image : numpy.ndarray
+            (H, W) grayscale, (H, W, 3) RGB or (H, W, 4) RGBA uint8 image
+    compress_level : int
+                     zlib compression level, from 0 (no compression) to 9
+
+    Returns
+    ----------
+    png : bytes
+          content of the .png file
+    '''
+    image = np.asarray(image)
+    assert image.dtype == np.uint8, 'the image should be an 8-bit array.'
+    height, width = image.shape[:2]
+    channels = image.shape[2] if image.ndim == 3 else 1
+    color_types = {1: 0, 3: 2, 4: 6}
+    assert channels in color_types, 'the image should be grayscale, RGB or\
+ RGBA.'
+    # each row starts with the byte of its filter, 0 for no filter
+    rows = np.zeros((height, 1 + width*channels), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, -1)
+    header = struct.pack('>IIBBBBB', width, height, 8, color_types[channels],
+                         0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', header) + \
+        _png_chunk(b'IDAT', zlib.compress(rows.tobytes(), compress_level)) + \
+        _png_chunk(b'IEND', b'')
+
+
+def response_arrays(response, alteration=None):
+    '''
+    Function that returns the frequency, the plotted impedance and the
+    maximum of the real part of the impedance without alterations of a
+    dataframe returned by data_simulation.circuit_simulation, as plotted by
+    the plotting module.
+    '''
+    if alteration:
+        impedance = response['Re_Z_noise [ohm]'].to_numpy() + \
+            1j*response['Im_Z_noise [ohm]'].to_numpy()
+    else:
+        impedance = response['complex_Z [ohm]'].to_numpy()
+    return (response['freq [Hz]'].to_numpy(), impedance,
+            response['Re_Z [ohm]'].max())
+
+
+def get_renderer(plot_type='nyquist', scatter=False, alteration=False,
+                 transparent=False, dpi=100):
+    '''
+    Function that returns the renderer of the process with the given
+    options, created the first time it is requested. Refer to PlotRenderer
+    for the parameters.
+    '''
+    key = (plot_type, bool(scatter), bool(alteration), bool(transparent),
+           dpi)
+    if key not in _renderers:
+        _renderers[key] = PlotRenderer(*key)
+    return _renderers[key]
@@ -0,0 +1,180 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+# Random streams are derived from a run seed with numpy.random.SeedSequence.
+# The stream of each sample is keyed by its index in the dataset, so a
+# sample can be regenerated alone, whatever the shard or the worker process
+# that generated it. The run seed can be selected with the EISY_SEED
+# environment variable or with set_seed.
+# Each kind of stream has its own part of the key space below the run seed,
+# so that the stream of a sample never repeats the one of a worker or of the
+# default generator of a process: (0, index) for the samples, (1, i) for the
+# workers and (2, process ID) for the default generators of the workers.
+_SAMPLE, _WORKER, _PROCESS = 0, 1, 2
+_run_seed = os.environ.get('EISY_SEED')
+_run_seed = int(_run_seed) if _run_seed else None
+# (process ID, generator) of default_generator
+_generator = None
+
+
+def set_seed(seed):
+    '''
+    Function that sets the run seed, from which the random streams of the
+    alterations are derived when no seed is given to them.
+
+    Parameters
+    ----------
+    seed : int or None
+           the run seed. If None, fresh entropy is drawn, and recorded by
+           get_seed so that the run can be reproduced.
+    '''
+    global _run_seed, _generator
+    if seed is not None and not isinstance(seed, (int, np.integer)):
+        raise AssertionError('The seed should be an integer')
+    _run_seed = None if seed is None else int(seed)
+    _generator = None
+
+
+def get_seed():
+    '''
+    Function that returns the run seed, drawing it from fresh entropy the
+    first time it is needed if no seed was set.
+    '''
+    global _run_seed
+    if _run_seed is None:
+        _run_seed = int(np.random.SeedSequence().entropy)
+    return _run_seed
+
+
+def seed_sequence(seed=None):
+    '''
+    Function that returns the numpy.random.SeedSequence of a seed.
+
+    Parameters
+    ----------
+    seed : int, numpy.random.SeedSequence or None
+           the seed. If None, the run seed of get_seed.
+    '''
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(get_seed() if seed is None else seed)
+
+
+def _child(parent, kind, index):
+    '''
+    Function that returns the seed keyed by (kind, index) below a parent
+    seed, without spawning the other children of the parent.
+    '''
+    return np.random.SeedSequence(
+        parent.entropy, spawn_key=parent.spawn_key + (kind, int(index)),
+        pool_size=parent.pool_size)
+
+
+def worker_seeds(n_workers, seed=None):
+    '''
+    Function that spawns the independent seeds of the worker processes of a
+    run, to be passed to the workers instead of sharing the state of a
+    random number generator.
+
+    Parameters
+    ----------
+    n_workers : int
+                number of workers
+    seed : int, numpy.random.SeedSequence or None
+           seed of the run, refer to seed_sequence
+
+    Returns
+    ----------
+    seeds : list of numpy.random.SeedSequence
+            one independent seed per worker
+    '''
+    parent = seed_sequence(seed)
+    return [_child(parent, _WORKER, i) for i in range(n_workers)]
+
+
+def sample_seed(index, seed=None):
+    '''
+    Function that returns the seed of the random stream of a sample, keyed
+    by its index in the dataset. It is computed without spawning the seeds
+    of the other samples, and differs from the seeds of worker_seeds.
+
+    Parameters
+    ----------
+    index : int
+            index of the sample in the dataset
+    seed : int, numpy.random.SeedSequence or None
+           seed of the run, refer to seed_sequence
+
+    Returns
+    ----------
+    seed : numpy.random.SeedSequence
+           seed of the sample
+    '''
+    return _child(seed_sequence(seed), _SAMPLE, index)
+
+
+def sample_generators(indices, seed=None):
+    '''
+    Function that returns the random number generators of the samples with
+    the given indices, refer to sample_seed.
+
+    Parameters
+    ----------
+    indices : array-like of int
+              indices of the samples in the dataset
+    seed : int, numpy.random.SeedSequence or None
+           seed of the run, refer to seed_sequence
+
+    Returns
+    ----------
+    generators : list of numpy.random.Generator
+                 one generator per sample
+    '''
+    parent = seed_sequence(seed)
+    return [np.random.default_rng(sample_seed(index, parent))
+            for index in np.ravel(indices)]
+
+
+def default_generator():
+    '''
+    Function that returns the random number generator of the process, seeded
+    by the run seed, used by the alterations when neither a seed nor sample
+    indices are given. Worker processes derive their generator from their
+    process ID, so that they do not repeat the stream of the main process
+    or of each other. Their draws can only be reproduced with the seeds of
+    worker_seeds or sample_generators.
+    '''
+    global _generator
+    pid = os.getpid()
+    if _generator is None or _generator[0] != pid:
+        sequence = seed_sequence()
+        if multiprocessing.parent_process() is not None:
+            sequence = _child(sequence, _PROCESS, pid)
+        _generator = (pid, np.random.default_rng(sequence))
+    return _generator[1]
+
+
+def generators(seed=None, sample_index=None):
+    '''
+    Function that returns the random number generator(s) of an alteration.
+
+    Parameters
+    ----------
+    seed : int, numpy.random.SeedSequence, numpy.random.Generator or None
+           seed of the alteration. If None, the run seed is used.
+    sample_index : array-like of int or None
+                   indices of the altered samples in the dataset. If given,
+                   one generator per sample is returned (refer to
+                   sample_generators), otherwise a single generator: the one
+                   of the seed, or default_generator if seed is None.
+    '''
+    if sample_index is not None:
+        if isinstance(seed, np.random.Generator):
+            raise AssertionError('The streams of the samples are derived '
+                                 'from a seed, not from a Generator')
+        return sample_generators(sample_index, seed)
+    if seed is None:
+        return default_generator()
+    return np.random.default_rng(seed)
@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+from . import circuits
+
+
+class ImpedanceSpectrum:
+    '''
+    Impedance spectrum stored as two contiguous arrays, the frequency [Hz]
+    and the complex impedance [ohm]. The angular frequency, the modulus and
+    the phase angle of the impedance are computed when first accessed and
+    then cached, while the real and imaginary parts are views of the complex
+    impedance. Instances are lighter than the lists returned by
+    data_simulation.impedance_array and than DataFrames, which are created
+    only by to_dataframe.
+
+    Parameters
+    ----------
+    freq : array-like
+           (F,) frequency [Hz]
+    impedance : array-like
+                (F,) complex impedance [ohm]. Its dtype is kept, so complex64
+                spectra stay in single precision.
+    '''
+    __slots__ = ('freq', 'impedance', '_angular_freq', '_modulus', '_phase')
+
+    def __init__(self, freq, impedance):
+        impedance = np.asarray(impedance)
+        if not np.iscomplexobj(impedance):
+            impedance = impedance.astype(complex)
+        self.impedance = np.ascontiguousarray(impedance)
+        self.freq = np.ascontiguousarray(
+            freq, dtype=self.impedance.real.dtype)
+        assert self.freq.shape == self.impedance.shape[-1:], 'the impedance\
+ and the frequency range do not match in length.'
+        self._angular_freq = None
+        self._modulus = None
+        self._phase = None
+
+    def __len__(self):
+        return self.freq.shape[0]
+
+    def __repr__(self):
+        return '{}({} frequencies, {})'.format(
+            type(self).__name__, len(self.freq), self.impedance.dtype)
+
+    @classmethod
+    def from_freq_range(cls, freq_range, impedance):
+        '''
+        Function that creates a spectrum from a frequency range, as returned
+        by circuits.freq_gen, or from its ID.
+        '''
+        if isinstance(freq_range, str):
+            freq_range = circuits.get_freq_grid(freq_range)
+        spectrum = cls(freq_range[0], impedance)
+        if spectrum.freq.dtype == freq_range[1].dtype:
+            spectrum._angular_freq = freq_range[1]
+        return spectrum
+
+    @classmethod
+    def from_dataframe(cls, dataframe):
+        '''
+        Function that creates a spectrum from a DataFrame returned by
+        data_simulation.to_dataframe or circuit_simulation.
+        '''
+        return cls(dataframe['freq [Hz]'].to_numpy(),
+                   dataframe['complex_Z [ohm]'].to_numpy())
+
+    @property
+    def angular_freq(self):
+        '''angular frequency [1/s]'''
+        if self._angular_freq is None:
+            self._angular_freq = 2*np.pi*self.freq
+        return self._angular_freq
+
+    @property
+    def real(self):
+        '''real part of the impedance [ohm], a view of the impedance'''
+        return self.impedance.real
+
+    @property
+    def imag(self):
+        '''imaginary part of the impedance [ohm], a view of the impedance'''
+        return self.impedance.imag
+
+    @property
+    def modulus(self):
+        '''modulus of the impedance |Z| [ohm]'''
+        if self._modulus is None:
+            self._modulus = np.abs(self.impedance)
+        return self._modulus
+
+    @property
+    def phase(self):
+        '''phase angle of the impedance [rad], as in impedance_array'''
+        if self._phase is None:
+            self._phase = np.arctan(self.imag/self.real)
+        return self._phase
+
+    def to_dataframe(self, copy=False):
+        '''
+        Function that returns the spectrum as a DataFrame with the columns
+        of data_simulation.to_dataframe.
+
+        Parameters
+        ----------
+        copy : bool
+               If False, the columns share the memory of the arrays of the
+               spectrum where pandas allows it, instead of being copied.
+
+        Returns
+        ----------
+        impedance_response_df: pandas.DataFrame
+                               pandas dataframe containing frequency and
+                               impedance data.
+        '''
+        return pd.DataFrame({'freq [Hz]': self.freq,
+                             'angular_freq [1/s]': self.angular_freq,
+                             'complex_Z [ohm]': self.impedance,
+                             'Re_Z [ohm]': self.real,
+                             'Im_Z [ohm]': self.imag,
+                             '|Z| [ohm]': self.modulus,
+                             'phase_angle [rad]': self.phase}, copy=copy)
+
+
+class SpectrumBatch(ImpedanceSpectrum):
+    '''
+    Stack of N impedance spectra sharing the same frequency range, stored as
+    the (F,) frequency and the (N, F) complex impedance. The derived
+    quantities are computed for the whole stack when first accessed, as in
+    ImpedanceSpectrum. Indexing a batch with an integer returns the
+    ImpedanceSpectrum of a single spectrum, and with a slice or an array a
+    smaller batch. Only the integer and slice indexing share the memory of
+    the batch: an array of indices or a boolean mask copies the spectra.
+
+    Parameters
+    ----------
+    freq : array-like
+           (F,) frequency [Hz]
+    impedance : array-like
+                (N, F) complex impedance [ohm]
+    '''
+    __slots__ = ()
+
+    def __init__(self, freq, impedance):
+        super().__init__(freq, np.atleast_2d(impedance))
+        assert self.impedance.ndim == 2, 'the impedance of a batch should be\
+ a (N, F) array.'
+
+    def __len__(self):
+        return self.impedance.shape[0]
+
+    def __repr__(self):
+        return '{}({} spectra x {} frequencies, {})'.format(
+            type(self).__name__, len(self), len(self.freq),
+            self.impedance.dtype)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if np.ndim(index) == 0 and not isinstance(index, slice):
+            spectrum = ImpedanceSpectrum(self.freq, self.impedance[index])
+        else:
+            spectrum = SpectrumBatch(self.freq, self.impedance[index])
+        # the frequency is shared, so is its cached angular frequency
+        spectrum._angular_freq = self._angular_freq
+        return spectrum
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        '''
+        Function that creates a batch from a Dataset returned by
+        dataset_generator.generate_dataset or iter_dataset.
+        '''
+        return cls.from_freq_range(dataset.grid_id, dataset.impedance)
+
+    @classmethod
+    def from_dataframes(cls, dataframes):
+        '''
+        Function that creates a batch from a list of DataFrames of spectra
+        measured over the same frequency range, as returned by
+        circuit_simulation.
+        '''
+        freq = dataframes[0]['freq [Hz]'].to_numpy()
+        impedance = np.stack([dataframe['complex_Z [ohm]'].to_numpy()
+                              for dataframe in dataframes])
+        return cls(freq, impedance)
+
+    def to_dataframe(self, index=None, copy=False):
+        '''
+        Function that returns the spectra as a DataFrame with the columns of
+        data_simulation.to_dataframe. The frequency and angular frequency
+        are repeated for each spectrum, and a 'spectrum' column gives the
+        position of the spectrum in the batch.
+
+        Parameters
+        ----------
+        index : int
+                If given, only the spectrum with this index is returned,
+                without the 'spectrum' column and sharing the memory of the
+                batch as ImpedanceSpectrum.to_dataframe.
+        copy : bool
+               refer to ImpedanceSpectrum.to_dataframe
+
+        Returns
+        ----------
+        impedance_response_df: pandas.DataFrame
+                               pandas dataframe containing frequency and
+                               impedance data.
+        '''
+        if index is not None:
+            return self[index].to_dataframe(copy=copy)
+        n_spectra, n_freq = self.impedance.shape
+        return pd.DataFrame({
+            'spectrum': np.repeat(np.arange(n_spectra), n_freq),
+            'freq [Hz]': np.tile(self.freq, n_spectra),
+            'angular_freq [1/s]': np.tile(self.angular_freq, n_spectra),
+            'complex_Z [ohm]': self.impedance.ravel(),
+            'Re_Z [ohm]': self.real.ravel(),
+            'Im_Z [ohm]': self.imag.ravel(),
+            '|Z| [ohm]': self.modulus.ravel(),
+            'phase_angle [rad]': self.phase.ravel()}, copy=copy)
@@ -0,0 +1,78 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.alterations as alterations
+import eisy.simulation.circuits as circuits
+from eisy.simulation.alteration_pipeline import AlterationPipeline
+from eisy.simulation.data_simulation import batch_simulation
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+Rs = np.linspace(1, 10, 200)
+impedance = batch_simulation(freq_range, 'RsRC', Rs=Rs, Rp=100, C=1e-5)
+
+
+class TestAlterationPipeline(unittest.TestCase):
+
+    def test_stages(self):
+        # a single stage gives the batch function of the alterations module
+        for alteration, params, batch_function in (
+                ('complex_noise', {'noise_amplitude': 0.1},
+                 alterations.batch_complex_noise),
+                ('voltage_noise', {'noise_amplitude': 0.1},
+                 alterations.batch_voltage_noise),
+                ('current_noise', {'noise_amplitude': 0.1},
+                 alterations.batch_current_noise),
+                ('outliers', {'percentage_outliers': 0.1,
+                              'outliers_amplitude': 2},
+                 alterations.batch_outliers)):
+            pipeline = AlterationPipeline([(alteration, params)])
+            np.testing.assert_allclose(
+                pipeline(impedance, seed=2),
+                batch_function(impedance, *params.values(), seed=2),
+                rtol=1e-12)
+
+        pipeline = AlterationPipeline().add(
+            'complex_noise', noise_amplitude=0.05).add(
+            'current_noise', noise_amplitude=0.05).add(
+            lambda impedance, rng, offset: impedance + offset, offset=1).add(
+            'outliers', percentage_outliers=0.05, outliers_amplitude=0.5)
+        assert len(pipeline) == 4
+        altered = pipeline(impedance.astype(np.complex64), seed=1)
+        assert altered.dtype == np.complex64
+        assert altered.shape == impedance.shape
+        np.testing.assert_array_equal(
+            altered, pipeline(impedance.astype(np.complex64), seed=1))
+        shifted = AlterationPipeline().add(
+            lambda impedance, rng, offset: impedance + offset, offset=1)
+        np.testing.assert_allclose(shifted(impedance), impedance + 1)
+
+        with self.assertRaises(AssertionError):
+            pipeline.add('drift')
+        with self.assertRaises(AssertionError):
+            pipeline.add('outliers', percentage_outliers=0.1)
+        with self.assertRaises(AssertionError):
+            pipeline.add('complex_noise', noise_amplitude=0.1, scale=2)
+        with self.assertRaises(AssertionError):
+            pipeline.add('freq_noise')
+
+    def test_simulate(self):
+        pipeline = AlterationPipeline().add('freq_noise').add(
+            'complex_noise', noise_amplitude=0.05)
+        with self.assertRaises(AssertionError):
+            pipeline(impedance)
+        batch = pipeline.simulate(freq_range, 'RsRC', seed=3,
+                                  sample_index=np.arange(200), Rs=Rs,
+                                  Rp=100, C=1e-5)
+        assert batch.freq.shape == batch.impedance.shape == impedance.shape
+        clean = circuits.cir_RsRC(batch.angular_freq, Rs=Rs, Rp=100,
+                                  C=1e-5)
+        noise = (batch.impedance - clean)/(0.05*clean[:, -1:].real)
+        assert abs(np.std(noise.real) - np.sqrt(0.5)) < 0.05
+        # a spectrum is regenerated alone from its index
+        single = pipeline.simulate(freq_range, 'RsRC', seed=3,
+                                   sample_index=[42], Rs=Rs[42], Rp=100,
+                                   C=1e-5)
+        np.testing.assert_array_equal(single.impedance[0],
+                                      batch.impedance[42])
+        np.testing.assert_array_equal(single.freq[0], batch.freq[42])
@@ -95,6 +95,35 @@ class TestSimulationTools(unittest.TestCase):
         assert 'Im_Z_noise [ohm]' in list(noisy_dataframe), \
             'the computed noisy data was not saved in the dataframe'
 
+    def test_batch_noise(self):
+        impedance = data_simulation.batch_simulation(
+            freq_range, 'RC_parallel', R=np.full(1000, Rs), C=C)
+        for noise_function, scale in (
+                (alterations.batch_complex_noise, impedance[:, -1:].real),
+                (alterations.batch_voltage_noise, impedance[:, -1:].real),
+                (alterations.batch_current_noise, None)):
+            noisy = noise_function(impedance, 0.1, seed=3)
+            assert noisy.shape == impedance.shape
+            np.testing.assert_array_equal(
+                noisy, noise_function(impedance, 0.1, seed=3))
+            assert not np.array_equal(
+                noisy, noise_function(impedance, 0.1, seed=4))
+            single = noise_function(impedance.astype(np.complex64), 0.1,
+                                    seed=3)
+            assert single.dtype == np.complex64
+            if scale is not None:
+                # normal amplitude and uniform phase: the real part of the
+                # noise has a standard deviation of scale/sqrt(2)
+                noise = (noisy - impedance)/(0.1*scale)
+                assert abs(np.std(noise.real) - np.sqrt(0.5)) < 0.01
+                assert abs(np.mean(noise.real)) < 0.01
+        dataframe = alterations.complex_noise(circuit_response.copy(), 0.1,
+                                              seed=3)
+        np.testing.assert_allclose(
+            dataframe['Re_Z_noise [ohm]'],
+            alterations.batch_complex_noise(
+                circuit_response['complex_Z [ohm]'], 0.1, seed=3).real)
+
     def test_outliers(self):
         percent_outliers = 0.10
         outliers_amplitude = 2
@@ -116,6 +145,44 @@ class TestSimulationTools(unittest.TestCase):
         assert 'Im_Z_noise [ohm]' in list(noisy_dataframe), \
             'the computed noisy data was not saved in the dataframe'
 
+    def test_batch_outliers(self):
+        impedance = data_simulation.batch_simulation(
+            freq_range, 'RC_parallel', R=np.full(1000, Rs), C=C)
+        noisy = alterations.batch_outliers(impedance, 0.1, 2, seed=3)
+        np.testing.assert_array_equal(
+            noisy, alterations.batch_outliers(impedance, 0.1, 2, seed=3))
+        # the fraction of outliers follows percentage_outliers
+        assert abs(np.mean(noisy != impedance) - 0.1) < 0.01
+        shift = np.abs(noisy - impedance)
+        assert np.all(shift <= 2*impedance[:, -1:].real + 1e-9)
+        assert alterations.batch_outliers(
+            impedance.astype(np.complex64), 0.1, 2).dtype == np.complex64
+        dataframe = alterations.outliers(circuit_response.copy(), 0.1, 2,
+                                         seed=3)
+        np.testing.assert_allclose(
+            dataframe['Im_Z_noise [ohm]'],
+            alterations.batch_outliers(circuit_response['complex_Z [ohm]'],
+                                       0.1, 2, seed=3).imag)
+
+    def test_frequency_noise(self):
+        freq, angular_freq = freq_range
+        f_noise, w_noise = alterations.frequency_noise(
+            np.tile(freq, (100, 1)), angular_freq, 0.4, seed=3)
+        assert f_noise.shape == w_noise.shape == (100, len(freq))
+        odd = np.isclose(f_noise, freq + 0.4*freq*np.sin(freq))
+        assert np.all(odd | np.isclose(f_noise, freq + 0.4*freq*np.cos(freq)))
+        # 9 of the 14 Fibonacci numbers drawn are odd
+        assert abs(np.mean(odd) - 9/14) < 0.02
+        np.testing.assert_allclose(
+            w_noise[odd], (angular_freq + 0.4*angular_freq *
+                           np.sin(angular_freq))[np.nonzero(odd)[1]])
+        f_single, _ = alterations.frequency_noise(
+            freq, angular_freq, 0.4, seed=3, sample_index=[7])
+        f_batch, _ = alterations.frequency_noise(
+            np.tile(freq, (10, 1)), angular_freq, 0.4, seed=3,
+            sample_index=range(10))
+        np.testing.assert_array_equal(f_single, f_batch[7])
+
     def test_normalize(self):
         to_normalized = circuit_response['Re_Z [ohm]']
         normalized_array = alterations.normalize(to_normalized)
@@ -0,0 +1,84 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.circuits as circuits
+from eisy.simulation.circuit_compiler import (compile_circuit, parse_circuit,
+                                              is_circuit_string)
+from eisy.simulation.data_simulation import (circuit_simulation,
+                                             batch_simulation)
+
+
+f_range = circuits.freq_gen(10**6, 0.01)
+RC = {'R': 100, 'C': 1E-6}
+RQ = {'R': 100, 'Q': 1E-6, 'alpha': 0.8}
+RsRC = {'Rs': 10, 'Rp': 100, 'C': 1E-6}
+RsRQ = {'Rs': 10, 'Rp': 100, 'Q': 1E-6, 'alpha': 0.8}
+RsRQRQ = {'Rs': 10, 'Rp1': 100, 'Q1': 1E-6, 'alpha1': 0.8, 'Rp2': 50,
+          'Q2': 1E-4, 'alpha2': 0.9}
+RsRCRC = {'Rs': 10, 'Rp1': 100, 'C1': 1E-6, 'Rp2': 50, 'C2': 1E-4}
+Randles = {'Rs': 10, 'Rp': 100, 'Q': 1E-6, 'alpha': 0.8, 'sigma': 500}
+
+equivalent_circuits = [('-(RC)-', circuits.cir_RC_parallel, RC),
+                       ('-R-C-', circuits.cir_RC_series, RC),
+                       ('-(RQ)-', circuits.cir_RQ_parallel, RQ),
+                       ('-R-Q-', circuits.cir_RQ_series, RQ),
+                       ('-Rs-(RpC)-', circuits.cir_RsRC, RsRC),
+                       ('-Rs-(RpQ)-', circuits.cir_RsRQ, RsRQ),
+                       ('-Rs-(Rp1Q1)-(Rp2Q2)-', circuits.cir_RsRQRQ, RsRQRQ),
+                       ('-Rs-(Rp1C1)-(Rp2C2)-', circuits.cir_RsRCRC, RsRCRC),
+                       ('-Rs-(Q[Rp-W])-', circuits.cir_Randles_simplified,
+                        Randles)]
+
+
+class TestCircuitCompiler(unittest.TestCase):
+
+    def test_equivalent_circuits(self):
+        for circuit_string, circuit_function, elements in equivalent_circuits:
+            compiled = compile_circuit(circuit_string)
+            assert set(compiled.parameters) == set(elements), \
+                'the parameters of {} are not correct'.format(circuit_string)
+            np.testing.assert_allclose(compiled(f_range[1], **elements),
+                                       circuit_function(f_range[1],
+                                                        **elements),
+                                       rtol=1e-10, err_msg=circuit_string)
+
+    def test_parse_circuit(self):
+        tree, parameters = parse_circuit('-Rs-(RQ)-(RQ)-')
+        assert parameters == ('Rs', 'R1', 'Q1', 'alpha1', 'R2', 'Q2',
+                              'alpha2'), \
+            'repeated unlabeled elements should be numbered'
+        assert tree[0] == 'series', 'the top level should be a series'
+        assert tree[1][1][0] == 'parallel', 'the RQ should be in parallel'
+
+        for invalid in ['-Rs-(Q-(RW)-)-', '-R-(C', '-R-C)-', '-Rs-Rs-',
+                        '-R-X-', '--']:
+            with self.assertRaises(AssertionError):
+                parse_circuit(invalid)
+
+    def test_compile_circuit(self):
+        compiled = compile_circuit('-Rs-(RQ)-(RQ)-')
+        assert compile_circuit('-Rs-(RQ)-(RQ)-') is compiled, \
+            'compiled circuits should be cached'
+
+        Rs = np.array([10, 20, 30])
+        response = compiled(f_range[1], Rs=Rs, R1=100, Q1=1E-6, alpha1=0.8,
+                            R2=50, Q2=1E-4, alpha2=0.9)
+        assert response.shape == (3, len(f_range[1])), \
+            'the batched response should be a (N, F) matrix'
+
+        resistor = compile_circuit('-R-')(f_range[1], R=10)
+        assert resistor.shape == f_range[1].shape, \
+            'the response should have one value per frequency'
+        with self.assertRaises(AssertionError):
+            compiled(f_range[1], Rs=10)
+
+    def test_simulation_from_string(self):
+        assert is_circuit_string('-Rs-(RC)-')
+        assert not is_circuit_string('RsRC')
+        dataframe = circuit_simulation(f_range, '-Rs-(RpC)-', **RsRC)
+        np.testing.assert_allclose(dataframe['complex_Z [ohm]'],
+                                   circuits.cir_RsRC(f_range[1], **RsRC),
+                                   rtol=1e-10)
+        impedance = batch_simulation(f_range, '-Rs-(RpC)-', Rs=[10, 20],
+                                     Rp=100, C=1E-6)
+        assert impedance.shape == (2, len(f_range[1]))
@@ -0,0 +1,98 @@
+import io
+import numpy as np
+import unittest
+
+import eisy.simulation.circuits as circuits
+from eisy.simulation import circuit_registry
+from eisy.fitting.least_squares import fit_circuit
+from eisy.simulation.circuit_registry import get_circuit, register_circuit, \
+    registered_circuits, unregister_circuit
+from eisy.simulation.data_simulation import batch_simulation, \
+    circuit_simulation
+from eisy.simulation.file_writer import simulation_filename, write_metadata
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+
+
+def cir_RL(angular_freq, **circuit_elements):
+    # arrays of N values are broadcast into (N, F) impedances
+    resistance = np.asarray(circuit_elements['R'])[..., np.newaxis]
+    inductance = np.asarray(circuit_elements['L'])[..., np.newaxis]
+    return resistance + 1j*angular_freq*inductance
+
+
+def jac_RL(angular_freq, **circuit_elements):
+    shape = np.broadcast_shapes(np.shape(circuit_elements['R']) + (1,),
+                                angular_freq.shape)
+    return {'R': np.ones(shape, dtype=complex),
+            'L': np.broadcast_to(1j*angular_freq, shape)}
+
+
+class TestCircuitRegistry(unittest.TestCase):
+
+    def tearDown(self):
+        for name in ('test_RsRQW', 'test_RL'):
+            if name in registered_circuits():
+                unregister_circuit(name)
+
+    def test_builtin_circuits(self):
+        assert registered_circuits() == tuple(circuits.CIRCUIT_ELEMENTS)
+        descriptor = get_circuit('RsRQ')
+        assert descriptor.elements == circuits.CIRCUIT_ELEMENTS['RsRQ']
+        assert descriptor.units == ('ohm', 'ohm', '[s^(alpha-1)/ohm]', '-')
+        assert descriptor.evaluator is circuits.cir_RsRQ
+        assert descriptor.file_tag == 'one'
+        assert get_circuit('Randles') is get_circuit('Randles_simplified')
+        df = circuit_simulation(freq_range, 'Randles', Rs=10, Rp=100, Q=1e-5,
+                                alpha=0.9, sigma=50)
+        np.testing.assert_allclose(
+            df['complex_Z [ohm]'],
+            circuits.cir_Randles_simplified(freq_range[1], Rs=10, Rp=100,
+                                            Q=1e-5, alpha=0.9, sigma=50))
+        with self.assertRaises(AssertionError):
+            get_circuit('RLC')
+        with self.assertRaises(AssertionError):
+            circuit_simulation(freq_range, 'RsRC', Rs=10, Rp=100, Q=1e-5)
+        with self.assertRaises(AssertionError):
+            register_circuit('RsRC', circuits.cir_RsRC, ('Rs', 'Rp', 'C'))
+
+    def test_register_circuit(self):
+        descriptor = register_circuit('test_RsRQW', '-Rs-(RQ)-W-',
+                                      file_tag='warburg', overwrite=True)
+        assert descriptor.elements == ('Rs', 'R', 'Q', 'alpha', 'sigma')
+        assert descriptor.jacobian is None
+        elements = {'Rs': 10, 'R': 100, 'Q': 1e-5, 'alpha': 0.9, 'sigma': 5}
+        np.testing.assert_allclose(
+            batch_simulation(freq_range, 'test_RsRQW', **elements)[0],
+            batch_simulation(freq_range, '-Rs-(RQ)-W-', **elements)[0])
+        # the circuit strings are cached without being registered
+        assert get_circuit('-Rs-(RQ)-W-') is get_circuit('-Rs-(RQ)-W-')
+        assert get_circuit('-Rs-(RQ)-W-').file_tag == 'custom'
+        assert '-Rs-(RQ)-W-' not in circuit_registry._CIRCUITS
+        filename, _ = simulation_filename('test_RsRQW', save_location='./')
+        assert filename.endswith('_sim_warburg_ideal')
+        data_file = io.StringIO()
+        write_metadata(data_file, '000000-00001', 'test_RsRQW', **elements)
+        assert 'Rs = 10 ohm;R = 100 ohm;Q = 1e-05 [s^(alpha-1)/ohm];' \
+            'alpha = 0.9 -;sigma = 5 -' in data_file.getvalue()
+        with self.assertRaises(AssertionError):
+            fit_circuit(freq_range[1], np.ones(len(freq_range[1])),
+                        'test_RsRQW', initial_guess=elements)
+        with self.assertRaises(AssertionError):
+            register_circuit('test_RL', cir_RL)
+
+        register_circuit('test_RL', cir_RL, ('R', 'L'), jacobian=jac_RL,
+                         overwrite=True)
+        assert get_circuit('test_RL').units == ('ohm', 'H')
+        assert 'test_RL' in registered_circuits(fittable=True)
+        with self.assertRaises(AssertionError):
+            unregister_circuit('RLC')
+        impedance = batch_simulation(freq_range, 'test_RL', R=[10, 20],
+                                     L=[1e-6, 1e-5])
+        result = fit_circuit(freq_range[1], impedance, 'test_RL',
+                             initial_guess={'R': 1, 'L': 1e-4})
+        np.testing.assert_allclose(result.parameters['R'], [10, 20],
+                                   rtol=1e-6)
+        np.testing.assert_allclose(result.parameters['L'], [1e-6, 1e-5],
+                                   rtol=1e-6)
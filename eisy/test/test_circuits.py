@@ -36,6 +36,40 @@ class TestSimulationTools(unittest.TestCase):
         assert len(f_range[0]) == len(f_range[1]), \
             'The output returned is invalid'
 
+    def test_freq_grid_registry(self):
+
+        grid_id = circuits.freq_grid_id(high_freq, low_freq, decades)
+        grid = circuits.freq_gen(high_freq, low_freq, decades)
+        assert grid[0] is f_range[0], 'the frequency range is not interned'
+        assert circuits.get_freq_grid(grid_id) is grid
+        assert not grid[1].flags.writeable, 'shared ranges are read-only'
+        with self.assertRaises(ValueError):
+            grid[0][0] = 1
+
+        # the ID depends only on the frequency values
+        assert circuits.register_freq_grid(list(grid[0])) == grid_id
+        measured = circuits.register_freq_grid([1, 10, 100])
+        np.testing.assert_allclose(circuits.get_freq_grid(measured)[1],
+                                   2*np.pi*np.array([1, 10, 100]))
+        assert measured != grid_id
+        with self.assertRaises(AssertionError):
+            circuits.get_freq_grid('unknown')
+
+    def test_freq_grid_registry_limit(self):
+
+        grid_id = circuits.freq_grid_id(high_freq, low_freq, decades)
+        first = circuits.register_freq_grid([0.5])
+        for i in range(circuits.MAX_FREQ_GRIDS):
+            circuits.register_freq_grid([i + 1.])
+        assert len(circuits._FREQ_GRIDS) == circuits.MAX_FREQ_GRIDS
+        # the least recently used ranges are dropped
+        with self.assertRaises(AssertionError):
+            circuits.get_freq_grid(first)
+        # the ranges of freq_gen are generated again when needed
+        grid = circuits.freq_gen(high_freq, low_freq, decades)
+        np.testing.assert_array_equal(grid[0], f_range[0])
+        assert circuits.get_freq_grid(grid_id) is grid
+
     def test_RC_parallel(self):
 
         response = circuits.cir_RC_parallel(f_range[1], R=Resistance,
@@ -246,3 +280,74 @@ class TestSimulationTools(unittest.TestCase):
             assert total_Z > Resistance, \
                 'The Impedance value returned is lower than the' +\
                 'Solution Resistance'
+
+    def test_batched_elements(self):
+
+        n_sets = 4
+        Rs = np.linspace(10, 40, n_sets)
+        Rp = np.linspace(100, 400, n_sets)
+        response = circuits.cir_RsRQ(f_range[1], Rs=Rs, Rp=Rp,
+                                     Q=Constant_phase_element, alpha=0.8)
+
+        assert response.shape == (n_sets, len(f_range[1])), \
+            'The batched response should be a (N, F) matrix'
+        for i in range(n_sets):
+            single = circuits.cir_RsRQ(f_range[1], Rs=Rs[i], Rp=Rp[i],
+                                       Q=Constant_phase_element, alpha=0.8)
+            np.testing.assert_allclose(response[i], single, rtol=1e-12,
+                                       err_msg='The batched response does '
+                                       'not match the single evaluation')
+
+    def test_batched_randles(self):
+
+        sigmas = np.array([100, 500, 1000])
+        response = circuits.cir_Randles_simplified(f_range[1],
+                                                   Rs=Resistance,
+                                                   Rp=Parallel_Resistance,
+                                                   alpha=alpha,
+                                                   sigma=sigmas,
+                                                   Q=Constant_phase_element)
+        assert response.shape == (len(sigmas), len(f_range[1])), \
+            'The batched response should be a (N, F) matrix'
+        single = circuits.cir_Randles_simplified(f_range[1],
+                                                 Rs=Resistance,
+                                                 Rp=Parallel_Resistance,
+                                                 alpha=alpha,
+                                                 sigma=sigmas[1],
+                                                 Q=Constant_phase_element)
+        np.testing.assert_allclose(response[1], single, rtol=1e-12)
+
+    def test_jacobians(self):
+
+        elements = {'R': Resistance, 'Rs': Resistance,
+                    'Rp': Parallel_Resistance, 'Rp1': Parallel_Resistance,
+                    'Rp2': 50, 'C': Capacitance, 'C1': Capacitance,
+                    'C2': 10**-4, 'Q': Constant_phase_element,
+                    'Q1': Constant_phase_element, 'Q2': 10**-4,
+                    'alpha': 0.8, 'alpha1': 0.9, 'alpha2': 0.7,
+                    'sigma': sigma}
+        for circuit_name, names in circuits.CIRCUIT_ELEMENTS.items():
+            circuit = getattr(circuits, 'cir_' + circuit_name)
+            jacobian_function = getattr(circuits, 'jac_' + circuit_name)
+            circuit_elements = {name: elements[name] for name in names}
+            jacobian = jacobian_function(f_range[1], **circuit_elements)
+            assert set(jacobian) == set(names), \
+                'A derivative should be returned for each circuit element'
+            for name in names:
+                step = 1e-6*circuit_elements[name]
+                upper = dict(circuit_elements)
+                upper[name] = circuit_elements[name] + step
+                lower = dict(circuit_elements)
+                lower[name] = circuit_elements[name] - step
+                finite_difference = (circuit(f_range[1], **upper) -
+                                     circuit(f_range[1], **lower))/(2*step)
+                np.testing.assert_allclose(
+                    jacobian[name], finite_difference, rtol=1e-5,
+                    atol=1e-8*np.max(np.abs(finite_difference)),
+                    err_msg='{} derivative of {}'.format(name, circuit_name))
+
+        Rs = np.array([10, 20])
+        jacobian = circuits.jac_RsRC(f_range[1], Rs=Rs,
+                                     Rp=Parallel_Resistance, C=Capacitance)
+        assert jacobian['Rs'].shape == (len(Rs), len(f_range[1])), \
+            'The batched derivatives should be (N, F) matrices'
@@ -0,0 +1,53 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.circuits as circuits
+import eisy.simulation.circuits_jit as circuits_jit
+from eisy.simulation.data_simulation import batch_simulation
+
+
+f_range = circuits.freq_gen(10**6, 0.01)
+n_sets = 5
+elements = {'R': np.linspace(10, 100, n_sets), 'Rs': 10, 'Rp': 100,
+            'Rp1': np.linspace(50, 150, n_sets), 'Rp2': 20, 'C': 1E-6,
+            'C1': 1E-6, 'C2': 1E-4, 'Q': np.logspace(-7, -5, n_sets),
+            'Q1': 1E-6, 'Q2': 1E-4, 'alpha': 0.8, 'alpha1': 0.9,
+            'alpha2': np.linspace(0.6, 1, n_sets), 'sigma': 500}
+
+
+class TestCircuitsJit(unittest.TestCase):
+
+    def test_kernels(self):
+        for circuit_name, names in circuits.CIRCUIT_ELEMENTS.items():
+            circuit_elements = {name: elements[name] for name in names}
+            expected = getattr(circuits, 'cir_' + circuit_name)(
+                f_range[1], **circuit_elements)
+            response = circuits_jit.evaluate(circuit_name, f_range[1],
+                                             **circuit_elements)
+            expected = np.broadcast_to(expected, response.shape)
+            np.testing.assert_allclose(response, expected, rtol=1e-10,
+                                       err_msg=circuit_name)
+
+    def test_evaluate_inputs(self):
+        with self.assertRaises(AssertionError):
+            circuits_jit.evaluate('RC_parallel', f_range[1], R=10)
+        with self.assertRaises(AssertionError):
+            circuits_jit.evaluate('RLC', f_range[1], R=10)
+
+    def test_backend(self):
+        with self.assertRaises(AssertionError):
+            circuits_jit.set_backend('fortran')
+        assert circuits_jit.get_backend('numpy') == 'numpy', \
+            'the requested backend should be returned'
+        if not circuits_jit.available():
+            with self.assertWarns(UserWarning):
+                assert circuits_jit.get_backend('numba') == 'numpy', \
+                    'without numba the numpy backend should be used'
+
+        R = np.array([10, 20, 30])
+        numpy_response = batch_simulation(f_range, 'RC_parallel',
+                                          backend='numpy', R=R, C=1E-6)
+        numba_response = batch_simulation(f_range, 'RC_parallel',
+                                          backend='numba', R=R, C=1E-6)
+        np.testing.assert_allclose(numba_response, numpy_response,
+                                   rtol=1e-10)
@@ -5,7 +5,8 @@ import pandas as pd
 
 import eisy.simulation.circuits as circuits
 from eisy.simulation.data_simulation import (to_dataframe, impedance_array,
-                                             circuit_simulation)
+                                             circuit_simulation,
+                                             batch_simulation)
 
 
 class TestSimulationTools(unittest.TestCase):
@@ -90,3 +91,35 @@ class TestSimulationTools(unittest.TestCase):
         assert isinstance(C, float), 'the capacitance should be a float, +\
                                       not an integer'
         assert C <= 1, 'the capacitance value is probably too high.'
+
+        noisy_data = circuit_simulation(freq_range, circuit_name,
+                                        alteration='freq_noise',
+                                        noise_amplitude=0.2, C=C, R=R)
+        np.testing.assert_allclose(noisy_data['complex_Z [ohm]'],
+                                   impedance_data['complex_Z [ohm]'])
+        noisy_impedance = circuits.cir_RC_parallel(
+            noisy_data['angular_freq_noise [1/s]'].to_numpy(), C=C, R=R)
+        np.testing.assert_allclose(noisy_data['Re_Z_noise [ohm]'],
+                                   noisy_impedance.real)
+        np.testing.assert_allclose(noisy_data['Im_Z_noise [ohm]'],
+                                   noisy_impedance.imag)
+
+    def test_batch_simulation(self):
+        freq_range = circuits.freq_gen(10**6, 0.01)
+        R = np.array([50, 100, 150])  # ohm
+        C = 10E-6  # F
+        impedance = batch_simulation(freq_range, 'RC_parallel', R=R, C=C)
+
+        assert impedance.shape == (len(R), len(freq_range[1])), \
+            'the batched impedance should be a (N, F) matrix'
+        assert np.iscomplexobj(impedance), 'the batched impedance should be\
+ complex'
+        single = circuit_simulation(freq_range, 'RC_parallel', R=R[2], C=C)
+        np.testing.assert_allclose(impedance[2], single['complex_Z [ohm]'],
+                                   rtol=1e-12)
+        impedance = batch_simulation(freq_range, 'RC_parallel', R=100, C=C)
+        assert impedance.shape == (1, len(freq_range[1])), \
+            'single values should return a (1, F) matrix'
+        by_id = batch_simulation(circuits.freq_grid_id(10**6, 0.01),
+                                 'RC_parallel', R=100, C=C)
+        np.testing.assert_array_equal(by_id, impedance)
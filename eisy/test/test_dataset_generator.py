@@ -0,0 +1,80 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.circuits as circuits
+from eisy.simulation import generate_dataset, iter_dataset
+from eisy.simulation.dataset_generator import sample_parameters
+
+
+param_ranges = {'Rs': (10, 100), 'Rp': (100, 1000),
+                'Q': (1e-6, 1e-4, 'log'), 'alpha': (0.7, 1)}
+
+
+class TestDatasetGenerator(unittest.TestCase):
+
+    def test_sample_parameters(self):
+        for sampler in ('lhs', 'sobol', 'uniform'):
+            parameters = sample_parameters(param_ranges, 64, sampler, seed=0)
+            assert parameters.shape == (64, 4)
+            assert np.all(parameters[:, 0] >= 10) and \
+                np.all(parameters[:, 0] <= 100)
+            assert np.all(parameters[:, 2] >= 1e-6) and \
+                np.all(parameters[:, 2] <= 1e-4)
+            np.testing.assert_array_equal(
+                parameters, sample_parameters(param_ranges, 64, sampler,
+                                              seed=0))
+        # a Latin hypercube has one sample in each of the n strata
+        parameters = sample_parameters(param_ranges, 50, 'lhs', seed=1)
+        strata = np.floor((parameters[:, 0] - 10)/90*50)
+        assert len(np.unique(strata)) == 50
+        log_strata = np.floor((np.log10(parameters[:, 2]) + 6)/2*50)
+        assert len(np.unique(log_strata)) == 50
+
+        fixed = sample_parameters({'R': 100, 'C': (1e-6, 1e-5)}, 10,
+                                  seed=2)
+        np.testing.assert_array_equal(fixed[:, 0], 100)
+
+        with self.assertRaises(AssertionError):
+            sample_parameters(param_ranges, 10, sampler='grid')
+        with self.assertRaises(AssertionError):
+            sample_parameters({'R': (100, 10)}, 10)
+        with self.assertRaises(AssertionError):
+            sample_parameters({'R': (0, 10, 'log')}, 10)
+        with self.assertRaises(AssertionError):
+            sample_parameters({'R': (1, 10, 'exp')}, 10)
+
+    def test_generate_dataset(self):
+        freq_range = circuits.freq_gen(10**5, 0.1)
+        dataset = generate_dataset('RsRQ', param_ranges, 100, seed=3,
+                                   freq_range=freq_range)
+        assert dataset.names == circuits.CIRCUIT_ELEMENTS['RsRQ']
+        assert dataset.parameters.shape == (100, 4)
+        assert dataset.impedance.shape == (100, len(freq_range[0]))
+        assert circuits.get_freq_grid(dataset.grid_id) is freq_range
+        expected = circuits.cir_RsRQ(
+            freq_range[1], **{name: dataset.parameters[:, i]
+                              for i, name in enumerate(dataset.names)})
+        np.testing.assert_allclose(dataset.impedance, expected)
+
+        chunks = list(iter_dataset('RsRQ', param_ranges, 100, seed=3,
+                                   freq_range=dataset.grid_id,
+                                   chunk_size=30))
+        assert [len(chunk.impedance) for chunk in chunks] == [30, 30, 30, 10]
+        np.testing.assert_array_equal(
+            np.concatenate([chunk.impedance for chunk in chunks]),
+            dataset.impedance)
+        chunked = generate_dataset('RsRQ', param_ranges, 100, seed=3,
+                                   freq_range=freq_range, chunk_size=30)
+        np.testing.assert_array_equal(chunked.parameters, dataset.parameters)
+
+        compiled = generate_dataset('-Rs-(RQ)-',
+                                    {'Rs': 10, 'R': (100, 1000),
+                                     'Q': (1e-6, 1e-4, 'log'), 'alpha': 0.9},
+                                    16, sampler='sobol', seed=4)
+        assert compiled.names == ('Rs', 'R', 'Q', 'alpha')
+        assert compiled.impedance.shape == (16, 80)
+
+        with self.assertRaises(AssertionError):
+            generate_dataset('RsRQ', {'Rs': (10, 100)}, 10)
+        with self.assertRaises(AssertionError):
+            generate_dataset('RLC', param_ranges, 10)
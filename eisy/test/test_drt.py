@@ -0,0 +1,52 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.circuits as circuits
+from eisy.fitting.drt import compute_drt, drt_system
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+n_spectra = 20
+rng = np.random.default_rng(6)
+elements = {'Rs': rng.uniform(10, 100, n_spectra),
+            'Rp': rng.uniform(100, 500, n_spectra),
+            'Q': 10**rng.uniform(-6, -4, n_spectra),
+            'alpha': rng.uniform(0.8, 0.95, n_spectra)}
+impedance = circuits.cir_RsRQ(freq_range[1], **elements)
+
+
+class TestDRT(unittest.TestCase):
+
+    def test_compute_drt(self):
+        result = compute_drt(freq_range[1], impedance)
+        assert result.gamma.shape == (n_spectra, len(freq_range[1]))
+        np.testing.assert_allclose(result.R_inf, elements['Rs'], rtol=0.01)
+        # the polarization resistance is the area under the distribution
+        width = np.gradient(np.log(result.tau))
+        np.testing.assert_allclose(result.gamma @ width, elements['Rp'],
+                                   rtol=0.01)
+        tau_0 = (elements['Rp']*elements['Q'])**(1/elements['alpha'])
+        peak = result.tau[np.argmax(result.gamma, axis=1)]
+        assert np.all(np.abs(np.log10(peak/tau_0)) < 0.2), \
+            'the peak of the distribution should be at the time constant'
+        assert np.all(result.residual < 0.01)
+
+        smooth = compute_drt(freq_range[1], impedance, lambda_reg=1,
+                             order=2)
+        assert np.all(smooth.gamma.max(axis=1) < result.gamma.max(axis=1)), \
+            'a larger regularization should flatten the distribution'
+        single = compute_drt(freq_range[1], impedance[0], n_tau=40)
+        assert single.gamma.shape == (1, 40)
+
+    def test_drt_system(self):
+        tau, matrix, factor = drt_system(freq_range[1], lambda_reg=0.1)
+        assert matrix.shape == (2*len(freq_range[1]), len(tau) + 1)
+        cached = drt_system(freq_range[1].copy(), lambda_reg=0.1)
+        assert cached[2] is factor, 'the factorization should be cached'
+        assert not matrix.flags.writeable, 'the cached matrix is shared'
+        with self.assertRaises(AssertionError):
+            drt_system(freq_range[1], order=3)
+        with self.assertRaises(AssertionError):
+            drt_system(freq_range[1], lambda_reg=-1)
+        with self.assertRaises(AssertionError):
+            compute_drt(freq_range[1][1:], impedance)
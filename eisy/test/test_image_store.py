@@ -0,0 +1,138 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import eisy.simulation.circuits as circuits
+from eisy.simulation import image_store
+from eisy.simulation.data_simulation import batch_simulation
+from eisy.simulation.file_writer import file_writer
+from eisy.simulation.image_store import (ImageStore, learning_arrays,
+                                         load_image_store, spectrum_images)
+from eisy.simulation.rasterize import nyquist_image
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+impedance = batch_simulation(freq_range, 'RsRC', Rs=np.linspace(1, 10, 5),
+                             Rp=100, C=1e-5)
+serials = ['spectrum{}'.format(i) for i in range(5)]
+
+
+class TestImageStore(unittest.TestCase):
+
+    def test_image_store(self):
+        with tempfile.TemporaryDirectory() as path:
+            # the other files of the folder are not touched by the store
+            np.save(os.path.join(path, 'training.npy'), np.arange(3))
+            with ImageStore(path, plot_type='all', chunk_size=2) as store:
+                store.append(freq_range[0], impedance[:3], 'none',
+                             serials[:3])
+                store.append(freq_range[0], impedance[3:], 'noisy',
+                             serials[3:])
+                assert len(store) == 5
+            stored = load_image_store(path)
+            assert isinstance(stored.images['nyquist'], np.memmap)
+            assert stored.images['log_freq'].shape == (5, 50, 50)
+            assert stored.images['rgb'].shape == (5, 80, 80, 3)
+            np.testing.assert_array_equal(
+                stored.images['nyquist'],
+                spectrum_images('nyquist', freq_range[0], impedance))
+            assert list(stored.labels) == ['none']*3 + ['noisy']*2
+            assert list(stored.serials) == serials
+
+            # the store can be reopened to append more images
+            with ImageStore(path, plot_type='all') as store:
+                store.append(freq_range[0], impedance[0], 'none', 'last')
+            stored = load_image_store(path)
+            assert len(stored.images['rgb']) == 6
+            assert stored.serials[-1] == 'last'
+
+            # the store can be overwritten
+            with ImageStore(path, plot_type='nyquist', mode='w') as store:
+                store.append(freq_range[0], impedance[:2], 'none',
+                             serials[:2])
+            stored = load_image_store(path)
+            assert list(stored.images) == ['nyquist']
+            assert len(stored.labels) == 2
+            np.testing.assert_array_equal(
+                np.load(os.path.join(path, 'training.npy')), np.arange(3))
+
+            # the images appended to a store are those of its plots
+            with self.assertRaises(AssertionError):
+                ImageStore(path, plot_type='two')
+            arrays = image_store._NpyArrays(path, 'a')
+            arrays.append('labels', np.array([b'none']))
+            arrays.close()
+            with self.assertRaises(AssertionError):
+                ImageStore(path, plot_type='nyquist')
+            with self.assertRaises(AssertionError):
+                ImageStore(path, plot_type='bode')
+            with self.assertRaises(AssertionError):
+                ImageStore(path, backend='png')
+
+    def test_optional_backends(self):
+        for backend, module in (('hdf5', image_store.h5py),
+                                ('zarr', image_store.zarr)):
+            with tempfile.TemporaryDirectory() as folder:
+                path = os.path.join(folder, 'images.' + backend)
+                if module is None:
+                    with self.assertRaises(ImportError):
+                        ImageStore(path, backend=backend)
+                    continue
+                with ImageStore(path, backend=backend) as store:
+                    store.append(freq_range[0], impedance[:3], 'none',
+                                 serials[:3])
+                with ImageStore(path) as store:
+                    store.append(freq_range[0], impedance[3:], 'noisy',
+                                 serials[3:])
+                with self.assertRaises(AssertionError):
+                    ImageStore(path, plot_type='all')
+                stored = load_image_store(path, backend)
+                np.testing.assert_array_equal(
+                    stored.images['nyquist'][:],
+                    nyquist_image(impedance))
+                assert list(stored.labels) == ['none']*3 + ['noisy']*2
+                assert list(stored.serials) == serials
+                training, validation = learning_arrays(path, split=0.4)
+                assert training[0].shape == (3, 50, 50, 1)
+                np.testing.assert_array_equal(validation[1].sum(axis=0),
+                                              [1, 1])
+
+    def test_file_writer_store(self):
+        with tempfile.TemporaryDirectory() as folder:
+            save_location = folder + '/'
+            with ImageStore(save_location + 'images') as store:
+                file_writer(freq_range, 'RC_parallel',
+                            save_location=save_location, store=store,
+                            R=100, C=1e-5)
+            # the images are stored instead of the .png files
+            assert not os.path.exists(save_location + 'plots')
+            stored = load_image_store(save_location + 'images')
+            assert stored.images['nyquist'].shape == (1, 50, 50)
+            assert stored.labels[0] == 'none'
+            assert os.path.exists(save_location + stored.serials[0] + '.csv')
+
+    def test_learning_arrays(self):
+        with tempfile.TemporaryDirectory() as folder:
+            # the classes are written one after the other
+            with ImageStore(folder, plot_type='two') as store:
+                store.append(freq_range[0], impedance, 'noisy', serials)
+                store.append(freq_range[0], impedance[:4], 'not_noisy',
+                             serials[:4])
+            training, validation = learning_arrays(
+                folder, 'log_freq', classes=['noisy', 'not_noisy'], split=0.4)
+            assert training[0].shape == (5, 50, 50, 1)
+            assert validation[0].shape == (4, 50, 50, 1)
+            # each class is split separately
+            np.testing.assert_array_equal(validation[1].sum(axis=0), [2, 2])
+            np.testing.assert_array_equal(training[1].sum(axis=0), [3, 2])
+            # the validation set is drawn with the given seed
+            np.testing.assert_array_equal(
+                learning_arrays(folder, 'log_freq', split=0.4)[1][0],
+                validation[0])
+            assert training[0].dtype == np.uint8
+            with self.assertRaises(AssertionError):
+                learning_arrays(folder, 'rgb')
+            with self.assertRaises(AssertionError):
+                learning_arrays(folder, classes=['noisy'])
@@ -0,0 +1,72 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.circuits as circuits
+from eisy.fitting.initial_guess import (estimate_elements,
+                                        high_frequency_resistance)
+from eisy.fitting.least_squares import fit_circuit
+from eisy.simulation.data_simulation import impedance_array
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+n_spectra = 30
+rng = np.random.default_rng(4)
+
+
+def random_elements(circuit_name):
+    elements = {}
+    for name in circuits.CIRCUIT_ELEMENTS[circuit_name]:
+        if name.startswith('alpha'):
+            elements[name] = rng.uniform(0.7, 0.95, n_spectra)
+        elif name.startswith(('Q', 'C')):
+            elements[name] = 10**rng.uniform(-6, -4, n_spectra)
+        elif name == 'sigma':
+            elements[name] = rng.uniform(10, 100, n_spectra)
+        else:
+            elements[name] = rng.uniform(10, 500, n_spectra)
+    # the two arcs should be distinguishable and within the frequency range
+    for name in ('Q', 'C'):
+        if name + '2' in elements:
+            elements[name + '1'] = 10**rng.uniform(-6, -5.5, n_spectra)
+            elements[name + '2'] = elements[name + '1']*300
+    return elements
+
+
+class TestInitialGuess(unittest.TestCase):
+
+    def test_estimate_elements(self):
+        for circuit_name in circuits.CIRCUIT_ELEMENTS:
+            elements = random_elements(circuit_name)
+            impedance = getattr(circuits, 'cir_' + circuit_name)(
+                freq_range[1], **elements)
+            guess = estimate_elements(freq_range[1], impedance, circuit_name)
+            assert set(guess) == set(elements), circuit_name
+            for name, value in elements.items():
+                assert guess[name].shape == (n_spectra,), name
+                error = np.median(np.abs(np.log(guess[name]/value)))
+                assert error < 0.5, '{} of {} is off by {:.2f}'.format(
+                    name, circuit_name, error)
+
+    def test_impedance_array(self):
+        elements = random_elements('RsRQ')
+        impedance = circuits.cir_RsRQ(freq_range[1], **elements)
+        guess = estimate_elements(freq_range[1], impedance_array(impedance),
+                                  'RsRQ')
+        reverse = estimate_elements(freq_range[1][::-1], impedance[:, ::-1],
+                                    'RsRQ')
+        for name in elements:
+            np.testing.assert_allclose(guess[name], reverse[name])
+        np.testing.assert_allclose(
+            high_frequency_resistance(freq_range[1], impedance),
+            elements['Rs'], rtol=0.05)
+        with self.assertRaises(AssertionError):
+            estimate_elements(freq_range[1], impedance, 'RLC')
+        with self.assertRaises(AssertionError):
+            estimate_elements(freq_range[1][1:], impedance, 'RsRQ')
+
+    def test_default_guess(self):
+        elements = random_elements('RsRQRQ')
+        impedance = circuits.cir_RsRQRQ(freq_range[1], **elements)
+        result = fit_circuit(freq_range[1], impedance, 'RsRQRQ')
+        assert np.mean(result.residual < 1e-6) >= 0.9, \
+            'the fits starting from the estimated elements should converge'
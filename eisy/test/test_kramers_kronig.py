@@ -0,0 +1,50 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.circuits as circuits
+from eisy.fitting.kramers_kronig import design_matrix, kk_test
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+n_spectra = 20
+rng = np.random.default_rng(5)
+elements = {'Rs': rng.uniform(10, 100, n_spectra),
+            'Rp': rng.uniform(100, 500, n_spectra),
+            'Q': 10**rng.uniform(-6, -4, n_spectra),
+            'alpha': rng.uniform(0.7, 0.95, n_spectra),
+            'sigma': rng.uniform(10, 100, n_spectra)}
+impedance = circuits.cir_Randles_simplified(freq_range[1], **elements)
+
+
+class TestKramersKronig(unittest.TestCase):
+
+    def test_kk_test(self):
+        result = kk_test(freq_range[1], impedance)
+        assert result.valid.all(), 'the circuit spectra should be valid'
+        assert np.all(result.kk_residual < 1e-3)
+        assert result.Z_fit.shape == impedance.shape
+        assert result.residual_real.shape == impedance.shape
+
+        # the real part of the spectra, drifting along the measurement, no
+        # longer matches the imaginary part
+        drift = impedance.real*np.linspace(1, 1.5, len(freq_range[1])) + \
+            1j*impedance.imag
+        result = kk_test(freq_range[1], drift)
+        assert not result.valid.any(), 'the drift was not detected'
+
+        chunked = kk_test(freq_range[1], drift, chunk_size=3)
+        np.testing.assert_allclose(chunked.kk_residual, result.kk_residual)
+        single = kk_test(freq_range[1], drift[0])
+        np.testing.assert_allclose(single.kk_residual,
+                                   result.kk_residual[:1])
+
+    def test_design_matrix(self):
+        matrix = design_matrix(freq_range[1], 10)
+        assert matrix.shape == (2*len(freq_range[1]), 13)
+        assert design_matrix(freq_range[1].copy(), 10) is matrix, \
+            'the design matrix should be cached'
+        assert not matrix.flags.writeable, 'the cached matrix is shared'
+        with self.assertRaises(AssertionError):
+            design_matrix([0, 1, 2])
+        with self.assertRaises(AssertionError):
+            kk_test(freq_range[1][1:], impedance)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import unittest
+
+import eisy.simulation.circuits as circuits
+from eisy.fitting.least_squares import fit_circuit, stack_spectra
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+n_spectra = 50
+rng = np.random.default_rng(0)
+true_elements = {'Rs': rng.uniform(5, 50, n_spectra),
+                 'Rp': rng.uniform(50, 500, n_spectra),
+                 'Q': 10**rng.uniform(-6, -4, n_spectra),
+                 'alpha': rng.uniform(0.7, 1, n_spectra)}
+impedance = circuits.cir_RsRQ(freq_range[1], **true_elements)
+
+
+class TestLeastSquares(unittest.TestCase):
+
+    def test_fit_circuit(self):
+        initial_guess = {name: value*rng.uniform(0.7, 1.3, n_spectra)
+                         for name, value in true_elements.items()}
+        initial_guess['alpha'] = np.full(n_spectra, 0.9)
+        result = fit_circuit(freq_range[1], impedance, 'RsRQ',
+                             initial_guess=initial_guess)
+
+        assert result.converged.all(), 'all the fits should converge'
+        assert result.parameters['Rs'].shape == (n_spectra,), \
+            'one value per spectrum should be returned'
+        for name, value in true_elements.items():
+            np.testing.assert_allclose(result.parameters[name], value,
+                                       rtol=1e-6, err_msg=name)
+        assert np.all(result.residual < 1e-8), \
+            'noiseless spectra should be fitted exactly'
+
+    def test_fit_noisy_spectra(self):
+        noise = 0.01*np.abs(impedance)*(rng.standard_normal(impedance.shape) +
+                                        1j*rng.standard_normal(
+                                            impedance.shape))
+        result = fit_circuit(freq_range[1], impedance + noise, 'RsRQ')
+        np.testing.assert_allclose(result.parameters['Rp'],
+                                   true_elements['Rp'], rtol=0.05)
+        assert np.all(result.residual < 0.05), \
+            'the residuals should be of the order of the noise'
+        assert np.all(result.n_iter > 0), 'the fit did not iterate'
+
+    def test_fit_inputs(self):
+        with self.assertRaises(AssertionError):
+            fit_circuit(freq_range[1], impedance, 'RLC')
+        with self.assertRaises(AssertionError):
+            fit_circuit(freq_range[1], impedance, 'RsRQ',
+                        initial_guess={'Rs': 10})
+        result = fit_circuit(freq_range[1], impedance[0], 'RsRQ',
+                             chunk_size=1)
+        assert len(result.rss) == 1, 'a single spectrum should be accepted'
+
+    def test_stack_spectra(self):
+        dataframes = [pd.DataFrame({'freq_hz': freq_range[0],
+                                    'z_real_ohm': impedance[i].real,
+                                    'z_imag_ohm': impedance[i].imag})
+                      for i in range(3)]
+        freq, stacked = stack_spectra(dataframes)
+        np.testing.assert_array_equal(freq, freq_range[0])
+        np.testing.assert_array_equal(stacked, impedance[:3])
+
+        dataframes[1] = dataframes[1].iloc[::-1]
+        with self.assertRaises(AssertionError):
+            stack_spectra(dataframes)
@@ -0,0 +1,81 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.circuits as circuits
+from eisy.fitting.model_selection import (information_criterion,
+                                          select_circuit)
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+n_spectra = 20
+rng = np.random.default_rng(3)
+
+
+def noisy(impedance):
+    return impedance + 0.005*np.abs(impedance)*(
+        rng.standard_normal(impedance.shape) +
+        1j*rng.standard_normal(impedance.shape))
+
+
+rsrc = noisy(circuits.cir_RsRC(freq_range[1],
+                               Rs=rng.uniform(10, 100, n_spectra),
+                               Rp=rng.uniform(100, 500, n_spectra),
+                               C=10**rng.uniform(-6, -4, n_spectra)))
+randles = noisy(circuits.cir_Randles_simplified(
+    freq_range[1], Rs=rng.uniform(10, 100, n_spectra),
+    Rp=rng.uniform(100, 500, n_spectra), Q=10**rng.uniform(-6, -4, n_spectra),
+    alpha=rng.uniform(0.7, 0.95, n_spectra),
+    sigma=rng.uniform(10, 100, n_spectra)))
+
+
+class TestModelSelection(unittest.TestCase):
+
+    def test_select_circuit(self):
+        selection = select_circuit(freq_range[1],
+                                   np.concatenate([rsrc, randles]))
+        n_circuits = len(circuits.CIRCUIT_ELEMENTS)
+        assert selection.circuit_names == tuple(circuits.CIRCUIT_ELEMENTS)
+        assert selection.ranking.shape == (2*n_spectra, n_circuits)
+        np.testing.assert_allclose(selection.weights.sum(axis=1), 1)
+        assert np.mean(selection.best[:n_spectra] == 'RsRC') >= 0.8, \
+            'the RsRC spectra were not recognized'
+        assert np.all(selection.best[n_spectra:] == 'Randles_simplified'), \
+            'the Randles spectra were not recognized'
+        assert np.all(np.isinf(selection.criterion[selection.pruned])), \
+            'the pruned candidates should not be ranked'
+        assert selection.pruned.any(), 'no candidate was pruned'
+        assert selection.fits['RsRC'].rss.shape == (2*n_spectra,)
+
+    def test_select_circuit_inputs(self):
+        selection = select_circuit(freq_range[1], rsrc[:3], criterion='bic',
+                                   circuit_names=['RsRC', 'RsRQ'],
+                                   chunk_size=2)
+        assert selection.criterion.shape == (3, 2)
+        assert set(selection.best) <= {'RsRC', 'RsRQ'}
+        with self.assertRaises(AssertionError):
+            select_circuit(freq_range[1], rsrc, circuit_names=['RLC'])
+        with self.assertRaises(AssertionError):
+            select_circuit(freq_range[1], rsrc, criterion='r2')
+        with self.assertRaises(AssertionError):
+            select_circuit(freq_range[1][1:], rsrc)
+
+    def test_select_circuit_budget(self):
+        spectra = np.concatenate([rsrc[:4], np.full((1, len(freq_range[1])),
+                                                    np.nan + 0j)])
+        selection = select_circuit(freq_range[1], spectra, round_iter=7,
+                                   max_iter=10, tol=0)
+        for fit in selection.fits.values():
+            assert np.all(fit.n_iter <= 10), 'max_iter was exceeded'
+        # every candidate of the spectrum without finite residuals is pruned
+        assert selection.pruned[-1].all()
+        assert selection.best[-1] is None
+        assert selection.confidence[-1] == 0
+        np.testing.assert_array_equal(selection.weights[-1], 0)
+        np.testing.assert_allclose(selection.weights[:-1].sum(axis=1), 1)
+
+    def test_information_criterion(self):
+        aic = information_criterion(np.array([1., 1.]), 100, [2, 3])
+        assert np.isclose(aic[1] - aic[0], 2), 'the AIC penalty should be 2k'
+        bic = information_criterion(1., 100, 2, criterion='bic')
+        assert np.isclose(bic, 100*np.log(0.01) + 2*np.log(100))
+        assert np.isfinite(information_criterion(0., 100, 2))
@@ -0,0 +1,79 @@
+import numpy as np
+import sqlite3
+import unittest
+
+import eisy.simulation.circuits as circuits
+from eisy.fitting.least_squares import fit_circuit
+from eisy.fitting.parallel import (fit_parallel, fit_to_database,
+                                   processed_data_records,
+                                   write_processed_data)
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+n_spectra = 40
+rng = np.random.default_rng(1)
+true_elements = {'Rs': rng.uniform(5, 50, n_spectra),
+                 'Rp': rng.uniform(50, 500, n_spectra),
+                 'Q': 10**rng.uniform(-6, -4, n_spectra),
+                 'alpha': rng.uniform(0.7, 1, n_spectra)}
+impedance = circuits.cir_RsRQ(freq_range[1], **true_elements)
+ids = ['spectrum_{}'.format(i) for i in range(n_spectra)]
+
+
+class TestParallel(unittest.TestCase):
+
+    def test_fit_parallel(self):
+        result = fit_parallel(freq_range[1], impedance, 'RsRQ', n_workers=2,
+                              block_size=7)
+        serial = fit_circuit(freq_range[1], impedance, 'RsRQ')
+        for name in true_elements:
+            np.testing.assert_allclose(result.parameters[name],
+                                       serial.parameters[name])
+        np.testing.assert_array_equal(result.converged, serial.converged)
+        np.testing.assert_array_equal(result.n_iter, serial.n_iter)
+
+        result = fit_parallel(freq_range[1], impedance, 'RsRQ', n_workers=2,
+                              initial_guess=true_elements)
+        assert np.median(result.n_iter) == 1, 'the initial guess was not used'
+        with self.assertRaises(AssertionError):
+            fit_parallel(freq_range[1], impedance, 'RsRQ',
+                         initial_guess={'Rs': 10})
+
+    def test_processed_data(self):
+        result = fit_circuit(freq_range[1], impedance, 'RsRQ')
+        result.converged[0] = False
+        records = list(processed_data_records(ids, result, 'RsRQ'))
+        assert records[1] == (ids[1], result.parameters['Rs'][1],
+                              result.residual[1], 'RsRQ', None)
+        assert records[0][3] is None, 'a failed fit has no circuit guess'
+        records = list(processed_data_records(
+            ids, result, 'RsRQ', kk_residual=np.arange(n_spectra)))
+        assert records[2][4] == 2, 'the kk residuals should be recorded'
+
+        connection = sqlite3.connect(':memory:')
+        # table created before the kk_residual column was introduced
+        connection.execute('CREATE TABLE processed_data (id VARCHAR NOT '
+                           'NULL, ohmic_r FLOAT, rc_fit FLOAT, '
+                           'circuit_guess VARCHAR, PRIMARY KEY (id))')
+        assert write_processed_data(connection, records) == n_spectra
+        # rows with the same id are replaced
+        write_processed_data(connection, records[:5])
+        rows = connection.execute('SELECT id, ohmic_r FROM processed_data '
+                                  'ORDER BY id').fetchall()
+        assert len(rows) == n_spectra, 'the rows should be replaced'
+
+        with self.assertRaises(AssertionError):
+            list(processed_data_records(ids[1:], result, 'RsRQ'))
+
+    def test_fit_to_database(self):
+        connection = sqlite3.connect(':memory:')
+        n_rows = fit_to_database(connection, ids, freq_range[1], impedance,
+                                 'RsRQ', n_workers=2, block_size=16)
+        assert n_rows == n_spectra, 'one row per spectrum should be written'
+        ohmic_r = dict(connection.execute('SELECT id, ohmic_r FROM '
+                                          'processed_data').fetchall())
+        np.testing.assert_allclose([ohmic_r[i] for i in ids],
+                                   true_elements['Rs'], rtol=1e-6)
+        kk_residual = connection.execute('SELECT MAX(kk_residual) FROM '
+                                         'processed_data').fetchone()[0]
+        assert kk_residual < 0.01, 'the spectra should pass the KK test'
@@ -0,0 +1,66 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.circuits as circuits
+import eisy.simulation.alterations as alterations
+import eisy.simulation.precision as precision
+from eisy.simulation.data_simulation import batch_simulation, \
+    circuit_simulation
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+
+
+class TestPrecision(unittest.TestCase):
+
+    def test_dtypes(self):
+        assert precision.real_dtype() == np.float64
+        assert precision.complex_dtype('float32') == np.complex64
+        assert precision.real_dtype(np.complex64) == np.float32
+        try:
+            precision.set_precision('float32')
+            assert precision.real_dtype() == np.float32
+            assert precision.complex_dtype() == np.complex64
+            impedance = batch_simulation(freq_range, 'RsRC', Rs=10, Rp=100,
+                                         C=1e-5)
+            assert impedance.dtype == np.complex64
+        finally:
+            precision.set_precision('float64')
+        with self.assertRaises(AssertionError):
+            precision.set_precision('float16')
+        with self.assertRaises(AssertionError):
+            precision.real_dtype('int64')
+
+    def test_single_precision_accuracy(self):
+        rng = np.random.default_rng(7)
+        for circuit_name, names in circuits.CIRCUIT_ELEMENTS.items():
+            elements = {}
+            for name in names:
+                if name.startswith('alpha'):
+                    elements[name] = rng.uniform(0.5, 1, 50)
+                elif name.startswith(('Q', 'C')):
+                    elements[name] = 10**rng.uniform(-7, -3, 50)
+                else:
+                    elements[name] = 10**rng.uniform(0, 3, 50)
+            double = batch_simulation(freq_range, circuit_name, **elements)
+            single = batch_simulation(freq_range, circuit_name,
+                                      dtype='float32', **elements)
+            assert double.dtype == np.complex128
+            assert single.dtype == np.complex64
+            np.testing.assert_allclose(single, double, rtol=1e-5)
+        compiled = batch_simulation(freq_range, '-Rs-(RQ)-W-',
+                                    dtype='float32', Rs=10, R=100, Q=1e-5,
+                                    alpha=0.8, sigma=5)
+        assert compiled.dtype == np.complex64
+
+    def test_dataframe_precision(self):
+        for alteration in (None, 'complex_noise', 'current_noise',
+                           'voltage_noise', 'freq_noise'):
+            df = circuit_simulation(freq_range, 'RsRQ', alteration=alteration,
+                                    noise_amplitude=0.05, dtype='float32',
+                                    Rs=10, Rp=100, Q=1e-5, alpha=0.9)
+            assert df['complex_Z [ohm]'].dtype == np.complex64
+            for column in df.columns.drop('complex_Z [ohm]'):
+                assert df[column].dtype == np.float32, column
+        df = alterations.outliers(df, 0.1, 0.1)
+        assert df['Re_Z_noise [ohm]'].dtype == np.float32
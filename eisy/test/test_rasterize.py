@@ -0,0 +1,96 @@
+import numpy as np
+import unittest
+import warnings
+
+import eisy.simulation.circuits as circuits
+from eisy.simulation.data_simulation import batch_simulation
+from eisy.simulation.alterations import normalize
+from eisy.simulation.rasterize import log_freq_image, nyquist_image, rgb_image
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+impedance = batch_simulation(freq_range, 'RsRC', Rs=np.linspace(1, 10, 20),
+                             Rp=100, C=1e-5)
+
+
+class TestRasterize(unittest.TestCase):
+
+    def test_nyquist_image(self):
+        images = nyquist_image(impedance)
+        assert images.shape == (20, 50, 50) and images.dtype == np.uint8
+        # dark points on a white background
+        assert set(np.unique(images)) == {0, 255}
+        # a batch gives the images of its spectra
+        np.testing.assert_array_equal(nyquist_image(impedance[3]), images[3])
+        # the lines join the points of the arc
+        scatter = nyquist_image(impedance, scatter=True)
+        assert np.all(np.sum(scatter == 0, axis=(1, 2)) <
+                      np.sum(images == 0, axis=(1, 2)))
+        # the semicircle peaks at the middle of the real axis
+        top = np.nonzero(np.any(images[0] == 0, axis=1))[0][0]
+        col = np.mean(np.nonzero(images[0, top] == 0))
+        assert abs(col - 50*(0.1 + 51)/(0.1 + 101 + 5) + 0.5) <= 1
+
+        out = np.empty((20, 32, 64), dtype=np.float32)
+        floats = nyquist_image(impedance, size=(32, 64), ink=1,
+                               background=0, marker_radius=1.5, out=out)
+        assert floats is out
+        assert floats.max() == 1 and floats.min() == 0
+        with self.assertRaises(AssertionError):
+            nyquist_image(impedance, out=out)
+
+        # the points outside the image and the invalid values are dropped
+        altered = impedance.copy()
+        altered[:, 10] = 1e12 - 1e12j
+        altered[:, 20] = np.nan
+        altered[:, 30] = np.inf - 1j
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            assert nyquist_image(altered).shape == (20, 50, 50)
+            log_freq_image(freq_range[0], altered)
+
+    def test_log_freq_image(self):
+        images = log_freq_image(freq_range[0], impedance, size=(40, 60),
+                                ink=1, background=0, dtype=np.float32)
+        assert images.shape == (20, 40, 60) and images.dtype == np.float32
+        # the lines are continuous along the frequency axis, within the
+        # margins
+        assert np.all(images[..., 3:-3].max(axis=1) == 1)
+        assert np.all(images[..., :2] == 0)
+        np.testing.assert_array_equal(
+            log_freq_image(freq_range[0], impedance[5], size=(40, 60), ink=1,
+                           background=0, dtype=np.float32), images[5])
+        # each spectrum can have its own frequencies
+        freq = np.tile(freq_range[0], (20, 1))
+        np.testing.assert_array_equal(
+            log_freq_image(freq, impedance, size=(40, 60), ink=1,
+                           background=0, dtype=np.float32), images)
+
+    def test_rgb_image(self):
+        log_freq = np.log10(freq_range[0])
+        images = rgb_image(log_freq, impedance.real, -impedance.imag)
+        assert images.shape == (20, 80, 80, 3)
+        assert images.dtype == np.float32
+        # every row is the normalized data of rgb_plot
+        np.testing.assert_allclose(images[4, 17, :, 1],
+                                   normalize(impedance[4].real), rtol=1e-6)
+        np.testing.assert_allclose(images[:, 0, :, 0],
+                                   np.tile(normalize(log_freq), (20, 1)),
+                                   rtol=1e-6)
+        np.testing.assert_array_equal(images[:, :1], images[:, 79:])
+
+        view = rgb_image(log_freq, impedance.real, out=False, height=10)
+        assert view.shape == (20, 10, 80, 3) and view.strides[1] == 0
+        assert np.all(view[..., 2] == 0)
+        out = np.empty((20, 80, 80, 3), dtype=np.uint8)
+        encoded = rgb_image(log_freq, impedance.real, -impedance.imag,
+                            out=out)
+        assert encoded is out
+        np.testing.assert_array_equal(
+            out, np.rint(images.astype(float)*255).astype(np.uint8))
+        assert rgb_image(blue_array=log_freq, dtype=np.float16).shape == \
+            (80, 80, 3)
+        with self.assertRaises(AssertionError):
+            rgb_image()
+        with self.assertRaises(AssertionError):
+            rgb_image(log_freq[1:], impedance.real)
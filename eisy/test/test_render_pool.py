@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import eisy.simulation.circuits as circuits
+from eisy.simulation.data_simulation import (batch_simulation,
+                                             circuit_simulation)
+from eisy.simulation.file_writer import save_plots
+from eisy.simulation.render_pool import (RenderPool, plot_folders,
+                                         render_batch)
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+impedance = batch_simulation(freq_range, 'RsRC', Rs=np.linspace(1, 10, 6),
+                             Rp=100, C=1e-5)
+filenames = ['spectrum{}'.format(i) for i in range(6)]
+
+
+def _files(save_location):
+    return sorted(os.path.relpath(os.path.join(folder, name), save_location)
+                  for folder, _, names in os.walk(save_location)
+                  for name in names)
+
+
+class TestRenderPool(unittest.TestCase):
+
+    def test_plot_folders(self):
+        with tempfile.TemporaryDirectory() as save_location:
+            save_location += '/'
+            folders = plot_folders(save_location, 'two')
+            assert folders == {
+                'nyquist': save_location + 'plots/nyquist/',
+                'log_freq': save_location + 'plots/log_freq/'}
+            assert all(os.path.isdir(folder) for folder in folders.values())
+            with self.assertRaises(AssertionError):
+                plot_folders(save_location, 'bode')
+
+    def test_render_pool(self):
+        with tempfile.TemporaryDirectory() as serial, \
+                tempfile.TemporaryDirectory() as parallel:
+            assert render_batch(filenames, freq_range[0], impedance,
+                                serial + '/', plot_type='all',
+                                n_workers=0) == 6
+            files = _files(serial)
+            assert len(files) == 18
+            assert 'plots/rgb/spectrum3_rgb.png' in files
+
+            with RenderPool(parallel + '/', plot_type='all', n_workers=1,
+                            chunk_size=2, max_pending=1) as pool:
+                for filename, spectrum in zip(filenames, impedance):
+                    pool.submit(filename, freq_range[0], spectrum)
+                    # the queue of chunks is bounded
+                    assert len(pool._pending) <= 1
+            assert pool.n_rendered == 6
+            assert _files(parallel) == files
+            for name in files:
+                with open(os.path.join(serial, name), 'rb') as expected, \
+                        open(os.path.join(parallel, name), 'rb') as saved:
+                    assert expected.read() == saved.read()
+
+    def test_save_plots(self):
+        response = circuit_simulation(freq_range, 'RsRC', Rs=1, Rp=100,
+                                      C=1e-5, alteration='complex_noise',
+                                      noise_amplitude=0.05)
+        options = {'alteration': 'complex_noise', 'scatter': True,
+                   'save_image': True, 'axis_off': True}
+        with tempfile.TemporaryDirectory() as serial, \
+                tempfile.TemporaryDirectory() as parallel:
+            serial += '/'
+            parallel += '/'
+            save_plots(response, 'response', save_location=serial,
+                       plot_type='all', **options)
+            # the deleted folders are created again
+            shutil.rmtree(serial + 'plots')
+            save_plots(response, 'response', save_location=serial,
+                       plot_type='all', **options)
+            files = _files(serial)
+            assert len(files) == 3
+            # the folders computed once are used instead of save_location
+            with tempfile.TemporaryDirectory() as other:
+                folders = plot_folders(other + '/', 'all')
+                save_plots(response, 'other', save_location=parallel,
+                           plot_type='all', folders=folders, **options)
+                assert len(_files(other)) == 3
+                assert not os.listdir(parallel)
+
+            # the pool saves the plots of the serial calls
+            with RenderPool(parallel, plot_type='all', n_workers=1) as pool:
+                save_plots(response, 'response', save_location=parallel,
+                           plot_type='all', pool=pool, **options)
+                with self.assertRaises(AssertionError):
+                    save_plots(response, 'response', save_location=serial,
+                               plot_type='all', pool=pool, **options)
+                with self.assertRaises(AssertionError):
+                    save_plots(response, 'response', save_location=parallel,
+                               plot_type='nyquist', pool=pool, **options)
+                with self.assertRaises(AssertionError):
+                    save_plots(response, 'response', save_location=parallel,
+                               plot_type='all', pool=pool,
+                               **dict(options, axis_off=False))
+            assert pool.n_rendered == 1
+            assert _files(parallel) == files
+            for name in files:
+                with open(os.path.join(serial, name), 'rb') as expected, \
+                        open(os.path.join(parallel, name), 'rb') as saved:
+                    assert expected.read() == saved.read(), name
@@ -0,0 +1,69 @@
+import io
+import os
+import tempfile
+import unittest
+
+import matplotlib.pyplot as plt
+import numpy as np
+from PIL import Image
+
+import eisy.simulation.circuits as circuits
+from eisy.simulation.data_simulation import circuit_simulation
+from eisy.simulation.plotting import log_freq_plot, nyquist_plot
+from eisy.simulation.renderer import PlotRenderer, encode_png, get_renderer
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+response = circuit_simulation(freq_range, 'RsRC', Rs=10, Rp=100, C=1e-5)
+
+
+class TestRenderer(unittest.TestCase):
+
+    def test_encode_png(self):
+        image = np.random.default_rng(0).integers(0, 256, (7, 5, 4),
+                                                  dtype=np.uint8)
+        for channels in (image, image[..., :3], image[..., 0]):
+            decoded = np.asarray(Image.open(io.BytesIO(encode_png(
+                np.ascontiguousarray(channels)))))
+            np.testing.assert_array_equal(decoded, channels)
+        with self.assertRaises(AssertionError):
+            encode_png(image.astype(float))
+
+    def test_renderer(self):
+        renderer = get_renderer('nyquist')
+        assert get_renderer('nyquist') is renderer
+        assert get_renderer('nyquist', scatter=True) is not renderer
+        with self.assertRaises(AssertionError):
+            PlotRenderer('bode')
+
+        # the axis-off images of the plotting module, 100 dpi
+        image = renderer.to_array(freq_range[0],
+                                  response['complex_Z [ohm]'])
+        assert image.shape == (482, 485, 4)
+        # the data is updated in place for the next spectrum
+        other = renderer.to_array(freq_range[0],
+                                  2*response['complex_Z [ohm]'])
+        assert not np.array_equal(image, other)
+        np.testing.assert_array_equal(
+            renderer.to_array(freq_range[0], response['complex_Z [ohm]']),
+            image)
+        log_freq = PlotRenderer('log_freq', transparent=True).to_array(
+            freq_range[0], response['complex_Z [ohm]'])
+        assert log_freq.shape == (405, 485, 4)
+        assert log_freq[0, 0, 3] == 0
+
+        figures = plt.get_fignums()
+        with tempfile.TemporaryDirectory() as save_location:
+            save_location += '/'
+            nyquist_plot(response, filename='nyquist',
+                         save_location=save_location, save_image=True,
+                         axis_off=True)
+            log_freq_plot(response, filename='log_freq',
+                          save_location=save_location, save_image=True,
+                          axis_off=True)
+            assert sorted(os.listdir(save_location)) == ['log_freq.png',
+                                                         'nyquist.png']
+            saved = np.asarray(Image.open(save_location + 'nyquist.png'))
+            np.testing.assert_array_equal(saved, image)
+        # no pyplot figure was created
+        assert plt.get_fignums() == figures
@@ -0,0 +1,72 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.alterations as alterations
+import eisy.simulation.circuits as circuits
+import eisy.simulation.rng as rng
+from eisy.simulation import generate_dataset
+from eisy.simulation.data_simulation import batch_simulation
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+impedance = batch_simulation(freq_range, 'RsRC', Rs=np.linspace(1, 10, 10),
+                             Rp=100, C=1e-5)
+
+
+class TestRNG(unittest.TestCase):
+
+    def tearDown(self):
+        rng.set_seed(None)
+
+    def test_seeds(self):
+        assert rng.sample_seed(5, 42).spawn_key == (0, 5)
+        np.testing.assert_array_equal(
+            rng.sample_seed(5, 42).generate_state(4),
+            rng.sample_seed(5, np.random.SeedSequence(42)).generate_state(4))
+        workers = rng.worker_seeds(3, seed=42)
+        states = [seed.generate_state(4).tolist() for seed in workers]
+        assert len(set(map(tuple, states))) == 3
+        # the streams of the workers and of the samples are independent
+        samples = [rng.sample_seed(i, 42).generate_state(4).tolist()
+                   for i in range(3)]
+        assert not set(map(tuple, states)) & set(map(tuple, samples))
+        generators = rng.sample_generators([0, 1], seed=42)
+        assert generators[0].random() != generators[1].random()
+
+        rng.set_seed(3)
+        assert rng.get_seed() == 3
+        first = rng.default_generator().random(4)
+        rng.set_seed(3)
+        np.testing.assert_array_equal(rng.default_generator().random(4),
+                                      first)
+        rng.set_seed(None)
+        assert isinstance(rng.get_seed(), int)
+        with self.assertRaises(AssertionError):
+            rng.set_seed(1.5)
+        with self.assertRaises(AssertionError):
+            rng.generators(np.random.default_rng(0), sample_index=[0])
+
+    def test_sample_streams(self):
+        # a spectrum of a shard is regenerated alone from its index
+        shard = alterations.batch_voltage_noise(
+            impedance, 0.1, seed=7, sample_index=np.arange(100, 110))
+        for i in (0, 3, 9):
+            np.testing.assert_array_equal(
+                alterations.batch_voltage_noise(impedance[i], 0.1, seed=7,
+                                                sample_index=[100 + i]),
+                shard[i])
+        with self.assertRaises(AssertionError):
+            alterations.batch_complex_noise(impedance, 0.1, seed=7,
+                                            sample_index=[0, 1])
+
+        rng.set_seed(11)
+        first = alterations.batch_complex_noise(impedance, 0.1)
+        dataset = generate_dataset('RsRC', {'Rs': (1, 10), 'Rp': (10, 100),
+                                            'C': (1e-6, 1e-4, 'log')}, 8)
+        rng.set_seed(11)
+        np.testing.assert_array_equal(
+            alterations.batch_complex_noise(impedance, 0.1), first)
+        np.testing.assert_array_equal(
+            generate_dataset('RsRC', {'Rs': (1, 10), 'Rp': (10, 100),
+                                      'C': (1e-6, 1e-4, 'log')},
+                             8).parameters, dataset.parameters)
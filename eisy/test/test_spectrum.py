@@ -0,0 +1,72 @@
+import numpy as np
+import unittest
+
+import eisy.simulation.circuits as circuits
+from eisy.simulation import ImpedanceSpectrum, SpectrumBatch, \
+    generate_dataset
+from eisy.simulation.data_simulation import batch_simulation, \
+    circuit_simulation
+
+
+freq_range = circuits.freq_gen(10**6, 0.01)
+elements = {'Rs': 10, 'Rp': 100, 'Q': 1e-5, 'alpha': 0.9}
+
+
+class TestImpedanceSpectrum(unittest.TestCase):
+
+    def test_impedance_spectrum(self):
+        df = circuit_simulation(freq_range, 'RsRQ', **elements)
+        spectrum = ImpedanceSpectrum.from_dataframe(df)
+        assert len(spectrum) == len(freq_range[0])
+        assert not hasattr(spectrum, '__dict__')
+        assert spectrum._modulus is None, 'the modulus should be lazy'
+        assert spectrum.modulus is spectrum.modulus
+        assert np.shares_memory(spectrum.real, spectrum.impedance)
+
+        converted = spectrum.to_dataframe()
+        assert list(converted.columns) == list(df.columns)
+        for column in df.columns:
+            np.testing.assert_allclose(converted[column], df[column])
+        assert np.shares_memory(converted['complex_Z [ohm]'].to_numpy(),
+                                spectrum.impedance)
+        assert not np.shares_memory(
+            spectrum.to_dataframe(copy=True)['freq [Hz]'].to_numpy(),
+            spectrum.freq)
+
+        single = ImpedanceSpectrum(freq_range[0],
+                                   spectrum.impedance.astype(np.complex64))
+        assert single.freq.dtype == np.float32
+        assert single.phase.dtype == np.float32
+        with self.assertRaises(AssertionError):
+            ImpedanceSpectrum(freq_range[0][:10], spectrum.impedance)
+
+    def test_spectrum_batch(self):
+        impedance = batch_simulation(freq_range, 'RsRQ', Rs=[10, 20, 30],
+                                     Rp=100, Q=1e-5, alpha=0.9)
+        batch = SpectrumBatch.from_freq_range(freq_range, impedance)
+        assert len(batch) == 3
+        assert batch.angular_freq is freq_range[1]
+        assert batch.modulus.shape == (3, len(freq_range[0]))
+
+        spectrum = batch[1]
+        assert isinstance(spectrum, ImpedanceSpectrum)
+        assert np.shares_memory(spectrum.impedance, batch.impedance)
+        np.testing.assert_allclose(spectrum.phase, batch.phase[1])
+        assert len(batch[1:]) == 2 and len(list(batch)) == 3
+
+        df = batch.to_dataframe()
+        assert len(df) == 3*len(freq_range[0])
+        np.testing.assert_array_equal(df['spectrum'].unique(), [0, 1, 2])
+        np.testing.assert_allclose(
+            batch.to_dataframe(2)['Re_Z [ohm]'], impedance[2].real)
+
+        dataframes = [circuit_simulation(freq_range, 'RsRQ', **elements)
+                      for i in range(2)]
+        assert SpectrumBatch.from_dataframes(dataframes).impedance.shape == \
+            (2, len(freq_range[0]))
+        dataset = generate_dataset('RsRQ', {'Rs': (10, 100),
+                                            'Rp': (100, 1000),
+                                            'Q': (1e-6, 1e-4, 'log'),
+                                            'alpha': (0.7, 1)}, 8, seed=0)
+        batch = SpectrumBatch.from_dataset(dataset)
+        assert batch.impedance is dataset.impedance
@@ -38,7 +38,7 @@ setup(name='eisy',
       license='MIT',
       author='Maria Polit, Abdul Moeez, David Hurt,\
             Mihyun Kim, Yao-Yu Li',
-      python_requires='>=3.5',
+      python_requires='>=3.9',
       packages=setuptools.find_packages())
 
 classifiers = ("Programming Language :: Python :: 3",